@@ -0,0 +1,330 @@
+"""
+A cooperative game loop built on asyncio, with a task for each job, all
+running at their own rate and, but for input, sleeping when they have
+nothing to do:
+
+- input reads the keys every input_ms milliseconds and hands the events to
+  the game, counting the idle ticks up to then so that events are handled
+  (and recorded) on the right tick.  keypad's event queue can't be awaited,
+  so this task polls it, and it's the one task that still wakes up
+  1000 / input_ms times a second while nothing happens; a longer input_ms
+  trades key latency for fewer wake-ups
+- engine steps the game on the same fixed timestep as game_loop.GameLoop,
+  skipping idle ticks, and sleeps until the next tick that does something
+  or until a key was handled, whichever comes first (when the game is
+  paused or over, only a key wakes it)
+- render delivers the score, level and state callbacks (which re-render
+  the labels) and updates the display at most max_fps times a second,
+  yielding between the two so that slow label updates don't hold up keys
+- battery polls the battery every battery_s seconds, instead of the user
+  interface checking the clock on every frame
+- audio starts, pauses and stops the music when the game state changes,
+  outside of the callback that reported the change
+
+>>> loop = AsyncGameLoop(game, user_interface, game_controls, sound_controller)
+>>> asyncio.run(loop.run())
+
+CircuitPython runs the same code with the asyncio library (see
+requirements.txt).  A task only gives the others a turn when it awaits, so
+the time each task spends between awaits is added up in the loop's stats
+(LoopStats): busy_ns and runs per task and the longest single turn in
+longest_ns, with idle_percent() for the share of the time that no task was
+running.  On a host, the tasks run against the stubs in benchmarks/stubs
+(see benchmarks/run_async.py).
+"""
+import asyncio
+import time
+
+NS_PER_MS = 1000000
+NS_PER_SECOND = 1000000000
+
+TASK_NAMES = ('input', 'engine', 'render', 'battery', 'audio')
+INPUT = 0
+ENGINE = 1
+RENDER = 2
+BATTERY = 3
+AUDIO = 4
+
+class LoopStats:
+    """
+    Count what an AsyncGameLoop did: the ticks it stepped, skipped and
+    dropped, the frames it drew, and the turns, busy time and longest turn
+    of every task (indexed like TASK_NAMES).
+    """
+    def __init__(self):
+        self.ticks = 0
+        self.skipped_ticks = 0
+        self.dropped_ticks = 0
+        self.frames = 0
+        self.busy_ns = [0] * len(TASK_NAMES)
+        self.longest_ns = [0] * len(TASK_NAMES)
+        self.runs = [0] * len(TASK_NAMES)
+        self.started_ns = None
+
+class AsyncGameLoop:
+    """
+    Run a game as cooperative asyncio tasks.
+
+    :param Game game: The game to run.
+    :param UserInterface user_interface: The user interface; its battery is
+        polled by the battery task, so its own polling is turned off.
+    :param controls: Object with a get_event() method that returns a key event or None.
+    :param SoundController sound: Plays the music, or None for no audio task.
+    :param int max_fps: The most times per second the display is updated.
+    :param int input_ms: How often the keys are read, in milliseconds.
+    :param int battery_s: How often the battery is read, in seconds.
+    :param int max_catch_up: The most ticks run back to back to catch up.
+    :param int max_events: The most key events handled on one turn of the input task.
+    :param clock: Function returning the time in nanoseconds.
+    """
+    def __init__(self, game, user_interface, controls, sound=None, max_fps=60, input_ms=5,
+                 battery_s=60, max_catch_up=50, max_events=8, clock=time.monotonic_ns):
+        self.game = game
+        self.user_interface = user_interface
+        self.controls = controls
+        self.sound = sound
+        self.tick_ns = game.tick_ms * NS_PER_MS
+        self.frame_ns = NS_PER_SECOND // max_fps
+        self.input_s = input_ms / 1000
+        self.battery_s = battery_s
+        self.max_catch_up = max_catch_up
+        self.max_events = max_events
+        self.clock = clock
+
+        user_interface.poll_battery = False
+
+        self.stats = LoopStats()
+        self.next_tick = None
+
+        self.keys_handled = None  # asyncio.Event, created in run() on the running loop
+        self.state_changed = None
+        self.music_state = game.state
+
+        if sound is not None:
+            game.on_state_change += self.on_game_state_change
+
+    def _account(self, task, start):
+        """
+        Add the time since [start] to [task]'s busy time.
+        """
+        elapsed = self.clock() - start
+        stats = self.stats
+        stats.busy_ns[task] += elapsed
+        stats.runs[task] += 1
+        if elapsed > stats.longest_ns[task]:
+            stats.longest_ns[task] = elapsed
+
+    async def input_task(self):
+        """
+        Read the keys and hand their events to the game, then wake the engine.
+        The keys are polled every input_ms milliseconds, since keypad has no
+        event that a task can await.
+        """
+        game = self.game
+        controls = self.controls
+
+        while True:
+            start = self.clock()
+            # the engine is asleep, so bring the game up to the tick the keys come on
+            self._skip_idle_ticks(start)
+            event = controls.get_event()
+
+            if event:
+                handled = 0
+                while event and handled < self.max_events:
+                    game.handle_event(event)
+                    handled += 1
+                    event = controls.get_event() if handled < self.max_events else None
+
+                self.keys_handled.set()
+
+            self._account(INPUT, start)
+
+            await asyncio.sleep(self.input_s)
+
+    def _skip_idle_ticks(self, now):
+        """
+        Skip the ticks due by [now] that would only be counted, up to the
+        next one that isn't.
+
+        :returns int The number of ticks skipped.
+        """
+        if self.next_tick > now:
+            return 0
+
+        due = (now - self.next_tick) // self.tick_ns + 1
+        idle = self.game.idle_ticks()
+        skip = due if idle is None or idle > due else idle
+
+        if skip:
+            self.game.skip(skip)
+            self.next_tick += skip * self.tick_ns
+            self.stats.skipped_ticks += skip
+
+        return skip
+
+    async def engine_task(self):
+        """
+        Run the ticks that are due, skipping idle ones, then sleep until the
+        next tick that does something or a key was handled.
+        """
+        game = self.game
+        tick_ns = self.tick_ns
+
+        while True:
+            now = self.clock()
+            ticks = 0
+
+            while self.next_tick <= now and ticks < self.max_catch_up:
+                if self._skip_idle_ticks(now):
+                    continue
+
+                game.move()
+                self.next_tick += tick_ns
+                ticks += 1
+
+            if self.next_tick <= now:
+                # too far behind: drop the missed ticks instead of spiralling
+                missed = (now - self.next_tick) // tick_ns + 1
+                self.stats.dropped_ticks += missed
+                self.next_tick += missed * tick_ns
+
+            self.stats.ticks += ticks
+            self._account(ENGINE, now)
+
+            idle = game.idle_ticks()
+            if idle is None:
+                timeout = None
+            else:
+                timeout = max(self.next_tick + idle * tick_ns - self.clock(), 0) / NS_PER_SECOND
+
+            await self._wait_for_keys(timeout)
+
+    async def _wait_for_keys(self, timeout):
+        """
+        Sleep for [timeout] seconds (forever if None), or until the input
+        task handled a key.
+        """
+        try:
+            if timeout is None:
+                await self.keys_handled.wait()
+            else:
+                await asyncio.wait_for(self.keys_handled.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        self.keys_handled.clear()
+
+    async def render_task(self):
+        """
+        Deliver the game's callbacks and update the display, max_fps times a second.
+        """
+        next_frame = self.clock()
+
+        while True:
+            start = self.clock()
+            self.game.flush_events()
+            self._account(RENDER, start)
+
+            # give the keys a turn between re-rendering the labels and drawing the board
+            await asyncio.sleep(0)
+
+            start = self.clock()
+            self.user_interface.update()
+            self.stats.frames += 1
+            self._account(RENDER, start)
+
+            next_frame += self.frame_ns
+            now = self.clock()
+            if next_frame <= now:
+                next_frame = now + self.frame_ns
+
+            await asyncio.sleep((next_frame - now) / NS_PER_SECOND)
+
+    async def battery_task(self):
+        """
+        Read the battery every battery_s seconds.
+        """
+        while True:
+            start = self.clock()
+            self.user_interface.update_battery()
+            self._account(BATTERY, start)
+
+            await asyncio.sleep(self.battery_s)
+
+    def on_game_state_change(self, state):
+        """
+        Game state callback: leave the music to the audio task.
+        """
+        self.music_state = state
+        if self.state_changed is not None:
+            self.state_changed.set()
+
+    async def audio_task(self):
+        """
+        Start, pause or stop the music whenever the game state changed.
+        """
+        while True:
+            await self.state_changed.wait()
+            self.state_changed.clear()
+
+            start = self.clock()
+            self.sound.on_game_state_change(self.music_state)
+            self._account(AUDIO, start)
+
+    def idle_percent(self):
+        """
+        Get the share of the time since run() started that no task was
+        running, in percent.
+        """
+        stats = self.stats
+        if stats.started_ns is None:
+            return 100
+
+        total = self.clock() - stats.started_ns
+        busy = sum(stats.busy_ns)
+
+        return max(total - busy, 0) * 100 / total if total else 100
+
+    def report(self):
+        """
+        Get one line of text per task, with its turns, busy time and longest
+        turn, followed by the idle time.
+        """
+        stats = self.stats
+        lines = ['{:<8} {:>8} {:>10} {:>10}'.format('task', 'turns', 'busy ms', 'max us')]
+
+        for task, name in enumerate(TASK_NAMES):
+            lines.append('{:<8} {:>8} {:>10.1f} {:>10.0f}'.format(
+                name, stats.runs[task], stats.busy_ns[task] / NS_PER_MS,
+                stats.longest_ns[task] / 1000
+            ))
+
+        lines.append('idle {:.1f}%, {} ticks stepped, {} skipped, {} dropped, {} frames'.format(
+            self.idle_percent(), stats.ticks, stats.skipped_ticks, stats.dropped_ticks,
+            stats.frames
+        ))
+
+        return lines
+
+    def print_report(self):
+        """ Print report(), one line per task. """
+        for line in self.report():
+            print(line)
+
+    async def run(self):
+        """
+        Run all the tasks, forever.
+        """
+        self.keys_handled = asyncio.Event()
+        self.state_changed = asyncio.Event()
+        self.stats.started_ns = self.clock()
+        self.next_tick = self.stats.started_ns
+
+        coroutines = [
+            self.input_task(), self.engine_task(), self.render_task(), self.battery_task()
+        ]
+        if self.sound is not None:
+            coroutines.append(self.audio_task())
+
+        await asyncio.gather(*[asyncio.create_task(coroutine) for coroutine in coroutines])
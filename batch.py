@@ -0,0 +1,165 @@
+"""
+Play thousands of seeded games in parallel across a pool of processes.
+Each worker plays whole games (see headless.play_seeded_game) and only
+sends back a compact summary per game, so no game state ever crosses a
+process boundary.  Because every game is seeded, the same --seed always
+gives the same results, no matter how many workers are used.  This runs
+on a host under CPython and doesn't need to be copied to your board.
+
+    python batch.py --games 2000 --seed 1 --workers 8
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from headless import INPUTS, play_seeded_game
+
+def play_chunk(seeds, height, width, max_ticks, input_name):
+    """
+    Play one game per seed in [seeds] (run inside a worker process).
+
+    :returns list A (seed, score, level, lines, pieces, ticks) tuple per game.
+    """
+    return [play_seeded_game(seed, height, width, max_ticks, input_name) for seed in seeds]
+
+class BatchSummary:
+    """
+    Aggregate the per-game summaries streamed back from the workers.
+    """
+    def __init__(self):
+        self.games = 0
+        self.ticks = 0
+        self.lines = 0
+        self.pieces = 0
+        self.score_total = 0
+        self.best = None
+        self.max_level = 0
+
+    def add(self, summary):
+        """
+        Add one (seed, score, level, lines, pieces, ticks) game summary.
+        """
+        _, score, level, lines, pieces, ticks = summary
+
+        self.games += 1
+        self.ticks += ticks
+        self.lines += lines
+        self.pieces += pieces
+        self.score_total += score
+        self.max_level = max(self.max_level, level)
+
+        if self.best is None or score > self.best[1]:
+            self.best = summary
+
+    @property
+    def mean_score(self):
+        """ The mean score over all games """
+        return self.score_total / self.games if self.games else 0
+
+def game_seeds(games, seed):
+    """
+    Derive one seed per game from the batch [seed].
+    """
+    rng = random.Random(seed)
+
+    return [rng.getrandbits(32) for _ in range(games)]
+
+def run_batch(games, seed=None, workers=None, chunk_size=16, height=19, width=10,
+              max_ticks=None, on_result=None, input_name='bot'):
+    """
+    Play [games] seeded games across [workers] processes (defaults to one per
+    CPU), in chunks of [chunk_size] games per task.
+
+    :param str input_name: Who plays the games (see headless.INPUTS).  The
+        scores are only meaningful with the bot: random keys hardly ever
+        clear a line.
+    :param on_result: Optional callable, called with each game summary as it arrives.
+    :returns tuple (BatchSummary, elapsed seconds)
+    """
+    seeds = game_seeds(games, seed)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+    summary = BatchSummary()
+
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            play_chunk, chunks, [height] * len(chunks), [width] * len(chunks),
+            [max_ticks] * len(chunks), [input_name] * len(chunks)
+        )
+
+        for chunk_results in results:
+            for game_summary in chunk_results:
+                summary.add(game_summary)
+
+                if on_result is not None:
+                    on_result(game_summary)
+
+    return summary, time.perf_counter() - start
+
+def print_summary(summary, elapsed, workers):
+    """ Print the aggregated results of a batch. """
+    print('workers:     {}'.format(workers))
+    print('games:       {}'.format(summary.games))
+    print('elapsed:     {:.2f}s'.format(elapsed))
+    print('games/sec:   {:.2f}'.format(summary.games / elapsed))
+    print('ticks/sec:   {:,.0f}'.format(summary.ticks / elapsed))
+    print('mean score:  {:.3f}'.format(summary.mean_score))
+    print('max level:   {}'.format(summary.max_level))
+    print('lines:       {}'.format(summary.lines))
+    print('pieces:      {}'.format(summary.pieces))
+    print('best game:   seed={} score={} level={} lines={} pieces={} ticks={}'.format(
+        *summary.best
+    ))
+
+def main():
+    """ Run a batch from the command line. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--games', type=int, default=1000, help='number of games to play')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the batch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--chunk-size', type=int, default=16, help='games per task')
+    parser.add_argument('--height', type=int, default=19, help='board height')
+    parser.add_argument('--width', type=int, default=10, help='board width')
+    parser.add_argument('--max-ticks', type=int, default=None, help='tick limit per game')
+    parser.add_argument(
+        '--input', choices=INPUTS, default=INPUTS[0],
+        help='who plays: the bot (default) or random keys, which hardly ever clear a line'
+    )
+    parser.add_argument('--scaling', action='store_true',
+                        help='run the batch with 1, 2, 4... workers and report the speedup')
+    args = parser.parse_args()
+
+    if not args.scaling:
+        summary, elapsed = run_batch(
+            args.games, args.seed, args.workers, args.chunk_size, args.height, args.width,
+            args.max_ticks, input_name=args.input
+        )
+        print_summary(summary, elapsed, args.workers)
+
+        return
+
+    worker_counts = []
+    workers = 1
+    while workers < args.workers:
+        worker_counts.append(workers)
+        workers *= 2
+    worker_counts.append(args.workers)
+
+    baseline = None
+    for workers in worker_counts:
+        summary, elapsed = run_batch(
+            args.games, args.seed, workers, args.chunk_size, args.height, args.width,
+            args.max_ticks, input_name=args.input
+        )
+        rate = summary.games / elapsed
+        baseline = baseline or rate
+
+        print('{:>3} workers: {:>8.2f} games/sec  {:>5.2f}x  (mean score {:.3f})'.format(
+            workers, rate, rate / baseline, summary.mean_score
+        ))
+
+if __name__ == '__main__':
+    main()
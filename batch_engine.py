@@ -0,0 +1,231 @@
+"""
+Step many Tetris boards at once with NumPy.  B boards are held in one
+(B, height, width) uint8 array of color indexes, and the active and next
+pieces are held in parallel arrays, so gravity, collision checks,
+freezing and line clears are applied to every board in one vectorized
+step.
+
+The rules are the ones in tetris.Tetris (intersects, freeze,
+clear_full_lines and new_game_piece), and each board draws its pieces
+from a vectorized copy of util.SeededRandom, so a board seeded with s
+gets exactly the same pieces as Tetris(height, width, rng=SeededRandom(s)).
+
+This needs NumPy and runs on a host; it doesn't need to be copied to your
+board.
+"""
+import numpy as np
+
+from tetris import GamePiece
+from util import RANDOM_STATE_MASK, colors
+
+SPAWN_X = 3
+SPAWN_Y = 0
+MAX_ROTATIONS = max(len(rotations) for rotations in GamePiece.piece_shapes)
+
+def build_cell_tables():
+    """
+    Build the (piece type, rotation, cell) tables of cell offsets from the
+    precompiled piece shapes.  Pieces with fewer rotations repeat theirs, so
+    every table has MAX_ROTATIONS rotations.
+
+    :returns tuple (cell x offsets, cell y offsets, rotations per piece type)
+    """
+    piece_types = len(GamePiece.piece_shapes)
+    cell_x = np.zeros((piece_types, MAX_ROTATIONS, 4), dtype=np.int32)
+    cell_y = np.zeros((piece_types, MAX_ROTATIONS, 4), dtype=np.int32)
+    rotations = np.zeros(piece_types, dtype=np.int32)
+
+    for piece_type, shapes in enumerate(GamePiece.piece_shapes):
+        rotations[piece_type] = len(shapes)
+
+        for rotation in range(MAX_ROTATIONS):
+            shape = shapes[rotation % len(shapes)]
+            cell_x[piece_type, rotation] = [x for x, _ in shape.cells]
+            cell_y[piece_type, rotation] = [y for _, y in shape.cells]
+
+    return cell_x, cell_y, rotations
+
+CELL_X, CELL_Y, ROTATIONS = build_cell_tables()
+
+def seed_states(seeds):
+    """
+    Seed one xorshift state per board, the same way util.SeededRandom does.
+    """
+    return np.array(
+        [(seed * 2654435761 + 0x9e3779b9) & RANDOM_STATE_MASK or 1 for seed in seeds],
+        dtype=np.uint32
+    )
+
+class BatchTetris:
+    """
+    A batch of Tetris boards that are stepped together.
+
+    :param list seeds: One seed per board; the number of seeds is the number of boards.
+    :param int height: The number of rows on each board.
+    :param int width: The number of columns on each board.
+    """
+    def __init__(self, seeds, height=19, width=10):
+        count = len(seeds)
+
+        self.height = height
+        self.width = width
+        self.boards = np.zeros((count, height, width), dtype=np.uint8)
+        self.rng_state = seed_states(seeds)
+
+        self.piece_type = np.zeros(count, dtype=np.int32)
+        self.rotation = np.zeros(count, dtype=np.int32)
+        self.x = np.full(count, SPAWN_X, dtype=np.int32)
+        self.y = np.full(count, SPAWN_Y, dtype=np.int32)
+        self.color = np.zeros(count, dtype=np.uint8)
+        self.next_piece_type = np.zeros(count, dtype=np.int32)
+        self.next_color = np.zeros(count, dtype=np.uint8)
+
+        self.alive = np.ones(count, dtype=bool)
+        self.lines = np.zeros(count, dtype=np.int64)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.pieces = np.zeros(count, dtype=np.int64)
+
+        everything = np.ones(count, dtype=bool)
+        self.piece_type, self.color = self._random_pieces(everything)
+        self.next_piece_type, self.next_color = self._random_pieces(everything)
+        self.pieces += 1
+
+    def __len__(self):
+        return len(self.boards)
+
+    def _randint(self, mask, low, high):
+        """
+        Draw a random integer in [low, high] for every board in [mask], advancing
+        only those boards' generators.  Other boards get 0.
+        """
+        state = self.rng_state
+        state_mask = np.uint32(RANDOM_STATE_MASK)
+        drawn = state.copy()
+        drawn ^= (drawn << np.uint32(11)) & state_mask
+        drawn ^= drawn >> np.uint32(13)
+        drawn ^= (drawn << np.uint32(8)) & state_mask
+
+        self.rng_state = np.where(mask, drawn, state)
+
+        return np.where(mask, low + (drawn % np.uint32(high - low + 1)).astype(np.int32), 0)
+
+    def _random_pieces(self, mask):
+        """
+        Draw a piece type and then a color for every board in [mask], in the
+        same order as GamePiece.__init__.
+        """
+        piece_type = self._randint(mask, 0, len(GamePiece.piece_shapes) - 1)
+        color = self._randint(mask, 1, len(colors) - 1).astype(np.uint8)
+
+        return piece_type, color
+
+    def _cells(self, rotation, x, y):
+        """
+        Get the (B, 4) board coordinates of every board's active piece cells.
+        """
+        return x[:, None] + CELL_X[self.piece_type, rotation], \
+            y[:, None] + CELL_Y[self.piece_type, rotation]
+
+    def intersects(self, rotation=None, x=None, y=None):
+        """
+        Determine, for every board, if the active piece (optionally at another
+        rotation or position) is either off the board or hitting the field.
+
+        :returns numpy.ndarray A (B,) array of booleans.
+        """
+        rotation = self.rotation if rotation is None else rotation
+        cells_x, cells_y = self._cells(
+            rotation, self.x if x is None else x, self.y if y is None else y
+        )
+
+        outside = (cells_y > self.height - 1) | (cells_x < 0) | (cells_x > self.width - 1)
+        board_index = np.arange(len(self.boards))[:, None]
+        hits = self.boards[
+            board_index, np.clip(cells_y, 0, self.height - 1), np.clip(cells_x, 0, self.width - 1)
+        ] > 0
+
+        return (outside | hits).any(axis=1)
+
+    def move_laterally(self, dx):
+        """
+        Move the active piece of every living board sideways by its entry in
+        [dx], unless that would make it intersect.
+        """
+        dx = np.asarray(dx, dtype=np.int32)
+        moved = self.x + dx
+        allowed = self.alive & (dx != 0) & ~self.intersects(x=moved)
+
+        self.x = np.where(allowed, moved, self.x)
+
+    def rotate(self, direction):
+        """
+        Rotate the active piece of every living board by its entry in
+        [direction] (-1 for left, 1 for right, 0 to leave it), unless that
+        would make it intersect.
+        """
+        direction = np.asarray(direction, dtype=np.int32)
+        rotated = (self.rotation + direction) % ROTATIONS[self.piece_type]
+        allowed = self.alive & (direction != 0) & ~self.intersects(rotation=rotated)
+
+        self.rotation = np.where(allowed, rotated, self.rotation)
+
+    def clear_full_lines(self, mask):
+        """
+        Remove the full lines on the boards in [mask], moving the rows above them down.
+
+        :returns numpy.ndarray The number of lines removed from each board.
+        """
+        full = (self.boards != 0).all(axis=2) & mask[:, None]
+        full_lines = full.sum(axis=1)
+        changed = np.nonzero(full_lines)[0]
+
+        if len(changed):
+            # a stable sort puts the full rows first and keeps the others in order
+            order = np.argsort(~full[changed], axis=1, kind='stable')
+            boards = np.take_along_axis(self.boards[changed], order[:, :, None], axis=1)
+            boards[np.arange(self.height)[None, :] < full_lines[changed][:, None]] = 0
+            self.boards[changed] = boards
+
+        return full_lines
+
+    def step(self, gravity=None):
+        """
+        Move the active piece of every living board (or only of those where
+        [gravity] is set) down one row, then freeze and replace the pieces
+        that landed, clear full lines and end the boards whose new piece
+        doesn't fit, just like Game.check_game_state.
+
+        :returns numpy.ndarray The number of lines each board cleared.
+        """
+        moving = self.alive if gravity is None else self.alive & np.asarray(gravity, dtype=bool)
+        self.y = np.where(moving, self.y + 1, self.y)
+
+        landed = self.alive & self.intersects()
+        if not landed.any():
+            return np.zeros(len(self), dtype=np.int64)
+
+        # we've gone down one too many steps, so go up one
+        self.y = np.where(landed, self.y - 1, self.y)
+
+        index = np.nonzero(landed)[0]
+        cells_x, cells_y = self._cells(self.rotation, self.x, self.y)
+        self.boards[index[:, None], cells_y[index], cells_x[index]] = self.color[index, None]
+
+        full_lines = self.clear_full_lines(landed)
+        self.lines += full_lines
+        self.score += full_lines ** 2
+
+        self.piece_type = np.where(landed, self.next_piece_type, self.piece_type)
+        self.color = np.where(landed, self.next_color, self.color)
+        self.rotation = np.where(landed, 0, self.rotation)
+        self.x = np.where(landed, SPAWN_X, self.x)
+        self.y = np.where(landed, SPAWN_Y, self.y)
+        self.pieces += landed
+
+        next_piece_type, next_color = self._random_pieces(landed)
+        self.next_piece_type = np.where(landed, next_piece_type, self.next_piece_type)
+        self.next_color = np.where(landed, next_color, self.next_color)
+
+        self.alive &= ~(landed & self.intersects())
+
+        return full_lines
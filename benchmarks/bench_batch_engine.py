@@ -0,0 +1,124 @@
+"""
+Check that batch_engine.BatchTetris plays exactly like tetris.Tetris, then
+measure how many board steps per second it manages for a few batch sizes.
+Needs NumPy:
+
+    python benchmarks/bench_batch_engine.py
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from batch_engine import BatchTetris
+from tetris import Tetris
+from util import SeededRandom
+
+HEIGHT = 19
+WIDTH = 10
+
+def random_actions(rng, count):
+    """ Get random (rotation direction, dx, gravity) arrays for [count] boards. """
+    return (
+        rng.integers(-1, 2, count), rng.integers(-1, 2, count), rng.random(count) < 0.5
+    )
+
+def scalar_step(tetris, rotation, dx, gravity):
+    """
+    Apply one step of the batch engine's rules to a scalar Tetris.
+
+    :returns bool False if the game ended on this step.
+    """
+    if rotation == 1:
+        tetris.rotate_right()
+    elif rotation == -1:
+        tetris.rotate_left()
+
+    if dx:
+        tetris.move_laterally(dx)
+
+    if gravity:
+        tetris.move_down()
+
+    if tetris.intersects():
+        tetris.freeze()
+        tetris.clear_full_lines()
+        tetris.new_game_piece()
+
+        return not tetris.intersects()
+
+    return True
+
+def check_against_scalar(boards=64, steps=3000, seed=1, width=WIDTH):
+    """
+    Play the same random actions on a batch and on one scalar Tetris per
+    board, and make sure the fields and pieces agree after every step.
+    """
+    seeds = list(range(seed, seed + boards))
+    batch = BatchTetris(seeds, HEIGHT, width)
+    scalars = [Tetris(HEIGHT, width, rng=SeededRandom(s)) for s in seeds]
+    alive = [True] * boards
+    rng = np.random.default_rng(seed)
+
+    for step in range(steps):
+        rotation, dx, gravity = random_actions(rng, boards)
+
+        for i, tetris in enumerate(scalars):
+            if alive[i]:
+                alive[i] = scalar_step(tetris, rotation[i], dx[i], gravity[i])
+
+        batch.rotate(rotation)
+        batch.move_laterally(dx)
+        batch.step(gravity)
+
+        for i, tetris in enumerate(scalars):
+            if not alive[i]:
+                assert not batch.alive[i], 'board {} should have ended at step {}'.format(i, step)
+                continue
+
+            field = np.array(
+                [[tetris.field.cell(x, y) for x in range(width)] for y in range(HEIGHT)]
+            )
+            piece = tetris.game_piece
+            assert (batch.boards[i] == field).all(), 'board {} differs at step {}'.format(i, step)
+            assert (batch.piece_type[i], batch.rotation[i], batch.x[i], batch.y[i]) == \
+                (piece.get_state()[0], piece.rotation, piece.x, piece.y), \
+                'piece {} differs at step {}'.format(i, step)
+            assert batch.lines[i] == tetris.lines
+
+    print('batch engine matches Tetris on {} {}-wide boards over {} steps '
+          '({} lines cleared)'.format(boards, width, steps, sum(t.lines for t in scalars)))
+
+def bench(boards, steps=500, seed=1):
+    """ Measure board steps per second for a batch of [boards] boards. """
+    rng = np.random.default_rng(seed)
+    batch = BatchTetris([random.Random(seed).getrandbits(32) + i for i in range(boards)])
+    actions = [random_actions(rng, boards) for _ in range(steps)]
+
+    start = time.perf_counter()
+    for rotation, dx, gravity in actions:
+        batch.rotate(rotation)
+        batch.move_laterally(dx)
+        batch.step(gravity)
+    elapsed = time.perf_counter() - start
+
+    print('{:>7} boards: {:>14,.0f} board-steps/sec ({} still alive)'.format(
+        boards, boards * steps / elapsed, int(batch.alive.sum())
+    ))
+
+def main():
+    """ Run the differential check and the benchmark. """
+    check_against_scalar()
+    # random play hardly ever clears lines on a full width board, so check a narrow one too
+    check_against_scalar(boards=256, steps=2000, width=7)
+
+    for boards in (1, 100, 1000, 10000):
+        bench(boards)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare the greedy bot with the lookahead bot (which also places the next
+piece) on the same seeded games, placing each piece straight away rather
+than by pressing keys, and report how well each played and how fast it
+searched.  Runs on the host under CPython:
+
+    python benchmarks/bench_bot.py
+    python benchmarks/bench_bot.py --games 20 --max-pieces 1000
+
+Games are cut off at --max-pieces, so a bot that would play forever still
+finishes; with the lookahead bot scoring at least as well as the greedy one.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from bot import apply_actions, Bot
+from keymap import Keymap
+from tetris import Game, game_state
+
+def play(bot, seed, max_pieces):
+    """
+    Let [bot] play a seeded game until it's over or [max_pieces] have spawned.
+
+    :returns tuple (score, lines, pieces)
+    """
+    game = Game(19, 10, Keymap(), seed=seed)
+    tetris = game.tetris
+
+    # the game prints every level it reaches
+    with contextlib.redirect_stdout(io.StringIO()):
+        while game.state != game_state.gameover and tetris.pieces < max_pieces:
+            placement = bot.best_placement(tetris)
+            if placement is None:
+                break
+
+            apply_actions(tetris, placement.actions)
+            game.check_game_state()
+
+    return game.score, tetris.lines, tetris.pieces
+
+def run(bot, seeds, max_pieces):
+    """
+    Play one game per seed in [seeds].
+
+    :returns tuple (mean score, mean lines, mean pieces, placements evaluated per second)
+    """
+    totals = [0, 0, 0]
+    start = time.perf_counter()
+
+    for seed in seeds:
+        for index, value in enumerate(play(bot, seed, max_pieces)):
+            totals[index] += value
+
+    elapsed = time.perf_counter() - start
+
+    return tuple(total / len(seeds) for total in totals) + (bot.evaluations / elapsed, )
+
+def main():
+    """ Play the same games with both bots and compare them. """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument('--games', type=int, default=5, help='games per bot')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the first game')
+    parser.add_argument('--max-pieces', type=int, default=500, help='piece limit per game')
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.games)
+    results = {}
+
+    print('{:<10} {:>10} {:>10} {:>10} {:>16}'.format(
+        'bot', 'score', 'lines', 'pieces', 'evaluations/s'
+    ))
+
+    for name, lookahead in (('greedy', False), ('lookahead', True)):
+        results[name] = run(Bot(lookahead=lookahead), seeds, args.max_pieces)
+        print('{:<10} {:>10.1f} {:>10.1f} {:>10.1f} {:>16,.0f}'.format(name, *results[name]))
+
+    if results['lookahead'][0] < results['greedy'][0]:
+        print('the lookahead bot scored worse than the greedy bot')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
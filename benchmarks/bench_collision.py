@@ -0,0 +1,69 @@
+"""
+Measure the per-call cost of the piece movement methods on Tetris, with
+the original 4 x 4 membership scan (ListField) against the precompiled
+per-rotation tables (BitboardField).  Runs on the host under CPython:
+
+    python benchmarks/bench_collision.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from field import BitboardField  # pylint: disable=wrong-import-position
+from fields_host import ListField  # pylint: disable=wrong-import-position
+from tetris import PieceShape, Tetris  # pylint: disable=wrong-import-position
+
+HEIGHT = 19
+WIDTH = 10
+CALLS = 10000
+
+def build_tetris(field_class, seed=1):
+    """
+    Build a Tetris instance with a half-filled field and its active piece hovering above it.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+
+    tetris = Tetris(HEIGHT, WIDTH, field_class=field_class)
+    square = PieceShape([0])
+
+    for y in range(HEIGHT // 2, HEIGHT):
+        for x in range(WIDTH):
+            if rng.random() < 0.7:
+                tetris.field.freeze(square, x, y, 1)
+
+    tetris.game_piece.y = HEIGHT // 2 - 4
+
+    return tetris
+
+def per_call_ns(field_class, method):
+    """
+    Get the best per-call time, in nanoseconds, of calling [method] on a Tetris instance.
+    """
+    tetris = build_tetris(field_class)
+    call = {
+        'intersects': tetris.intersects,
+        'move_laterally': lambda: tetris.move_laterally(1 if tetris.game_piece.x < 3 else -1),
+        'rotate_left': tetris.rotate_left,
+        'rotate_right': tetris.rotate_right,
+    }[method]
+
+    best = min(timeit.repeat(call, repeat=5, number=CALLS))
+
+    return best / CALLS * 1e9
+
+def main():
+    """ Print per-call costs for each method and field class. """
+    print('{:<16} {:>12} {:>12} {:>8}'.format('method', 'scan (ns)', 'tables (ns)', 'speedup'))
+
+    for method in ('intersects', 'move_laterally', 'rotate_left', 'rotate_right'):
+        scan = per_call_ns(ListField, method)
+        tables = per_call_ns(BitboardField, method)
+
+        print('{:<16} {:>12.0f} {:>12.0f} {:>7.1f}x'.format(method, scan, tables, scan / tables))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Compare the throughput of the field representations in field.py and
+fields_host.py on the
+three operations that run on every tick: intersects, freeze and
+clear_full_lines.  Runs on the host under CPython:
+
+    python benchmarks/bench_field.py
+"""
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from field import BitboardField, GAME_PIECE_DIMENSION
+from fields_host import CountingListField, ListField, SparseField
+from tetris import GamePiece, PieceShape
+
+HEIGHT = 19
+WIDTH = 10
+FIELD_CLASSES = (ListField, CountingListField, BitboardField, SparseField)
+SQUARE = PieceShape([0])
+ROW_SHAPES = (None, ) + tuple(
+    PieceShape(list(range(length))) for length in range(1, GAME_PIECE_DIMENSION + 1)
+)
+
+def build_placements(count, seed=1):
+    """
+    Generate a list of random (shape, x, y, color) placements that stay on the board.
+    """
+    rng = random.Random(seed)
+    shapes = [shape for rotations in GamePiece.piece_shapes for shape in rotations]
+
+    return [
+        (rng.choice(shapes), rng.randint(0, WIDTH - 4), rng.randint(0, HEIGHT - 4),
+         rng.randint(1, 6))
+        for _ in range(count)
+    ]
+
+def fill_bottom(field, rows, seed=2):
+    """
+    Fill the bottom [rows] rows of a field with random squares, leaving one
+    hole per row so that nothing is cleared by accident.
+    """
+    rng = random.Random(seed)
+
+    for y in range(HEIGHT - rows, HEIGHT):
+        hole = rng.randint(0, WIDTH - 1)
+        for x in range(WIDTH):
+            if x != hole:
+                field.freeze(SQUARE, x, y, rng.randint(1, 6))
+
+def bench_intersects(field_class, placements):
+    """ Time intersects calls on a half-filled field. """
+    field = field_class(HEIGHT, WIDTH)
+    fill_bottom(field, HEIGHT // 2)
+
+    def run():
+        for shape, x, y, _ in placements:
+            field.intersects(shape, x, y)
+
+    return run
+
+def bench_freeze(field_class, placements):
+    """ Time freeze calls on an empty field. """
+    field = field_class(HEIGHT, WIDTH)
+
+    def run():
+        for shape, x, y, color in placements:
+            field.freeze(shape, x, y, color)
+
+    return run
+
+def prefilled_state(field_class, full_rows):
+    """
+    Get the state of a half-filled field with [full_rows] full rows at the
+    bottom, for set_state.
+    """
+    field = field_class(HEIGHT, WIDTH)
+    fill_bottom(field, HEIGHT // 2)
+
+    for y in range(HEIGHT - full_rows, HEIGHT):
+        for x in range(0, WIDTH, GAME_PIECE_DIMENSION):
+            field.freeze(ROW_SHAPES[min(WIDTH - x, GAME_PIECE_DIMENSION)], x, y, 1)
+
+    return field.get_state()
+
+def time_clear(field_class, full_rows, repeat, number):
+    """
+    Get the best time, out of [repeat] runs, for clear_full_lines on [number]
+    fields, each restored with set_state from the same prefilled state before
+    the clock starts, so only the clearing is timed.
+    """
+    state = prefilled_state(field_class, full_rows)
+    fields = [field_class(HEIGHT, WIDTH) for _ in range(number)]
+    best = None
+
+    for _ in range(repeat):
+        for field in fields:
+            field.set_state(state)
+
+        start = time.perf_counter()
+        for field in fields:
+            field.clear_full_lines()
+        seconds = time.perf_counter() - start
+
+        if best is None or seconds < best:
+            best = seconds
+
+    return best
+
+def check_backends_agree(placements):
+    """
+    Play the same placements on every backend and make sure they end up
+    with identical fields.
+    """
+    fields = [field_class(HEIGHT, WIDTH) for field_class in FIELD_CLASSES]
+
+    for shape, x, _, color in placements:
+        for field in fields:
+            y = 0
+            while not field.intersects(shape, x, y + 1):
+                y += 1
+
+            if field.intersects(shape, x, y):
+                field.reset()
+                continue
+
+            field.freeze(shape, x, y, color)
+            field.clear_full_lines()
+
+        cells = [
+            [field.cell(i, j) for j in range(HEIGHT) for i in range(WIDTH)] for field in fields
+        ]
+        assert all(c == cells[0] for c in cells), 'field backends disagree'
+
+def best_time(run, repeat, number):
+    """ Get the best time for [number] calls to [run] out of [repeat] runs. """
+    return min(timeit.repeat(run, repeat=repeat, number=number))
+
+def report(name, field_class, seconds, operations):
+    """ Print operations per second. """
+    print('{:<18} {:<18} {:>12,.0f} ops/s'.format(name, field_class.__name__, operations / seconds))
+
+def main():
+    """ Run all field benchmarks. """
+    placements = build_placements(1000)
+    check_backends_agree(placements)
+
+    for field_class in FIELD_CLASSES:
+        report('intersects', field_class,
+               best_time(bench_intersects(field_class, placements), 5, 20), 20 * len(placements))
+    for field_class in FIELD_CLASSES:
+        report('freeze', field_class,
+               best_time(bench_freeze(field_class, placements), 5, 20), 20 * len(placements))
+    for full_rows in (0, 1, 4):
+        for field_class in FIELD_CLASSES:
+            report('clear ({} lines)'.format(full_rows), field_class,
+                   time_clear(field_class, full_rows, 5, 2000), 2000)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Measure how the cost of each field operation grows with the size of the
+board, from the PyBadge's 19 x 10 up to 2000 x 1000, for the bitboard and
+sparse fields.  Runs on the host under CPython, with the CircuitPython modules
+replaced by the stubs in benchmarks/stubs so that GameBoard.update can be
+timed too:
+
+    python benchmarks/bench_scaling.py
+    python benchmarks/bench_scaling.py --sizes 19x10 200x100
+
+Every board has the same stack of a few rows at the bottom, like a game
+in progress, so a cost that grows with the board rather than with the
+stack shows up as a longer bar.  The bars are on a log scale, one mark per
+doubling of the time per call.
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, 'stubs'))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..'))
+
+# pylint: disable=wrong-import-position
+from field import BitboardField
+from fields_host import ListField, SparseField
+from keymap import Keymap
+from memory import HeapMeter
+from tetris import Game, PieceShape
+
+BOARD_SIZES = ((19, 10), (200, 100), (2000, 1000))
+# ListField scans the whole field on every clear, so it's only timed when asked for
+FIELD_CLASSES = {
+    field_class.__name__: field_class for field_class in (ListField, BitboardField, SparseField)
+}
+DEFAULT_FIELDS = ('BitboardField', 'SparseField')
+STACK_ROWS = 8
+SQUARE = PieceShape([0])
+ROW = PieceShape([0, 1, 2, 3])
+
+def new_game(height, width, field_class, seed=1):
+    """
+    Create a seeded game with a stack of STACK_ROWS rows (one hole in each,
+    so none is full) and its active piece just above the stack.
+    """
+    rng = random.Random(seed)
+    game = Game(height, width, Keymap(), seed=seed, field_class=field_class)
+    field = game.tetris.field
+
+    for y in range(height - STACK_ROWS, height):
+        hole = rng.randrange(width)
+        for x in range(width):
+            if x != hole:
+                field.freeze(SQUARE, x, y, rng.randint(1, 6))
+
+    game.tetris.game_piece.y = height - STACK_ROWS - 4
+
+    return game
+
+def fill_row(field, y):
+    """ Fill every empty square of row [y], four at a time where they fit. """
+    x = 0
+    while x < field.width:
+        if x + 4 <= field.width and not field.intersects(ROW, x, y):
+            field.freeze(ROW, x, y, 1)
+            x += 4
+        else:
+            if not field.cell(x, y):
+                field.freeze(SQUARE, x, y, 1)
+            x += 1
+
+def bench_intersects(game):
+    """ intersects, for the active piece just above the stack """
+    return game.tetris.intersects
+
+def bench_freeze(game):
+    """ freeze, into the same empty spot above the stack every call """
+    tetris = game.tetris
+    piece = tetris.game_piece
+
+    return lambda: tetris.field.freeze(piece.shape(), piece.x, piece.y, piece.color)
+
+def bench_clear_none(game):
+    """ clear_full_lines, with no full line """
+    return game.tetris.clear_full_lines
+
+def bench_clear_one(game):
+    """
+    Fill the row at the top of the stack and clear it.  Filling a row takes
+    a freeze for every four squares, so this grows with the width whatever
+    the field class.
+    """
+    field = game.tetris.field
+    y = game.tetris.height - STACK_ROWS - 1
+
+    def run():
+        fill_row(field, y)
+        field.clear_full_lines()
+
+    return run
+
+def bench_landing_y(game):
+    """ landing_y, from the column heights """
+    return game.tetris.landing_y
+
+def bench_reset(game):
+    """ reset, and putting back a stack of one square per row """
+    tetris = game.tetris
+
+    def run():
+        tetris.field.reset()
+        new_stack(tetris.field)
+
+    return run
+
+def new_stack(field):
+    """ Put back a small stack of squares, one per row, for reset to empty. """
+    for y in range(field.height - STACK_ROWS, field.height):
+        field.freeze(SQUARE, y % field.width, y, 1)
+
+def bench_game_board_update(game):
+    """ GameBoard.update, rotating the piece every call so that it has to be redrawn """
+    import tetris_ui  # pylint: disable=import-outside-toplevel
+
+    screen = tetris_ui.displayio.Group()
+    game_board = tetris_ui.GameBoard(tetris_ui.board.DISPLAY, screen, game)
+    tetris = game.tetris
+    game_board.update()
+
+    def run():
+        tetris.game_piece.rotation = tetris.game_piece.right_rotation()
+        game_board.update()
+
+    return run
+
+BENCHMARKS = (
+    ('intersects', bench_intersects),
+    ('freeze', bench_freeze),
+    ('clear (0 lines)', bench_clear_none),
+    ('fill + clear 1 line', bench_clear_one),
+    ('landing_y', bench_landing_y),
+    ('reset', bench_reset),
+    ('GameBoard.update', bench_game_board_update),
+)
+
+def time_call(run, min_time=0.05, repeat=5):
+    """
+    Time [run], calibrating the number of calls per repeat so that each
+    repeat takes at least [min_time] seconds.
+
+    :returns float The best time per call, in nanoseconds.
+    """
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+def log_bar(nanoseconds, floor=50):
+    """ Draw a log-scale bar, one mark for every doubling above [floor] ns. """
+    marks = 1
+    while nanoseconds > floor:
+        nanoseconds /= 2
+        marks += 1
+
+    return '#' * marks
+
+def parse_size(text):
+    """ Parse a board size written as HEIGHTxWIDTH. """
+    height, width = text.lower().split('x')
+
+    return int(height), int(width)
+
+def main():
+    """ Time every operation on every board size and field class, and plot the costs. """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', maxsplit=1)[0])
+    parser.add_argument(
+        '--sizes', nargs='+', type=parse_size, default=BOARD_SIZES,
+        help='board sizes to time, as HEIGHTxWIDTH (default: 19x10 200x100 2000x1000)'
+    )
+    parser.add_argument(
+        '--fields', nargs='+', choices=sorted(FIELD_CLASSES), default=DEFAULT_FIELDS,
+        help='field classes to time (default: BitboardField SparseField)'
+    )
+    args = parser.parse_args()
+
+    field_classes = [FIELD_CLASSES[name] for name in args.fields]
+    meter = HeapMeter()
+
+    print('{:<20} {:<14} {:>10} {:>14}'.format('operation', 'field', 'board', 'ns/call'))
+
+    for name, factory in BENCHMARKS:
+        for field_class in field_classes:
+            for height, width in args.sizes:
+                nanoseconds = time_call(factory(new_game(height, width, field_class)))
+                print('{:<20} {:<14} {:>10} {:>14,.0f}  {}'.format(
+                    name, field_class.__name__, '{}x{}'.format(height, width), nanoseconds,
+                    log_bar(nanoseconds)
+                ))
+
+    print()
+    print('{:<20} {:<14} {:>10} {:>14}'.format('memory', 'field', 'board', 'bytes'))
+
+    for field_class in field_classes:
+        for height, width in args.sizes:
+            size = meter.measure(lambda cls=field_class, h=height, w=width: cls(h, w))
+            print('{:<20} {:<14} {:>10} {:>14,}'.format(
+                'empty field', field_class.__name__, '{}x{}'.format(height, width), size
+            ))
+
+if __name__ == '__main__':
+    main()
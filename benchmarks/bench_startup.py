@@ -0,0 +1,59 @@
+"""
+Time the phases of starting the game the way code.py does, on a host with
+the CircuitPython modules replaced by the stubs in benchmarks/stubs:
+
+    python benchmarks/bench_startup.py
+
+The imports are timed in a fresh interpreter, since they're cached after
+the first time.  On the board, code.py prints the same report at startup.
+"""
+import os
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCHMARK_DIR, '..')
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, 'stubs'))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+from startup import StartupTimer
+
+def main():
+    """ Start the game once and print the time each phase took. """
+    startup = StartupTimer()
+
+    # pylint: disable=import-outside-toplevel
+    from game_controls import GameControls
+    from sound import SoundController, TETRIS_MP3_FILE
+    from tetris import Game
+    from tetris_ui import UserInterface
+    import sound
+
+    startup.mark('imports')
+
+    game_controls = GameControls()
+    game = Game(19, 10, game_controls.keymap, seed=1)
+    startup.mark('game')
+
+    user_interface = UserInterface(game)
+    sound_controller = SoundController()
+    game.on_state_change += user_interface.on_game_state_change
+    game.on_score_change.add(user_interface.update_score, coalesce=True)
+    game.on_level_change.add(user_interface.update_level, coalesce=True)
+    startup.mark('user interface')
+
+    user_interface.update()
+    startup.mark('first frame')
+
+    game_controls.start()
+    startup.mark('keys')
+
+    # the song is at the root of the board's drive, and next to this directory here
+    sound.TETRIS_MP3_FILE = os.path.join(REPO_DIR, os.path.basename(TETRIS_MP3_FILE))
+    sound_controller.on_game_state_change(game.state)
+    startup.mark('sound')
+
+    startup.print_report()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Measure how many bytes terminal_ui.TerminalUserInterface writes per frame
+while the bot plays, compared with redrawing the whole board every frame,
+and how many frames per second it can compose:
+
+    python benchmarks/bench_terminal_ui.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from bot import BotInput
+from headless import InputEvents, game_clock
+from key_input import KeyRepeater
+from keymap import Keymap
+from terminal_ui import TerminalUserInterface, UNKNOWN
+from tetris import Game, game_state
+
+FRAME_TICKS = 17  # 500 ticks per second at 30 frames per second
+
+class ByteCounter:
+    """ Terminal stand-in that only counts what is written to it. """
+    def __init__(self):
+        self.written = 0
+
+    def write(self, text):
+        """ Count [text]. """
+        self.written += len(text)
+
+def play(seed, frames, full_redraw=False):
+    """
+    Let the bot play, drawing every FRAME_TICKS ticks.  With [full_redraw],
+    the shadow buffer is forgotten before every frame, so the whole board is
+    written every time.
+
+    :returns tuple (bytes written per frame, seconds spent in update())
+    """
+    game = Game(19, 10, Keymap(), seed=seed)
+    terminal = ByteCounter()
+    user_interface = TerminalUserInterface(game, terminal.write)
+    game.on_state_change += user_interface.on_game_state_change
+    game.on_score_change.add(user_interface.update_score, coalesce=True)
+    game.on_level_change.add(user_interface.update_level, coalesce=True)
+    key_input = KeyRepeater(InputEvents(BotInput(game), game), game.keymap, game_clock(game))
+
+    frame_bytes = []
+    elapsed = 0
+
+    for _ in range(frames):
+        for _ in range(FRAME_TICKS):
+            event = key_input.get_event()
+            if event:
+                game.handle_event(event)
+            game.move()
+
+        if game.state == game_state.gameover:
+            game.reset_game()
+
+        if full_redraw:
+            user_interface.shadow[:] = bytes([UNKNOWN]) * len(user_interface.shadow)
+            user_interface.preview_shadow[:] = bytes([UNKNOWN]) * len(user_interface.preview_shadow)
+
+        game.flush_events()
+        start = time.perf_counter()
+        user_interface.update()
+        elapsed += time.perf_counter() - start
+        frame_bytes.append(user_interface.last_frame_bytes)
+
+    return frame_bytes, elapsed
+
+def report(name, frame_bytes, elapsed):
+    """ Print the bytes per frame statistics. """
+    ordered = sorted(frame_bytes)
+    line = '{:<12} mean {:>6.1f} B  p50 {:>4} B  p95 {:>4} B  max {:>4} B  {:>8,.0f} frames/s'
+    print(line.format(
+        name, sum(ordered) / len(ordered), ordered[len(ordered) // 2],
+        ordered[len(ordered) * 95 // 100], ordered[-1], len(ordered) / elapsed
+    ))
+
+def main():
+    """ Run the benchmark. """
+    frames = 3000
+    report('diff', *play(1, frames))
+    report('full redraw', *play(1, frames, full_redraw=True))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Profile the phases of the game loop on a host, with the bot playing and
+the CircuitPython modules replaced by the stubs in benchmarks/stubs, and
+write a Chrome trace of the last frames:
+
+    python benchmarks/profile_loop.py --trace loop_trace.json
+
+The numbers are CPython's, not the board's, but the split between the
+phases shows where to look; run code.py with profile = True to get the
+same report on the board.
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, 'stubs'))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..'))
+
+# pylint: disable=wrong-import-position
+from bot import BotInput
+from game_loop import GameLoop
+from headless import InputEvents, game_clock
+from key_input import KeyRepeater
+from keymap import Keymap
+from profiler import Profiler, instrument
+from tetris import Game
+from tetris_ui import UserInterface
+
+class BotControls:
+    """ Stand-in for GameControls with the bot pressing the keys. """
+    def __init__(self, game):
+        self.key_input = KeyRepeater(
+            InputEvents(BotInput(game), game), game.keymap, game_clock(game)
+        )
+
+    def get_event(self):
+        """ Get the bot's next key event, or a repeat of a held key, or None. """
+        return self.key_input.get_event()
+
+class SkippingClock:
+    """
+    Wall clock that jumps forward instead of sleeping, so the loop runs at
+    full speed while still seeing the real time its work takes.
+    """
+    def __init__(self):
+        self.skipped_ns = 0
+
+    def clock(self):
+        """ Get the time in nanoseconds, including the skipped time. """
+        return time.monotonic_ns() + self.skipped_ns
+
+    def sleep(self, seconds):
+        """ Skip [seconds] ahead. """
+        self.skipped_ns += int(seconds * 1e9)
+
+def main():
+    """ Run the profiled loop from the command line. """
+    parser = argparse.ArgumentParser(description='Profile the phases of the game loop.')
+    parser.add_argument('--steps', type=int, default=20000, help='loop steps to run')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the game')
+    parser.add_argument('--trace', default=None, help='write a Chrome trace to this file')
+    args = parser.parse_args()
+
+    game = Game(19, 10, Keymap(), seed=args.seed)
+    clock = SkippingClock()
+    user_interface = UserInterface(game, clock=clock.clock)
+    game.on_state_change += user_interface.on_game_state_change
+    game.on_score_change.add(user_interface.update_score, coalesce=True)
+    game.on_level_change.add(user_interface.update_level, coalesce=True)
+
+    loop = GameLoop(
+        game, user_interface, BotControls(game), max_fps=60, clock=clock.clock, sleep=clock.sleep
+    )
+    profiler = Profiler(capacity=1024)
+    instrument(profiler, loop)
+
+    for _ in range(args.steps):
+        loop.step()
+        if game.state == 'GAME OVER':
+            game.reset_game()
+
+    profiler.print_report()
+    print('{} ticks stepped, {} skipped, {} frames, {} dropped ticks'.format(
+        loop.ticks, loop.skipped_ticks, loop.frames, loop.dropped_ticks
+    ))
+    print('{} refreshes, {} skipped, {} deferred'.format(
+        user_interface.refreshes, user_interface.skipped_refreshes,
+        user_interface.deferred_refreshes
+    ))
+
+    if args.trace:
+        profiler.dump_trace(args.trace)
+
+if __name__ == '__main__':
+    main()
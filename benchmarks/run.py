@@ -0,0 +1,410 @@
+"""
+Benchmark suite for the hot paths of the game, run on a host under CPython.
+The CircuitPython modules that the user interface needs are replaced by
+the stubs in benchmarks/stubs, so the display code can be timed too.
+
+Every benchmark is run for a few board sizes and field fill levels, and
+the results are written to a JSON file so they can be compared between
+commits:
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare results.json
+
+With --compare, every benchmark that got more than --threshold percent
+slower than in the given results file is reported, and the exit status
+is 1 if there were any.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, 'stubs'))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..'))
+
+# pylint: disable=wrong-import-position
+from key_input import KeyRepeater, StubKeys
+from keymap import KeyEvent, Keymap
+from tetris import Game, PieceShape
+from util import CallbackProperty
+
+BOARD_SIZES = ((19, 10), (40, 20), (100, 50))
+FILL_LEVELS = (0.0, 0.25, 0.5, 0.75)
+SQUARE = PieceShape([0])
+
+def fill_field(tetris, fill_level, seed=1):
+    """
+    Fill the bottom [fill_level] fraction of [tetris]'s field with random
+    squares, leaving at least one hole in every row so that no line is full.
+    """
+    rng = random.Random(seed)
+    field = tetris.field
+    field.reset()
+
+    for y in range(tetris.height - int(tetris.height * fill_level), tetris.height):
+        hole = rng.randrange(tetris.width)
+        for x in range(tetris.width):
+            if x != hole and rng.random() < 0.7:
+                field.freeze(SQUARE, x, y, rng.randint(1, 6))
+
+def fill_full_rows(tetris, rows):
+    """
+    Make the bottom [rows] rows of [tetris]'s field full.
+    """
+    for y in range(tetris.height - rows, tetris.height):
+        for x in range(tetris.width):
+            if not tetris.field.cell(x, y):
+                tetris.field.freeze(SQUARE, x, y, 1)
+
+def new_game(height, width, fill_level):
+    """
+    Create a seeded game with a filled field and its active piece just above the fill.
+    """
+    game = Game(height, width, Keymap(), seed=1)
+    fill_field(game.tetris, fill_level)
+    game.tetris.game_piece.y = max(0, height - int(height * fill_level) - 5)
+
+    return game
+
+def bench_intersects(game):
+    """ Tetris.intersects """
+    return game.tetris.intersects
+
+def bench_freeze(game):
+    """ Tetris.freeze (the piece is moved back down so it never leaves the board) """
+    tetris = game.tetris
+
+    def run():
+        tetris.freeze()
+        tetris.game_piece.y += 1
+
+    return run
+
+def bench_clear_full_lines(game):
+    """ Tetris.clear_full_lines, with no full lines """
+    return game.tetris.clear_full_lines
+
+def bench_clear_two_lines(game):
+    """ Tetris.clear_full_lines, refilling and clearing two lines each time """
+    tetris = game.tetris
+
+    def run():
+        fill_full_rows(tetris, 2)
+        tetris.clear_full_lines()
+
+    return run
+
+def bench_landing_y(game):
+    """ Tetris.landing_y, from the column-height index """
+    return game.tetris.landing_y
+
+def bench_landing_y_stepping(game):
+    """ The landing row found by moving the piece down one row at a time, for comparison """
+    tetris = game.tetris
+    field = tetris.field
+    game_piece = tetris.game_piece
+    shape = game_piece.shape()
+
+    def run():
+        y = game_piece.y
+        while not field.intersects(shape, game_piece.x, y + 1):
+            y += 1
+
+        return y
+
+    return run
+
+def bench_move_laterally(game):
+    """ Tetris.move_laterally, back and forth """
+    tetris = game.tetris
+    direction = [1]
+
+    def run():
+        old_x = tetris.game_piece.x
+        tetris.move_laterally(direction[0])
+        if tetris.game_piece.x == old_x:
+            direction[0] = -direction[0]
+
+    return run
+
+def bench_rotate_left(game):
+    """ Tetris.rotate_left """
+    return game.tetris.rotate_left
+
+def bench_rotate_right(game):
+    """ Tetris.rotate_right """
+    return game.tetris.rotate_right
+
+def bench_game_move(game):
+    """ Game.move, soft dropping every tick and restarting the game whenever it ends """
+    def run():
+        game.soft_drop = True
+        game.move()
+        if game.state == 'GAME OVER':
+            game.reset_game()
+
+    return run
+
+def bench_game_move_idle(game):
+    """ Game.move with no key pressed, so that most ticks only count """
+    def run():
+        game.move()
+        if game.state == 'GAME OVER':
+            game.reset_game()
+
+    return run
+
+def bench_check_game_state(game):
+    """ Game.check_game_state while the piece is falling """
+    return game.check_game_state
+
+def bench_game_snapshot(game):
+    """ Game.snapshot """
+    return game.snapshot
+
+def bench_game_restore(game):
+    """ Game.restore, of a snapshot of the same game """
+    blob = game.snapshot()
+
+    return lambda: game.restore(blob)
+
+def bench_game_fork(game):
+    """ Game.fork, from a snapshot taken once """
+    blob = game.snapshot()
+
+    return lambda: game.fork(blob)
+
+def bench_handle_event(game):
+    """ Game.handle_event, pressing and releasing left """
+    pressed = KeyEvent(game.keymap.left, True)
+    released = KeyEvent(game.keymap.left, False)
+
+    def run():
+        game.handle_event(pressed)
+        game.handle_event(released)
+
+    return run
+
+def bench_key_repeater(game):
+    """ KeyRepeater.get_event, holding right so that presses are repeated """
+    now = [0]
+    keys = StubKeys(lambda: now[0])
+    key_input = KeyRepeater(keys.events, game.keymap, lambda: now[0])
+    keys.press(game.keymap.right)
+
+    def run():
+        now[0] += 2
+        key_input.get_event()
+
+    return run
+
+def bench_callback_dispatch(_game):
+    """ CallbackProperty dispatch to three callbacks """
+    callbacks = CallbackProperty()
+    callbacks += (lambda value: None, ) * 3
+
+    def run():
+        callbacks.dispatch(1)
+
+    return run
+
+def bench_callback_coalesce(_game):
+    """ CallbackProperty dispatching three values to a coalescing callback, then flushing """
+    callbacks = CallbackProperty()
+    callbacks.add(lambda value: None, coalesce=True)
+
+    def run():
+        callbacks.dispatch(1)
+        callbacks.dispatch(2)
+        callbacks.dispatch(3)
+        callbacks.flush()
+
+    return run
+
+def ui_modules():
+    """
+    Import the user interface against the stubbed CircuitPython modules.
+    """
+    import tetris_ui  # pylint: disable=import-outside-toplevel
+
+    return tetris_ui
+
+def bench_game_board_update(game):
+    """ GameBoard.update, rotating the piece every call so that it has to be redrawn """
+    tetris_ui = ui_modules()
+    screen = tetris_ui.displayio.Group()
+    game_board = tetris_ui.GameBoard(tetris_ui.board.DISPLAY, screen, game)
+    tetris = game.tetris
+
+    def run():
+        tetris.game_piece.rotation = tetris.game_piece.right_rotation()
+        game_board.update()
+
+    return run
+
+def bench_next_piece_preview_update(game):
+    """ NextPiecePreview.update, with a new next piece every call """
+    tetris_ui = ui_modules()
+    preview = tetris_ui.NextPiecePreview(game)
+    tetris = game.tetris
+    pieces = [tetris.next_game_piece, tetris.game_piece]
+
+    def run():
+        pieces.reverse()
+        tetris.next_game_piece = pieces[0]
+        preview.update()
+
+    return run
+
+BENCHMARKS = (
+    ('Tetris.intersects', bench_intersects, True),
+    ('Tetris.freeze', bench_freeze, True),
+    ('Tetris.clear_full_lines', bench_clear_full_lines, True),
+    ('Tetris.clear_full_lines[2 lines]', bench_clear_two_lines, True),
+    ('Tetris.landing_y', bench_landing_y, True),
+    ('Tetris.landing_y[stepping]', bench_landing_y_stepping, True),
+    ('Tetris.move_laterally', bench_move_laterally, True),
+    ('Tetris.rotate_left', bench_rotate_left, True),
+    ('Tetris.rotate_right', bench_rotate_right, True),
+    ('Game.move', bench_game_move, True),
+    ('Game.move[idle]', bench_game_move_idle, True),
+    ('Game.check_game_state', bench_check_game_state, True),
+    ('Game.snapshot', bench_game_snapshot, True),
+    ('Game.restore', bench_game_restore, True),
+    ('Game.fork', bench_game_fork, True),
+    ('Game.handle_event', bench_handle_event, False),
+    ('KeyRepeater.get_event', bench_key_repeater, False),
+    ('CallbackProperty.dispatch', bench_callback_dispatch, False),
+    ('CallbackProperty.flush', bench_callback_coalesce, False),
+    ('GameBoard.update', bench_game_board_update, True),
+    ('NextPiecePreview.update', bench_next_piece_preview_update, False),
+)
+
+def time_call(run, min_time=0.05, repeat=5):
+    """
+    Time [run], calibrating the number of calls per repeat so that each
+    repeat takes at least [min_time] seconds.
+
+    :returns float The best time per call, in nanoseconds.
+    """
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+def run_benchmarks(selected=None, quick=False):
+    """
+    Run the benchmarks (only those whose name contains one of the strings in
+    [selected], if given).
+
+    :returns list One result dictionary per benchmark and parameter set.
+    """
+    results = []
+    sizes = BOARD_SIZES[:1] if quick else BOARD_SIZES
+    fill_levels = FILL_LEVELS[::2] if quick else FILL_LEVELS
+
+    for name, factory, parametrized in BENCHMARKS:
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+
+        parameter_sets = [
+            (height, width, fill_level) for height, width in sizes for fill_level in fill_levels
+        ] if parametrized else [BOARD_SIZES[0] + (0.25, )]
+
+        for height, width, fill_level in parameter_sets:
+            game = new_game(height, width, fill_level)
+            ns_per_call = time_call(factory(game))
+
+            result = {
+                'name': name,
+                'height': height,
+                'width': width,
+                'fill_level': fill_level,
+                'ns_per_call': round(ns_per_call, 1),
+                'calls_per_second': round(1e9 / ns_per_call, 1),
+            }
+            results.append(result)
+
+            print('{:<34} {:>4}x{:<4} fill {:<5} {:>12,.0f} ns {:>14,.0f}/s'.format(
+                name, height, width, fill_level, ns_per_call, 1e9 / ns_per_call
+            ))
+
+    return results
+
+def git_revision():
+    """ Get the current git revision of the repository, if there is one. """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def result_key(result):
+    """ Identify a result by its benchmark name and parameters. """
+    return result['name'], result['height'], result['width'], result['fill_level']
+
+def compare(results, baseline, threshold):
+    """
+    Report the results that got more than [threshold] percent slower than [baseline].
+
+    :returns int The number of regressions.
+    """
+    previous = {result_key(result): result for result in baseline['results']}
+    regressions = 0
+
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+
+        change = (result['ns_per_call'] - old['ns_per_call']) / old['ns_per_call'] * 100
+        if change > threshold:
+            regressions += 1
+            print('REGRESSION {:<34} {}x{} fill {}: {:,.0f} ns -> {:,.0f} ns (+{:.0f}%)'.format(
+                result['name'], result['height'], result['width'], result['fill_level'],
+                old['ns_per_call'], result['ns_per_call'], change
+            ))
+
+    return regressions
+
+def main():
+    """ Run the suite from the command line. """
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the game.')
+    parser.add_argument('--output', default=None, help='write the results to this JSON file')
+    parser.add_argument('--compare', default=None, help='compare with this results file')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent slowdown reported as a regression')
+    parser.add_argument('--quick', action='store_true', help='fewer board sizes and fill levels')
+    parser.add_argument('benchmarks', nargs='*', help='only run benchmarks matching these names')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.benchmarks, args.quick)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': git_revision(),
+        'python': platform.python_implementation() + ' ' + platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
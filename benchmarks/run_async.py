@@ -0,0 +1,78 @@
+"""
+Run the asyncio game loop (async_loop.py) on a host for a few seconds of
+wall time, with the bot playing and the CircuitPython modules replaced by
+the stubs in benchmarks/stubs, and report how busy each task was:
+
+    python benchmarks/run_async.py --seconds 10
+
+The tasks are the same ones code.py runs on the board; only the hardware
+is stubbed.  The longest turn of each task is the longest it kept the
+others (and the keys) waiting.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCHMARK_DIR, '..')
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, 'stubs'))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+# profile_loop is the script next to this one, so pylint takes it for a third party module
+from profile_loop import BotControls
+from async_loop import AsyncGameLoop
+from keymap import Keymap
+from sound import SoundController
+from tetris import Game, game_state
+from tetris_ui import UserInterface
+import sound
+
+async def restart_when_over(game, interval_s=0.1):
+    """ Start a new game whenever the bot loses one. """
+    while True:
+        if game.state == game_state.gameover:
+            game.reset_game()
+
+        await asyncio.sleep(interval_s)
+
+async def run(loop, game, seconds):
+    """ Run [loop] for [seconds] of wall time. """
+    restarter = asyncio.create_task(restart_when_over(game))
+
+    try:
+        await asyncio.wait_for(loop.run(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+    restarter.cancel()
+
+def main():
+    """ Run the asyncio loop from the command line and print its report. """
+    parser = argparse.ArgumentParser(description='Run the asyncio game loop with stubs.')
+    parser.add_argument('--seconds', type=float, default=5, help='wall time to run for')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the game')
+    args = parser.parse_args()
+
+    game = Game(19, 10, Keymap(), seed=args.seed)
+    user_interface = UserInterface(game)
+    game.on_state_change += user_interface.on_game_state_change
+    game.on_score_change.add(user_interface.update_score, coalesce=True)
+    game.on_level_change.add(user_interface.update_level, coalesce=True)
+
+    # the song is at the root of the board's drive, and next to this directory here
+    sound.TETRIS_MP3_FILE = os.path.join(REPO_DIR, os.path.basename(sound.TETRIS_MP3_FILE))
+    sound_controller = SoundController()
+    sound_controller.on_game_state_change(game.state)
+
+    loop = AsyncGameLoop(game, user_interface, BotControls(game), sound_controller)
+    asyncio.run(run(loop, game, args.seconds))
+
+    loop.print_report()
+    print('{} pieces, {} lines, {} refreshes'.format(
+        game.tetris.pieces, game.tetris.lines, user_interface.refreshes
+    ))
+
+if __name__ == '__main__':
+    main()
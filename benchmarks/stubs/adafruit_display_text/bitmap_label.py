@@ -0,0 +1,14 @@
+"""
+Host stub for adafruit_display_text.bitmap_label.
+"""
+
+class Label:
+    """ Stand-in for bitmap_label.Label. """
+    def __init__(self, font, *, x=0, y=0, color=0xffffff, text='', scale=1, **_kwargs):
+        self.font = font
+        self.x = x
+        self.y = y
+        self.color = color
+        self.text = text
+        self.scale = scale
+        self.hidden = False
@@ -0,0 +1,12 @@
+"""
+Host stub for the CircuitPython analogio module.
+"""
+
+class AnalogIn:
+    """ Stand-in for analogio.AnalogIn, reading a fixed, healthy battery voltage. """
+    def __init__(self, pin):
+        self.pin = pin
+        self.value = 36000
+
+    def deinit(self):
+        """ Release the pin. """
@@ -0,0 +1,32 @@
+"""
+Host stub for the CircuitPython audioio module.
+"""
+
+class AudioOut:
+    """ Stand-in for audioio.AudioOut; nothing is played. """
+    def __init__(self, pin):
+        self.pin = pin
+        self.playing = False
+        self.paused = False
+
+    def play(self, sample, *, loop=False):
+        """ Start playing [sample]. """
+        # pylint: disable=unused-argument
+        self.playing = True
+        self.paused = False
+
+    def pause(self):
+        """ Pause playback. """
+        self.paused = True
+
+    def resume(self):
+        """ Resume playback. """
+        self.paused = False
+
+    def stop(self):
+        """ Stop playback. """
+        self.playing = False
+        self.paused = False
+
+    def deinit(self):
+        """ Release the pin. """
@@ -0,0 +1,13 @@
+"""
+Host stub for the CircuitPython audiomp3 module.
+"""
+
+class MP3Decoder:
+    """ Stand-in for audiomp3.MP3Decoder; the file is opened but never decoded. """
+    def __init__(self, file, buffer=None):
+        # pylint: disable=unused-argument
+        self.file = file
+
+    def deinit(self):
+        """ Close the file. """
+        self.file.close()
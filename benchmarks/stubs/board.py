@@ -0,0 +1,34 @@
+"""
+Host stub for the CircuitPython board module (PyBadge pins and display).
+"""
+# pylint: disable=invalid-name
+
+class _Display:
+    """ Stand-in for the PyBadge's built-in display. """
+    width = 160
+    height = 128
+
+    def __init__(self):
+        self.auto_refresh = True
+        self.root_group = None
+        self.refreshes = 0
+
+    def show(self, group):
+        """ Show [group] on the display. """
+        self.root_group = group
+
+    def refresh(self, target_frames_per_second=None, minimum_frames_per_second=0):
+        """ Count the refresh; nothing is drawn. """
+        # pylint: disable=unused-argument
+        self.refreshes += 1
+
+        return True
+
+DISPLAY = _Display()
+
+A6 = 'A6'
+SPEAKER = 'SPEAKER'
+SPEAKER_ENABLE = 'SPEAKER_ENABLE'
+BUTTON_CLOCK = 'BUTTON_CLOCK'
+BUTTON_OUT = 'BUTTON_OUT'
+BUTTON_LATCH = 'BUTTON_LATCH'
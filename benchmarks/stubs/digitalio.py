@@ -0,0 +1,16 @@
+"""
+Host stub for the CircuitPython digitalio module.
+"""
+
+class DigitalInOut:
+    """ Stand-in for digitalio.DigitalInOut. """
+    def __init__(self, pin):
+        self.pin = pin
+        self.value = False
+
+    def switch_to_output(self, value=False, **_kwargs):
+        """ Make the pin an output, set to [value]. """
+        self.value = value
+
+    def deinit(self):
+        """ Release the pin. """
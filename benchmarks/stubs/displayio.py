@@ -0,0 +1,76 @@
+"""
+Host stub for the CircuitPython displayio module.  Bitmaps keep their
+pixels in a bytearray so that drawing into them costs about what it
+would cost in Python on the board; nothing is ever displayed.
+"""
+
+class Bitmap:
+    """ Stand-in for displayio.Bitmap. """
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self._pixels = bytearray(width * height)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, tuple):
+            x, y = index
+            index = y * self.width + x
+
+        self._pixels[index] = value
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            index = y * self.width + x
+
+        return self._pixels[index]
+
+    def fill(self, value):
+        """ Set every pixel to [value]. """
+        self._pixels[:] = bytes([value]) * len(self._pixels)
+
+class Palette:
+    """ Stand-in for displayio.Palette. """
+    def __init__(self, color_count):
+        self._colors = [0] * color_count
+        self._transparent = set()
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __setitem__(self, index, color):
+        self._colors[index] = color
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def make_transparent(self, index):
+        """ Make color [index] transparent. """
+        self._transparent.add(index)
+
+    def make_opaque(self, index):
+        """ Make color [index] opaque. """
+        self._transparent.discard(index)
+
+class TileGrid:
+    """ Stand-in for displayio.TileGrid. """
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1, tile_width=None,
+                 tile_height=None, default_tile=0, x=0, y=0):
+        # pylint: disable=unused-argument
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.hidden = False
+
+class Group(list):
+    """ Stand-in for displayio.Group. """
+    def __init__(self, *, scale=1, x=0, y=0):
+        super().__init__()
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
@@ -0,0 +1,45 @@
+"""
+Host stub for the CircuitPython keypad module.  Events are queued with
+ShiftRegisterKeys.events.put() instead of coming from real keys.
+"""
+import time
+
+class Event:
+    """ Stand-in for keypad.Event. """
+    def __init__(self, key_number=0, pressed=True, timestamp=None):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = timestamp if timestamp is not None \
+            else time.monotonic_ns() // 1000000 & ((1 << 29) - 1)
+
+class EventQueue:
+    """ Stand-in for keypad.EventQueue. """
+    def __init__(self):
+        self._events = []
+        self.overflowed = False
+
+    def put(self, event):
+        """ Queue [event] as if a key had changed (not part of the real API). """
+        self._events.append(event)
+
+    def get(self):
+        """ Get the oldest queued event, or None. """
+        return self._events.pop(0) if self._events else None
+
+    def clear(self):
+        """ Drop all queued events. """
+        self._events = []
+
+    def __len__(self):
+        return len(self._events)
+
+class ShiftRegisterKeys:
+    """ Stand-in for keypad.ShiftRegisterKeys. """
+    def __init__(self, *, clock, data, latch, key_count, value_when_pressed, **_kwargs):
+        # pylint: disable=unused-argument
+        self.key_count = key_count
+        self.events = EventQueue()
+
+    def deinit(self):
+        """ Release the pins. """
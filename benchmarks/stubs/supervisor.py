@@ -0,0 +1,8 @@
+"""
+Host stub for the CircuitPython supervisor module.
+"""
+import time
+
+def ticks_ms():
+    """ Milliseconds since an arbitrary point, wrapping at 2**29 like the real one. """
+    return time.monotonic_ns() // 1000000 & ((1 << 29) - 1)
@@ -0,0 +1,4 @@
+"""
+Host stub for the CircuitPython terminalio module.
+"""
+FONT = object()
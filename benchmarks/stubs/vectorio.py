@@ -0,0 +1,14 @@
+"""
+Host stub for the CircuitPython vectorio module.
+"""
+
+class Rectangle:
+    """ Stand-in for vectorio.Rectangle. """
+    def __init__(self, *, pixel_shader, width, height, x=0, y=0, color_index=0):
+        self.pixel_shader = pixel_shader
+        self.color_index = color_index
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.hidden = False
@@ -0,0 +1,390 @@
+"""
+A computer player for Tetris.  For the active piece (and optionally the
+next piece), the bot enumerates every placement it can reach from where
+the piece is, drops it, scores the resulting field with a heuristic and
+picks the best one.
+
+Placements are evaluated on a scratch BitboardField whose row masks are
+copied from the game's field, and each trial placement is undone from a
+small log of the rows it changed, so the game's field is never copied
+cell by cell.  The game has to use a BitboardField.
+
+>>> bot = Bot()
+>>> placement = bot.best_placement(game.tetris)
+>>> placement.actions
+('rotate_right', 'left', 'left', 'drop')
+"""
+from field import BitboardField
+from keymap import KeyEvent
+
+ROTATE_LEFT = 'rotate_left'
+ROTATE_RIGHT = 'rotate_right'
+LEFT = 'left'
+RIGHT = 'right'
+DROP = 'drop'
+
+def default_heuristic(aggregate_height, holes, bumpiness, lines):
+    """
+    Score a field, the higher the better.  Weights are the ones found by
+    Yiyuan Lee's genetic algorithm for the classic four-feature evaluation.
+    """
+    return -0.510066 * aggregate_height + 0.760666 * lines \
+        - 0.35663 * holes - 0.184483 * bumpiness
+
+def count_bits(mask):
+    """
+    Count the set bits in [mask].
+    """
+    return bin(mask).count('1')
+
+def field_features(masks, height, width, full_mask):
+    """
+    Compute the heuristic features of a field given as row masks, treating
+    full rows as if they had already been cleared.
+
+    :returns tuple (aggregate_height, holes, bumpiness, lines)
+    """
+    lines = 0
+    for mask in masks:
+        if mask == full_mask:
+            lines += 1
+
+    column_heights = [0] * width
+    remaining_rows = height - lines
+    covered = 0
+    holes = 0
+
+    for mask in masks:
+        if mask == full_mask:
+            continue
+
+        holes += count_bits(covered & ~mask)
+
+        new_columns = mask & ~covered
+        x = 0
+        while new_columns:
+            if new_columns & 1:
+                column_heights[x] = remaining_rows
+
+            new_columns >>= 1
+            x += 1
+
+        covered |= mask
+        remaining_rows -= 1
+
+    bumpiness = 0
+    for x in range(width - 1):
+        bumpiness += abs(column_heights[x] - column_heights[x + 1])
+
+    return sum(column_heights), holes, bumpiness, lines
+
+class Placement:
+    """
+    A reachable placement for a piece, with the actions needed to get there.
+
+    :param int rotation: The piece's rotation when it lands.
+    :param int x: The piece's x position when it lands.
+    :param int y: The row the piece lands on.
+    :param tuple actions: The actions that move the piece there.
+    :param float score: The heuristic score of the field after the placement.
+    :param int lines: The number of lines the placement clears.
+    """
+    def __init__(self, rotation, x, y, actions, score, lines):
+        self.rotation = rotation
+        self.x = x
+        self.y = y
+        self.actions = actions
+        self.score = score
+        self.lines = lines
+
+    def __repr__(self):
+        return 'Placement(rotation={}, x={}, y={}, score={:.3f}, lines={})'.format(
+            self.rotation, self.x, self.y, self.score, self.lines
+        )
+
+class Bot:
+    """
+    Pick placements for the active piece.
+
+    :param heuristic: Callable taking (aggregate_height, holes, bumpiness, lines)
+        and returning a score, where higher is better.
+    :param bool lookahead: Also try every placement of the next piece for each
+        placement of the active piece, and score by the best combination.
+    """
+    def __init__(self, heuristic=default_heuristic, lookahead=False):
+        self.heuristic = heuristic
+        self.lookahead = lookahead
+        self.evaluations = 0
+
+        self._scratch = None
+        self._lookahead_scratch = None
+
+    def _scratch_fields(self, tetris):
+        """
+        Get scratch fields the same size as [tetris]'s field, with its masks copied in.
+        """
+        if self._scratch is None or self._scratch.height != tetris.height or \
+           self._scratch.width != tetris.width:
+            self._scratch = BitboardField(tetris.height, tetris.width)
+            self._lookahead_scratch = BitboardField(tetris.height, tetris.width)
+
+        self._scratch.masks[:] = tetris.field.masks
+        self._scratch.rebuild_surface()
+
+        return self._scratch, self._lookahead_scratch
+
+    @staticmethod
+    def reachable(field, shapes, rotation, x, y):
+        """
+        Enumerate the placements reachable from a piece at (x, y) by rotating it
+        in place, sliding it sideways and then dropping it.
+
+        :returns list (rotation, x, landing y, actions) tuples.
+        """
+        placements = []
+        rotations = {rotation: ()}
+
+        # rotate in place in both directions, stopping when the field is in the way
+        for direction, action in ((1, ROTATE_RIGHT), (-1, ROTATE_LEFT)):
+            current = rotation
+            actions = ()
+            for _ in range(len(shapes) - 1):
+                current = (current + direction) % len(shapes)
+                if field.intersects(shapes[current], x, y):
+                    break
+
+                actions += (action, )
+                if current not in rotations or len(actions) < len(rotations[current]):
+                    rotations[current] = actions
+
+        for target_rotation, rotation_actions in rotations.items():
+            shape = shapes[target_rotation]
+
+            for direction, action in ((0, None), (-1, LEFT), (1, RIGHT)):
+                target_x = x + direction
+                actions = rotation_actions
+
+                while not field.intersects(shape, target_x, y):
+                    if action is not None:
+                        actions += (action, )
+
+                    placements.append((
+                        target_rotation, target_x, field.drop_y(shape, target_x, y),
+                        actions + (DROP, )
+                    ))
+
+                    if action is None:
+                        break
+
+                    target_x += direction
+
+        return placements
+
+    def _evaluate(self, field, shape, x, y, next_piece, cleared=0):
+        """
+        Score [shape] placed at (x, y) on [field], undoing the placement afterwards.
+        With a [next_piece], the score is the best one of the next piece after
+        this placement's lines are cleared, and those lines are passed on as
+        [cleared] so that they still count towards the lines in the score.
+
+        :returns tuple (score, lines)
+        """
+        masks = field.masks
+        undo = []
+
+        for row, mask in shape.row_masks:
+            undo.append((y + row, masks[y + row]))
+            masks[y + row] |= mask << x if x >= 0 else mask >> -x
+
+        features = field_features(masks, field.height, field.width, field.full_mask)
+        lines = features[3]
+        self.evaluations += 1
+
+        if next_piece is None:
+            aggregate_height, holes, bumpiness, _ = features
+            score = self.heuristic(aggregate_height, holes, bumpiness, lines + cleared)
+        else:
+            # clear the full lines into the lookahead field and try the next piece there
+            lookahead = self._lookahead_scratch
+            kept = [mask for mask in masks if mask != field.full_mask]
+            lookahead.masks[:] = [0] * (field.height - len(kept)) + kept
+            lookahead.rebuild_surface()
+
+            score = None
+            for rotation, next_x, next_y, _ in self.reachable(
+                    lookahead, next_piece.shapes, 0, next_piece.x, next_piece.y):
+                next_score, _ = self._evaluate(
+                    lookahead, next_piece.shapes[rotation], next_x, next_y, None, lines
+                )
+                if score is None or next_score > score:
+                    score = next_score
+
+            if score is None:  # the next piece can't even spawn
+                score = float('-inf')
+
+        for row, mask in undo:
+            masks[row] = mask
+
+        return score, lines
+
+    def best_placement(self, tetris):
+        """
+        Find the best placement for [tetris]'s active piece.
+
+        :returns Placement The best placement, or None if the piece can't move anywhere.
+        """
+        game_piece = tetris.game_piece
+        field, _ = self._scratch_fields(tetris)
+        next_piece = tetris.next_game_piece if self.lookahead else None
+        best = None
+
+        for rotation, x, y, actions in self.reachable(
+                field, game_piece.shapes, game_piece.rotation, game_piece.x, game_piece.y):
+            score, lines = self._evaluate(field, game_piece.shapes[rotation], x, y, next_piece)
+
+            if best is None or score > best.score:
+                best = Placement(rotation, x, y, actions, score, lines)
+
+        return best
+
+def apply_actions(tetris, actions):
+    """
+    Carry out [actions] directly on [tetris], ending with the piece resting
+    on the field (frozen on the next Game.check_game_state).
+    """
+    for action in actions:
+        if action == ROTATE_LEFT:
+            tetris.rotate_left()
+        elif action == ROTATE_RIGHT:
+            tetris.rotate_right()
+        elif action == LEFT:
+            tetris.move_laterally(-1)
+        elif action == RIGHT:
+            tetris.move_laterally(1)
+        elif action == DROP:
+            tetris.hard_drop()
+            tetris.move_down()
+
+class BotInput:
+    """
+    Input source (like headless.RandomInput) that plays a Game with a Bot by
+    pressing keys: rotation keys are tapped, a direction key is held until
+    the piece gets where the bot wants it, and then down is held until the
+    piece lands.  Every key still held is released when the next piece
+    spawns, even if the last one locked before getting there.  Useful for a
+    demo mode or for stress-testing the engine.
+
+    :param Game game: The game being played.
+    :param Bot bot: The bot choosing placements.
+    """
+    landed = 'landed'  # wait for the piece to land before the next step
+
+    def __init__(self, game, bot=None):
+        self.game = game
+        self.bot = bot if bot is not None else Bot()
+        self.placements = 0
+
+        self._planned_count = None
+        self._steps = []
+        self._wait = None
+        self._held = []  # keys pressed and not yet released, in the order they were pressed
+
+    def _plan(self):
+        """
+        Turn the bot's best placement for the active piece into (key, pressed, wait) steps.
+        """
+        keymap = self.game.keymap
+        tetris = self.game.tetris
+        game_piece = tetris.game_piece
+        placement = self.bot.best_placement(tetris)
+
+        self._planned_count = tetris.pieces
+        self.placements += 1
+
+        # the last piece may have locked before its keys were released
+        steps = [(key, False, None) for key in self._held]
+
+        if placement is not None:
+            for action in placement.actions:
+                if action in (ROTATE_LEFT, ROTATE_RIGHT):
+                    key = keymap.A if action == ROTATE_LEFT else keymap.B
+                    steps.append((key, True, None))
+                    steps.append((key, False, None))
+
+            if placement.x != game_piece.x:
+                key = keymap.left if placement.x < game_piece.x else keymap.right
+                steps.append((key, True, placement.x))
+                steps.append((key, False, None))
+
+        steps.append((keymap.down, True, self.landed))
+        steps.reverse()  # steps are popped off the end
+
+        self._steps = steps
+        self._wait = None
+
+    def get_event(self, _tick):
+        """
+        Get the next key event for the bot's plan, or None.
+        """
+        tetris = self.game.tetris
+        game_piece = tetris.game_piece
+
+        # piece objects are reused, so a new piece is told apart by the spawn count
+        if tetris.pieces != self._planned_count:
+            self._plan()
+        elif self._wait is not None:
+            if self._wait == self.landed or game_piece.x != self._wait:
+                return None
+
+            self._wait = None
+
+        if not self._steps:
+            return None
+
+        key, pressed, self._wait = self._steps.pop()
+
+        if pressed:
+            self._held.append(key)
+        elif key in self._held:
+            self._held.remove(key)
+
+        return KeyEvent(key, pressed)
+
+def main():
+    """ Let the bot play seeded games from the command line. """
+    import argparse  # pylint: disable=import-outside-toplevel
+    import time  # pylint: disable=import-outside-toplevel
+
+    from headless import run_game  # pylint: disable=import-outside-toplevel
+    from keymap import Keymap  # pylint: disable=import-outside-toplevel
+    from randomizer import RANDOMIZERS  # pylint: disable=import-outside-toplevel
+    from tetris import Game  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description='Let the bot play Tetris.')
+    parser.add_argument('--games', type=int, default=1, help='number of games to play')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the first game')
+    parser.add_argument('--lookahead', action='store_true', help='also place the next piece')
+    parser.add_argument('--max-ticks', type=int, default=2000000, help='tick limit per game')
+    parser.add_argument(
+        '--randomizer', choices=[cls.__name__ for cls in RANDOMIZERS],
+        default=RANDOMIZERS[0].__name__, help='piece randomizer'
+    )
+    args = parser.parse_args()
+
+    randomizer_class = next(cls for cls in RANDOMIZERS if cls.__name__ == args.randomizer)
+    bot = Bot(lookahead=args.lookahead)
+    start = time.perf_counter()
+
+    for seed in range(args.seed, args.seed + args.games):
+        game = Game(19, 10, Keymap(), seed=seed, randomizer_class=randomizer_class)
+        ticks = run_game(game, BotInput(game, bot), args.max_ticks)
+
+        print('seed {}: score {}, lines {}, pieces {}, ticks {}'.format(
+            seed, game.score, game.tetris.lines, game.tetris.pieces, ticks
+        ))
+
+    elapsed = time.perf_counter() - start
+    print('{:,.0f} placements evaluated per second'.format(bot.evaluations / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -14,29 +14,76 @@ on the Adafruit PyBadge!
 https://learn.adafruit.com/adafruit-pybadge
 """
 
+# pylint: disable=wrong-import-position
+import random
+
+# the startup timer is imported before the game's modules, so that it times their imports
+from startup import StartupTimer
+
+startup = StartupTimer()
+
 from game_controls import GameControls
 from sound import SoundController
 from tetris import Game
 from tetris_ui import UserInterface
 
+startup.mark('imports')
+
 board_height = 19
 board_width = 10
+profile = False  # run the fixed-step loop instead, printing where the time goes every 2000 steps
 
 game_controls = GameControls()
-game = Game(board_height, board_width, game_controls.keymap)
+# seed each game so that its input can be recorded and replayed (see replay.py)
+game = Game(board_height, board_width, game_controls.keymap, seed=random.getrandbits(30))
+startup.mark('game')
+
 ui = UserInterface(game)
 sc = SoundController()
 
 game.on_state_change += ui.on_game_state_change
-game.on_state_change += sc.on_game_state_change
-game.on_score_change += ui.update_score
-game.on_level_change += ui.update_level
+# the labels only need the last score and level before each redraw
+game.on_score_change.add(ui.update_score, coalesce=True)
+game.on_level_change.add(ui.update_level, coalesce=True)
+startup.mark('user interface')
+
+ui.update()
+startup.mark('first frame')
+
+# the keys and the sound are only set up once the first frame is on the display
+game_controls.start()
+startup.mark('keys')
+sc.on_game_state_change(game.state)
+startup.mark('sound')
+startup.print_report()
+
+if profile:
+    from game_loop import GameLoop
+    from memory import print_memory_report
+    from profiler import Profiler, instrument
+
+    # step the engine at a fixed rate, check the display for changes 60 times a second (it
+    # refreshes at most 30 times a second, and only when something changed) and sleep in between
+    game.on_state_change += sc.on_game_state_change
+    loop = GameLoop(game, ui, game_controls, max_fps=60)
+
+    print_memory_report(board_height, board_width)
+
+    profiler = Profiler()
+    instrument(profiler, loop)
+
+    while True:
+        for _ in range(2000):
+            loop.step()
+
+        profiler.print_report()
 
-while True:
-    event = game_controls.get_event()
+# run the keys, the engine, the display, the battery and the music as asyncio tasks, each at
+# its own rate (see async_loop.py); they're imported once the first frame is on the display,
+# since importing asyncio on the board would hold up the first frame
+import asyncio  # pylint: disable=wrong-import-order
 
-    if event:
-        game.handle_event(event)
+from async_loop import AsyncGameLoop
 
-    game.move()
-    ui.update()
+loop = AsyncGameLoop(game, ui, game_controls, sc, max_fps=60)
+asyncio.run(loop.run())
@@ -0,0 +1,476 @@
+"""
+Representations of the Tetris field (the squares left behind by pieces
+that have already fallen to the bottom of the board).
+
+Every field class exposes the same field-access API, so that the game
+logic and the user interface never have to know how the squares are
+stored:
+
+- ``height`` and ``width`` of the field
+- ``cell(x, y)`` returns the color index at a position (0 is empty)
+- ``row_colors(y)`` returns the color indexes of a whole row
+- ``intersects(shape, x, y)`` checks a piece shape against the field
+- ``freeze(shape, x, y, color)`` writes a piece shape into the field
+- ``clear_full_lines()`` removes full lines and returns how many were removed;
+  ``freeze`` records the rows it fills up, so when there are none this returns
+  straight away (except in fields_host.ListField)
+- ``reset()`` empties the field
+- ``get_state()`` and ``set_state(state)`` copy the field's contents out and back in
+- ``snapshot()`` and ``restore(blob, offset)`` do the same with compact bytes, for
+  saving a game and for searching ahead from it (see Game.snapshot in tetris.py)
+- ``take_dirty_rows()`` returns a bitmask of the rows that changed (bit y for
+  row y) since it was last called, so a display only has to redraw those rows
+- ``surface`` is an array of the row of the highest square in each column
+  (``height`` for an empty column), kept up to date by ``freeze`` and
+  ``clear_full_lines``
+- ``drop_y(shape, x, y)`` returns the row a piece shape at (x, y) would land
+  on if it was dropped straight down
+
+BitboardField is the one the game uses, and the only one in this module, so
+that the board doesn't spend RAM on the bytecode of the others.  The
+host-only fields are in fields_host.py: the original list field to
+benchmark against, and a sparse field for boards far bigger than the
+display.
+
+Piece shapes are the ``tetris.PieceShape`` tables that are compiled once, at
+import, for every rotation of every piece in ``tetris.GamePiece.game_pieces``.
+"""
+
+from array import array
+import struct
+
+GAME_PIECE_DIMENSION = 4 # game pieces are presented by a 4 x 4 pixel array
+FIELD_SNAPSHOT = '<hH' # the lowest full row and the top row, at the start of a snapshot
+FIELD_SNAPSHOT_SIZE = struct.calcsize(FIELD_SNAPSHOT)
+
+class BitboardField:
+    """
+    Store the field as one integer bitmask per row (bit x is set when column
+    x is occupied), along with a flat bytearray of color indexes.  Collision
+    checks only touch the masks, so they come down to a handful of AND
+    operations, and a row is full when its mask equals ``full_mask``.
+
+    The rows of colors aren't stored in order: ``row_map`` holds where in
+    ``colors`` each row is.  Clearing lines shifts the masks and the row map
+    down in place and moves the cleared color rows, emptied, to the top, so
+    no colors are copied.  freeze records the lowest row it filled up, so
+    that clear_full_lines returns straight away when there isn't one, and
+    the highest row with a square in it (``top_row``), so that a clear only
+    moves the rows between the two, however tall the field is.
+
+    The surface (the height of each column) is updated incrementally: a frozen
+    piece can only raise the columns it covers, and a line clear moves every
+    column down by the number of full lines below its top square, so only a
+    column whose top square was cleared has to be scanned.  Code that changes
+    the masks directly (like the bot) calls rebuild_surface afterwards.
+
+    restore doesn't copy the colors out of the snapshot: ``colors`` is a view
+    of the snapshot (``shared_colors`` is set) until the field first changes
+    a color, so a search can restore the same snapshot into many fields that
+    mostly only look at the masks.
+
+    :param int height: The number of rows in the field.
+    :param int width: The number of columns in the field.
+    """
+    __slots__ = (
+        'height', 'width', 'full_mask', 'masks', 'colors', 'shared_colors', 'row_map',
+        'lowest_full', 'top_row', 'empty_row', 'surface', 'all_rows', 'dirty_rows'
+    )
+
+    # which field a game snapshot holds (see Game.snapshot); every field class has its own
+    snapshot_kind = 0
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.full_mask = (1 << width) - 1
+
+        self.masks = [0] * height
+        self.colors, self.row_map = self._new_color_rows()
+        self.shared_colors = False
+        self.lowest_full = -1  # the lowest row that freeze filled up, or -1
+        self.top_row = height  # no row above this one has a square in it
+        self.empty_row = bytes(width)
+        self.surface = array('H', [height] * width)
+
+        self.all_rows = (1 << height) - 1
+        self.dirty_rows = self.all_rows
+
+    def _new_color_rows(self):
+        """
+        Allocate the colors and the row map.
+        """
+        return bytearray(self.height * self.width), array('H', range(self.height))
+
+    def reset(self):
+        """
+        Empty the field.
+        """
+        for y in range(self.height):
+            self.masks[y] = 0
+
+        for x in range(self.width):
+            self.surface[x] = self.height
+
+        self._reset_color_rows()
+        self.lowest_full = -1
+        self.top_row = self.height
+        self.dirty_rows = self.all_rows
+
+    def _reset_color_rows(self):
+        """
+        Empty all the rows of colors.
+        """
+        for y in range(self.height):
+            self.row_map[y] = y
+
+        if self.shared_colors:
+            self.colors = bytearray(self.height * self.width)
+            self.shared_colors = False
+        else:
+            self.colors[:] = bytes(self.height * self.width)
+
+    def rebuild_surface(self):
+        """
+        Recompute the height of every column from the row masks, top down,
+        stopping once every column has been found.
+        """
+        surface = self.surface
+        uncovered = self.full_mask
+        self.top_row = self.height
+
+        for x in range(self.width):
+            surface[x] = self.height
+
+        for y, mask in enumerate(self.masks):
+            found = mask & uncovered
+            if found:
+                self.top_row = min(self.top_row, y)
+
+                uncovered &= ~mask
+                x = 0
+                while found:
+                    if found & 1:
+                        surface[x] = y
+
+                    found >>= 1
+                    x += 1
+
+                if not uncovered:
+                    break
+
+    def take_dirty_rows(self):
+        """
+        Get the bitmask of rows changed since the last call, and start over.
+        """
+        dirty_rows = self.dirty_rows
+        self.dirty_rows = 0
+
+        return dirty_rows
+
+    def get_state(self):
+        """
+        Get a copy of the field's contents, for set_state, with the rows of
+        colors in order.
+        """
+        return tuple(self.masks), b''.join(self.row_colors(y) for y in range(self.height))
+
+    def set_state(self, state):
+        """
+        Restore the field's contents from get_state.
+        """
+        masks, colors = state
+
+        self.masks[:] = masks
+        self._set_color_rows(colors)
+        self.lowest_full = -1
+
+        for y in range(self.height):
+            if masks[y] == self.full_mask:
+                self.lowest_full = y
+
+        self.rebuild_surface()
+        self.dirty_rows = self.all_rows
+
+    def _set_color_rows(self, colors):
+        """
+        Copy [colors], with the rows in order, into the rows of colors.
+        """
+        for y in range(self.height):
+            self.row_map[y] = y
+
+        if self.shared_colors:
+            self.colors = bytearray(colors)
+            self.shared_colors = False
+        else:
+            self.colors[:] = colors
+
+    def _own_colors(self):
+        """
+        Copy the colors out of the snapshot they're shared with, before the
+        field changes one.
+        """
+        self.colors = bytearray(self.colors)
+        self.shared_colors = False
+
+    def _mask_format(self):
+        """
+        Get the struct format of the masks in a snapshot, or None if the rows
+        are too wide for one, in which case every mask is stored as bytes.
+        """
+        for code, bits in (('B', 8), ('H', 16), ('I', 32), ('Q', 64)):
+            if self.width <= bits:
+                return '<{}{}'.format(self.height, code)
+
+        return None
+
+    def snapshot(self):
+        """
+        Get the field's contents as bytes, for restore: the lowest full row
+        and the top row (FIELD_SNAPSHOT), the surface, the masks and then the
+        rows of colors (see _snapshot_colors).  Everything worked out from the
+        masks is stored along with them, so that restore doesn't scan them.
+        """
+        mask_format = self._mask_format()
+        parts = [
+            struct.pack(FIELD_SNAPSHOT, self.lowest_full, self.top_row),
+            struct.pack('<{}H'.format(self.width), *self.surface)
+        ]
+
+        if mask_format is not None:
+            parts.append(struct.pack(mask_format, *self.masks))
+        else:
+            size = (self.width + 7) // 8
+            parts.extend(mask.to_bytes(size, 'little') for mask in self.masks)
+
+        parts.append(self._snapshot_colors())
+
+        return b''.join(parts)
+
+    def _snapshot_colors(self):
+        """
+        Get the row map and the colors, as they're stored, as bytes.
+        """
+        return struct.pack('<{}H'.format(self.height), *self.row_map) + bytes(self.colors)
+
+    def restore(self, blob, offset=0):
+        """
+        Restore the field's contents from snapshot() bytes in [blob], starting
+        at [offset].  The colors stay in [blob] until the field changes one,
+        so [blob] mustn't change (snapshots are bytes, which can't).
+
+        :returns int The offset of the end of the field in [blob].
+        """
+        self.lowest_full, self.top_row = struct.unpack_from(FIELD_SNAPSHOT, blob, offset)
+        offset += FIELD_SNAPSHOT_SIZE
+
+        self.surface[:] = array('H', struct.unpack_from('<{}H'.format(self.width), blob, offset))
+        offset += 2 * self.width
+
+        mask_format = self._mask_format()
+        if mask_format is not None:
+            self.masks[:] = struct.unpack_from(mask_format, blob, offset)
+            offset += struct.calcsize(mask_format)
+        else:
+            size = (self.width + 7) // 8
+            for y in range(self.height):
+                self.masks[y] = int.from_bytes(blob[offset:offset + size], 'little')
+                offset += size
+
+        self.dirty_rows = self.all_rows
+
+        return self._restore_colors(blob, offset)
+
+    def _restore_colors(self, blob, offset):
+        """
+        Restore the row map from _snapshot_colors at [offset] in [blob], and
+        share the colors.
+
+        :returns int The offset of the end of the colors in [blob].
+        """
+        self.row_map[:] = array('H', struct.unpack_from('<{}H'.format(self.height), blob, offset))
+        offset += 2 * self.height
+        end = offset + self.height * self.width
+
+        self.colors = memoryview(blob)[offset:end]
+        self.shared_colors = True
+
+        return end
+
+    def cell(self, x, y):
+        """
+        Get the color index at a position on the field.
+        """
+        return self.colors[self.row_map[y] * self.width + x]
+
+    def row_colors(self, y):
+        """
+        Get the color indexes of row [y], as a view into the field.
+        """
+        start = self.row_map[y] * self.width
+
+        return memoryview(self.colors)[start:start + self.width]
+
+    def intersects(self, shape, x, y):
+        """
+        Determine if a piece shape at (x, y) is either off the field or hitting
+        squares on the field.  The bounding box rules out the walls and the
+        floor, so only the row masks need to be checked against the field.
+        """
+        if x + shape.min_x < 0 or x + shape.max_x >= self.width or \
+           y + shape.max_y >= self.height:
+            return True
+
+        masks = self.masks
+
+        if x >= 0:
+            for row, mask in shape.row_masks:
+                if (mask << x) & masks[y + row]:
+                    return True
+        else:
+            # the columns shifted off to the left are known to be empty
+            for row, mask in shape.row_masks:
+                if (mask >> -x) & masks[y + row]:
+                    return True
+
+        return False
+
+    def drop_y(self, shape, x, y):
+        """
+        Get the row a piece shape at (x, y) lands on.  When the piece is above
+        the surface in every column it covers, that's where its lowest square
+        in a column first meets the surface, found in O(piece width); a piece
+        tucked under an overhang is moved down one row at a time.
+        """
+        surface = self.surface
+        landing_y = self.height
+
+        for column, bottom in shape.column_bottoms:
+            top = surface[x + column]
+            if y + bottom >= top:
+                while not self.intersects(shape, x, y + 1):
+                    y += 1
+
+                return y
+
+            landing_y = min(landing_y, top - bottom - 1)
+
+        return landing_y
+
+    def freeze(self, shape, x, y, color):
+        """
+        Write a piece shape into the field at (x, y).
+        """
+        masks = self.masks
+        surface = self.surface
+
+        for row, mask in shape.row_masks:
+            masks[y + row] |= mask << x if x >= 0 else mask >> -x
+            self.dirty_rows |= 1 << (y + row)
+            if masks[y + row] == self.full_mask and y + row > self.lowest_full:
+                self.lowest_full = y + row
+
+        self.top_row = min(self.top_row, y + shape.min_y)
+
+        for column, row in shape.cells:
+            if y + row < surface[x + column]:
+                surface[x + column] = y + row
+
+        self._paint(shape, x, y, color)
+
+    def _paint(self, shape, x, y, color):
+        """
+        Write the colors of a piece shape at (x, y).
+        """
+        if self.shared_colors:
+            self._own_colors()
+
+        colors = self.colors
+        row_map = self.row_map
+        width = self.width
+
+        for column, row in shape.cells:
+            colors[row_map[y + row] * width + x + column] = color
+
+    def clear_full_lines(self):
+        """
+        Remove lines that are fully-populated by parts of pieces, shifting the
+        masks and the rows of colors between the top row and the lowest full
+        line down in place.  The cleared rows of colors are emptied and reused
+        for the new empty rows.  Only the rows that moved are marked dirty.
+
+        :returns int The number of full lines removed
+        """
+        if self.lowest_full < 0:
+            return 0
+
+        masks = self.masks
+        row_map = self.row_map
+        full_mask = self.full_mask
+        lowest = self.lowest_full
+        top = self.top_row
+        full_rows = []
+        cleared = []
+
+        self.dirty_rows |= (1 << (lowest + 1)) - (1 << top)
+
+        destination = lowest
+        for source in range(lowest, top - 1, -1):
+            if masks[source] == full_mask:
+                full_rows.append(source)
+                cleared.append(row_map[source])
+            else:
+                if destination != source:
+                    masks[destination] = masks[source]
+                    row_map[destination] = row_map[source]
+
+                destination -= 1
+
+        for index, color_row in enumerate(cleared):
+            masks[top + index] = 0
+            self._empty_color_row(top + index, color_row)
+
+        self.lowest_full = -1
+        self.top_row = top + len(cleared)
+
+        self._lower_surface(full_rows)
+
+        return len(cleared)
+
+    def _empty_color_row(self, y, color_row):
+        """
+        Empty [color_row], a cleared row of colors, and put it at row [y].
+        """
+        if self.shared_colors:
+            self._own_colors()
+
+        self.row_map[y] = color_row
+        start = color_row * self.width
+        self.colors[start:start + self.width] = self.empty_row
+
+    def _lower_surface(self, full_rows):
+        """
+        Move the surface down after the rows in [full_rows] were removed.  The
+        top square of a column moves down by the number of removed rows at or
+        below it, unless it was removed itself, in which case the new top is
+        the first square found from there down.
+        """
+        masks = self.masks
+        surface = self.surface
+        height = self.height
+
+        for x in range(self.width):
+            top = surface[x]
+            if top == height:
+                continue
+
+            new_top = top
+            for row in full_rows:
+                if row >= top:
+                    new_top += 1
+
+            bit = 1 << x
+            while new_top < height and not masks[new_top] & bit:
+                new_top += 1
+
+            surface[x] = new_top
@@ -0,0 +1,382 @@
+"""
+Field representations that only run on a host: they implement the same
+field-access API as field.BitboardField (see field.py), but are kept out of
+field.py so that the board doesn't load their bytecode.  The benchmarks,
+the memory report and the host tools import them from here.
+
+- ListField is the original representation, kept to benchmark the others
+  against, and CountingListField is a list field that clears lines the way
+  BitboardField does
+- SparseField only stores colors for the rows that have squares in them,
+  for boards far bigger than the display (see GameBoard in tetris_ui.py for
+  how those are drawn)
+"""
+
+from array import array
+
+from field import BitboardField, GAME_PIECE_DIMENSION
+
+class ListField:
+    """
+    Store the field as a list of rows, where each row is a list of color
+    indexes.  This is the original representation, kept around so the
+    bitboard field can be benchmarked against it: clearing lines counts the
+    squares in every row and rebuilds the list of rows.  A frozen piece can
+    only raise the columns it covers, so freeze updates the surface as it
+    goes, and only clearing lines scans the field for it.
+
+    :param int height: The number of rows in the field.
+    :param int width: The number of columns in the field.
+    """
+    __slots__ = ('height', 'width', 'rows', 'surface', 'all_rows', 'dirty_rows')
+
+    snapshot_kind = 1
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = []
+        self.surface = array('H', [height] * width)
+        self.all_rows = (1 << height) - 1
+        self.dirty_rows = self.all_rows
+
+        self.reset()
+
+    def reset(self):
+        """
+        Empty the field.
+        """
+        self.rows = [[0] * self.width for _ in range(self.height)]
+        self.rebuild_surface()
+        self.dirty_rows = self.all_rows
+
+    def rebuild_surface(self):
+        """
+        Recompute the height of every column by scanning it from the top.
+        """
+        for x in range(self.width):
+            y = 0
+            while y < self.height and self.rows[y][x] == 0:
+                y += 1
+
+            self.surface[x] = y
+
+    def take_dirty_rows(self):
+        """
+        Get the bitmask of rows changed since the last call, and start over.
+        """
+        dirty_rows = self.dirty_rows
+        self.dirty_rows = 0
+
+        return dirty_rows
+
+    def get_state(self):
+        """
+        Get a copy of the field's contents, for set_state.
+        """
+        return tuple(tuple(row) for row in self.rows)
+
+    def set_state(self, state):
+        """
+        Restore the field's contents from get_state.
+        """
+        self.rows = [list(row) for row in state]
+        self.rebuild_surface()
+        self.dirty_rows = self.all_rows
+
+    def snapshot(self):
+        """
+        Get the field's contents as bytes, for restore: the colors, row by row.
+        """
+        return b''.join(bytes(row) for row in self.rows)
+
+    def restore(self, blob, offset=0):
+        """
+        Restore the field's contents from snapshot() bytes in [blob], starting
+        at [offset].
+
+        :returns int The offset of the end of the field in [blob].
+        """
+        width = self.width
+        end = offset + self.height * width
+
+        self.set_state(blob[start:start + width] for start in range(offset, end, width))
+
+        return end
+
+    def cell(self, x, y):
+        """
+        Get the color index at a position on the field.
+        """
+        return self.rows[y][x]
+
+    def row_colors(self, y):
+        """
+        Get the color indexes of row [y].
+        """
+        return self.rows[y]
+
+    def intersects(self, shape, x, y):
+        """
+        Determine if a piece shape at (x, y) is either off the field or hitting
+        squares on the field.
+        """
+        intersection = False
+        image = shape.image
+
+        for i in range(GAME_PIECE_DIMENSION):
+            for j in range(GAME_PIECE_DIMENSION):
+                if i * GAME_PIECE_DIMENSION + j in image:
+                    if i + y > self.height - 1 or \
+                       j + x > self.width - 1 or \
+                       j + x < 0 or \
+                       self.rows[i + y][j + x] > 0:
+
+                        intersection = True
+
+        return intersection
+
+    def drop_y(self, shape, x, y):
+        """
+        Get the row a piece shape at (x, y) lands on, by moving it down one row
+        at a time.
+        """
+        while not self.intersects(shape, x, y + 1):
+            y += 1
+
+        return y
+
+    def freeze(self, shape, x, y, color):
+        """
+        Write a piece shape into the field at (x, y).
+        """
+        for coord in shape.image:
+            row = y + coord // GAME_PIECE_DIMENSION
+            column = x + coord % GAME_PIECE_DIMENSION
+
+            self.rows[row][column] = color
+            self.dirty_rows |= 1 << row
+
+            if row < self.surface[column]:
+                self.surface[column] = row
+
+    def clear_full_lines(self):
+        """
+        Remove lines that are fully-populated by parts of pieces.
+
+        :returns int The number of full lines removed
+        """
+        line_capacity = tuple(
+            sum(int(x > 0) for x in self.rows[i]) for i in range(len(self.rows))
+        )
+        full_lines = sum(line_capacity[i] == self.width for i in range(len(line_capacity)))
+
+        # remove full lines and insert new empty lines on top
+        self.rows = list(
+            [0] * self.width for _ in range(full_lines)
+        ) + list(self.rows[i] for i in range(len(self.rows)) if line_capacity[i] < self.width)
+
+        if full_lines:
+            self.rebuild_surface()
+            self.dirty_rows = self.all_rows
+
+        return full_lines
+
+
+class CountingListField(ListField):
+    """
+    A ListField that counts the squares in every row as pieces are frozen,
+    so a full row is noticed without scanning the field, and that clears
+    lines by moving the row lists down in place, reusing the cleared ones as
+    the new empty rows at the top.  It shows how much of the bitboard's
+    speedup on clearing lines comes from not scanning, rather than from the
+    masks.
+
+    :param int height: The number of rows in the field.
+    :param int width: The number of columns in the field.
+    """
+    __slots__ = ('filled', 'full_rows')
+
+    snapshot_kind = 2
+
+    def __init__(self, height, width):
+        self.filled = array('H', [0] * height)  # the number of squares in each row
+        self.full_rows = 0  # bitmask of the rows that freeze filled up
+        super().__init__(height, width)
+
+    def reset(self):
+        """
+        Empty the field.
+        """
+        for y in range(self.height):
+            self.filled[y] = 0
+
+        self.full_rows = 0
+        super().reset()
+
+    def set_state(self, state):
+        """
+        Restore the field's contents from get_state.
+        """
+        super().set_state(state)
+        self.full_rows = 0
+
+        for y, row in enumerate(self.rows):
+            self.filled[y] = sum(int(color > 0) for color in row)
+            if self.filled[y] == self.width:
+                self.full_rows |= 1 << y
+
+    def freeze(self, shape, x, y, color):
+        """
+        Write a piece shape into the field at (x, y), counting the squares it adds.
+        """
+        for coord in shape.image:
+            row = y + coord // GAME_PIECE_DIMENSION
+            column = x + coord % GAME_PIECE_DIMENSION
+
+            if self.rows[row][column] == 0:
+                self.filled[row] += 1
+                if self.filled[row] == self.width:
+                    self.full_rows |= 1 << row
+
+        super().freeze(shape, x, y, color)
+
+    def clear_full_lines(self):
+        """
+        Remove lines that are fully-populated by parts of pieces, moving the
+        rows above them down in place.  The removed rows are emptied and
+        become the new rows at the top.
+
+        :returns int The number of full lines removed
+        """
+        if not self.full_rows:
+            return 0
+
+        rows = self.rows
+        filled = self.filled
+        cleared = []
+
+        destination = self.height - 1
+        for source in range(self.height - 1, -1, -1):
+            if self.full_rows & (1 << source):
+                cleared.append(rows[source])
+            else:
+                if destination != source:
+                    rows[destination] = rows[source]
+                    filled[destination] = filled[source]
+
+                destination -= 1
+
+        for y, row in enumerate(cleared):
+            for x in range(self.width):
+                row[x] = 0
+
+            rows[y] = row
+            filled[y] = 0
+
+        self.full_rows = 0
+        self.rebuild_surface()
+        self.dirty_rows = self.all_rows
+
+        return len(cleared)
+
+
+class SparseField(BitboardField):
+    """
+    A BitboardField for very large boards, where only the rows with squares
+    in them have colors.  ``row_map`` holds a bytearray of colors for each
+    row, or None for an empty row; a row's colors are allocated the first
+    time a piece is frozen into it, and go back to a pool of spare rows when
+    the row is cleared, so memory follows the height of the stack rather
+    than the size of the board, and emptying the field is O(height).  A
+    snapshot only holds the colors of the rows with squares in them, which
+    restore copies into rows of their own.
+
+    :param int height: The number of rows in the field.
+    :param int width: The number of columns in the field.
+    """
+    __slots__ = ('spare_rows', )
+
+    snapshot_kind = 3
+
+    def __init__(self, height, width):
+        self.spare_rows = []
+        super().__init__(height, width)
+
+    def _new_color_rows(self):
+        return None, [None] * self.height
+
+    def _reset_color_rows(self):
+        row_map = self.row_map
+
+        for y in range(self.height):
+            if row_map[y] is not None:
+                self._recycle(row_map[y])
+                row_map[y] = None
+
+    def _recycle(self, color_row):
+        """
+        Empty [color_row] and keep it for reuse.
+        """
+        color_row[:] = self.empty_row
+        self.spare_rows.append(color_row)
+
+    def _set_color_rows(self, colors):
+        self._reset_color_rows()
+        width = self.width
+
+        for y in range(self.height):
+            if self.masks[y]:
+                self._color_row(y)[:] = colors[y * width:(y + 1) * width]
+
+    def _snapshot_colors(self):
+        """
+        Get the colors of the rows with squares in them, in order, as bytes.
+        """
+        return b''.join(self.row_colors(y) for y in range(self.height) if self.masks[y])
+
+    def _restore_colors(self, blob, offset):
+        """
+        Copy the colors from _snapshot_colors at [offset] in [blob] into rows.
+
+        :returns int The offset of the end of the colors in [blob].
+        """
+        self._reset_color_rows()
+        width = self.width
+
+        for y in range(self.height):
+            if self.masks[y]:
+                self._color_row(y)[:] = blob[offset:offset + width]
+                offset += width
+
+        return offset
+
+    def _color_row(self, y):
+        """
+        Get the colors of row [y], allocating them if the row has none.
+        """
+        color_row = self.row_map[y]
+
+        if color_row is None:
+            color_row = self.spare_rows.pop() if self.spare_rows else bytearray(self.width)
+            self.row_map[y] = color_row
+
+        return color_row
+
+    def cell(self, x, y):
+        color_row = self.row_map[y]
+
+        return color_row[x] if color_row is not None else 0
+
+    def row_colors(self, y):
+        color_row = self.row_map[y]
+
+        return memoryview(color_row if color_row is not None else self.empty_row)
+
+    def _paint(self, shape, x, y, color):
+        for column, row in shape.cells:
+            self._color_row(y + row)[x + column] = color
+
+    def _empty_color_row(self, y, color_row):
+        self.row_map[y] = None
+        self._recycle(color_row)
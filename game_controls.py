@@ -17,42 +17,47 @@ for use in the Tetris game.
 >>>
 >>> elif event.released:
 >>>     print('A key was released!')
+
+Held movement keys are repeated as extra presses, timed from the key
+event timestamps (see key_input.py).
 """
 
 # disable import errors on my IDE, since my host is running CPython and not CircuitPython
 import board  # pylint: disable=import-error
 import keypad  # pylint: disable=import-error
+import supervisor  # pylint: disable=import-error
 
-class Keymap:
-    """
-    Abstract the pybadge keys into decipherable names.
-    """
-
-    # At some point, this could possibly be abstracted to other boards
-    # by using os.uname().machine
-
-    # keys, in matrix order
-    keymap = ['B', 'A', 'start', 'select', 'right', 'down', 'up', 'left']
-
-    def __getattr__(self, key):
-        if key in self.keymap:
-            return self.keymap.index(key)
-
-        raise AttributeError("'{}' has no attribute '{}".format(self.__class__.__name__, key))
+from key_input import KeyRepeater
+from keymap import Keymap
 
 class GameControls:
     """
-    Provide game control key inputs for the Tetris game.
+    Provide game control key inputs for the Tetris game.  The keys are only
+    set up when they're first read.
     """
     keymap = Keymap()
 
-    keys = keypad.ShiftRegisterKeys(
-        clock=board.BUTTON_CLOCK, data=board.BUTTON_OUT, latch=board.BUTTON_LATCH, key_count=8,
-        value_when_pressed=True
-    )
+    def __init__(self):
+        self.keys = None
+        self.key_input = None
+
+    def start(self):
+        """
+        Set up the keys, if they haven't been already.
+        """
+        if self.keys is None:
+            self.keys = keypad.ShiftRegisterKeys(
+                clock=board.BUTTON_CLOCK, data=board.BUTTON_OUT, latch=board.BUTTON_LATCH,
+                key_count=8, value_when_pressed=True
+            )
+            self.key_input = KeyRepeater(self.keys.events, self.keymap, supervisor.ticks_ms)
 
     def get_event(self):
         """
-        Get a key event from the keyboard of this class.
+        Get a key event from the keyboard of this class, or a repeated press
+        of a held movement key.
         """
-        return self.keys.events.get()
+        if self.key_input is None:
+            self.start()
+
+        return self.key_input.get_event()
@@ -0,0 +1,137 @@
+"""
+A fixed-timestep game loop.  The engine is stepped at a fixed rate of
+logical ticks (one every Game.tick_ms milliseconds) measured against the
+wall clock, so the game runs at the same speed no matter how long a frame
+takes to draw.  The display is redrawn at most max_fps times a second,
+and the time left over until the next tick or frame is spent asleep
+instead of spinning.
+
+Most ticks do nothing but count: the piece only falls every few hundred
+milliseconds.  When no key was pressed, the loop asks the game how many
+ticks are idle (Game.idle_ticks) and skips over them at once, and it
+sleeps until the next frame or the next tick that does something,
+whichever comes first.  Keys are read before every frame and every tick
+that's stepped, and since a key press is only seen on the next frame
+anyway, that's as soon as it could show.
+
+>>> loop = GameLoop(game, user_interface, game_controls)
+>>> loop.run()
+
+If the board falls behind (a slow redraw, say), the missed ticks are run
+back to back, but never more than max_catch_up ticks at once; anything
+beyond that is dropped, so the game slows down rather than stalling.
+"""
+import time
+
+NS_PER_MS = 1000000
+NS_PER_SECOND = 1000000000
+
+class GameLoop:
+    """
+    Run a game with a fixed engine timestep and a capped frame rate.
+
+    :param Game game: The game to run.
+    :param user_interface: Object with an update() method that redraws the display.
+    :param controls: Object with a get_event() method that returns a key event or None.
+    :param int max_fps: The most times per second the display is redrawn.
+    :param int max_catch_up: The most ticks run back to back to catch up.
+    :param clock: Function returning the time in nanoseconds.
+    :param sleep: Function sleeping for a number of seconds.
+    """
+    def __init__(self, game, user_interface, controls, max_fps=30, max_catch_up=50,
+                 clock=time.monotonic_ns, sleep=time.sleep):
+        self.game = game
+        self.user_interface = user_interface
+        self.controls = controls
+        self.tick_ns = game.tick_ms * NS_PER_MS
+        self.frame_ns = NS_PER_SECOND // max_fps
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+
+        self.ticks = 0
+        self.skipped_ticks = 0
+        self.frames = 0
+        self.dropped_ticks = 0
+        self.busy_ns = 0
+        self.idle_ns = 0
+
+        self._next_tick = None
+        self._next_frame = None
+
+    def step(self):
+        """
+        Run the ticks and the frame that are due, then sleep until the next
+        one is.  The first call only starts the clock.
+        """
+        now = self.clock()
+
+        if self._next_tick is None:
+            self._next_tick = now
+            self._next_frame = now
+
+        game = self.game
+        ticks = 0
+        while self._next_tick <= now and ticks < self.max_catch_up:
+            event = self.controls.get_event()
+            if event:
+                game.handle_event(event)
+            else:
+                # skip the due ticks that would only be counted, up to the next one that isn't
+                due = (now - self._next_tick) // self.tick_ns + 1
+                idle = game.idle_ticks()
+                skip = due if idle is None or idle > due else idle
+
+                if skip:
+                    game.skip(skip)
+                    self._next_tick += skip * self.tick_ns
+                    self.skipped_ticks += skip
+                    continue
+
+            game.move()
+            self._next_tick += self.tick_ns
+            ticks += 1
+
+        if self._next_tick <= now:
+            # too far behind: drop the missed ticks instead of spiralling
+            missed = (now - self._next_tick) // self.tick_ns + 1
+            self.dropped_ticks += missed
+            self._next_tick += missed * self.tick_ns
+
+        self.ticks += ticks
+
+        if self._next_frame <= now:
+            game.flush_events()
+            self.user_interface.update()
+            self.frames += 1
+            self._next_frame += self.frame_ns
+            if self._next_frame <= now:
+                self._next_frame = now + self.frame_ns
+
+        after = self.clock()
+        self.busy_ns += after - now
+
+        wake = self._next_frame
+        idle = game.idle_ticks()
+        if idle is not None and self._next_tick + idle * self.tick_ns < wake:
+            wake = self._next_tick + idle * self.tick_ns
+
+        wait = wake - after
+        if wait > 0:
+            self.sleep(wait / NS_PER_SECOND)
+            self.idle_ns += self.clock() - after
+
+    def idle_percent(self):
+        """
+        Get the share of the loop's time spent asleep, in percent.
+        """
+        total = self.busy_ns + self.idle_ns
+
+        return self.idle_ns * 100 / total if total else 0
+
+    def run(self):
+        """
+        Run the game forever.
+        """
+        while True:
+            self.step()
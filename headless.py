@@ -0,0 +1,218 @@
+"""
+Run the Tetris engine without a display, sound or keys.  Input comes
+from a script, from the bot (bot.BotInput) or from a seeded random
+generator, and the game's frame counter is stepped as fast as the CPU
+allows, so it has nothing to do with wall time.  This runs on a host under
+CPython and doesn't need to be copied to your board.
+
+    python headless.py --games 20 --seed 1
+    python headless.py --games 20 --seed 1 --input random
+
+Random keys hardly ever clear a line, so the scores, levels and lines only
+mean something with the bot playing, which is the default.  Random input
+is for soaking the engine with odd key sequences.
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from key_input import KeyRepeater, TICKS_MASK
+from keymap import KeyEvent, Keymap
+from tetris import Game, game_state
+
+class ScriptedInput:
+    """
+    Input source that plays back a script of (tick, key_number, pressed)
+    tuples, sorted by tick.  Like GameControls.get_event, at most one event
+    is delivered per tick, so events that share a tick are delivered on the
+    ticks that follow.
+
+    :param list script: The (tick, key_number, pressed) tuples to play back.
+    """
+    def __init__(self, script):
+        self.script = script
+        self._index = 0
+
+    def get_event(self, tick):
+        """
+        Get the next scripted event, if it's due at [tick].
+        """
+        if self._index < len(self.script) and self.script[self._index][0] <= tick:
+            _, key_number, pressed = self.script[self._index]
+            self._index += 1
+
+            return KeyEvent(key_number, pressed)
+
+        return None
+
+class RandomInput:
+    """
+    Input source that presses and holds random movement and rotation keys.
+    The same seed always generates the same input.
+
+    :param Keymap keymap: The keymap the game uses.
+    :param int seed: Seed for the input generator.
+    :param int press_interval: Average number of ticks between key presses.
+    :param int max_hold: The longest a key is held down, in ticks.
+    """
+    def __init__(self, keymap, seed=None, press_interval=200, max_hold=300):
+        self.rng = random.Random(seed)
+        self.keys = (keymap.left, keymap.right, keymap.down, keymap.A, keymap.B)
+        self.press_interval = press_interval
+        self.max_hold = max_hold
+
+        self._held_key = None
+        self._release_tick = 0
+
+    def get_event(self, tick):
+        """
+        Get a random key event for [tick], or None.
+        """
+        if self._held_key is not None:
+            if tick < self._release_tick:
+                return None
+
+            event = KeyEvent(self._held_key, False)
+            self._held_key = None
+
+            return event
+
+        if self.rng.randrange(self.press_interval) == 0:
+            self._held_key = self.rng.choice(self.keys)
+            self._release_tick = tick + self.rng.randint(1, self.max_hold)
+
+            return KeyEvent(self._held_key, True)
+
+        return None
+
+class InputEvents:
+    """
+    Adapt an input source to the get() interface that KeyRepeater reads
+    events from, passing it the game's tick.
+
+    :param input_source: Object with a get_event(tick) method.
+    :param Game game: The game being played.
+    """
+    def __init__(self, input_source, game):
+        self.input_source = input_source
+        self.game = game
+
+    def get(self):
+        """ Get the input source's event for the game's tick, or None. """
+        return self.input_source.get_event(self.game.ticks)
+
+def game_clock(game):
+    """
+    Get a clock for KeyRepeater that counts [game]'s ticks as milliseconds,
+    so that held keys repeat in game time rather than wall time.
+    """
+    return lambda: game.ticks * game.tick_ms & TICKS_MASK
+
+def run_game(game, input_source, max_ticks=None):
+    """
+    Play [game] until it's over (or until [max_ticks] have passed), the same
+    way code.py does: held keys are repeated by a KeyRepeater, and there's
+    at most one input event per tick, followed by a move.
+
+    :returns int The number of ticks played.
+    """
+    key_input = KeyRepeater(InputEvents(input_source, game), game.keymap, game_clock(game))
+    tick = 0
+
+    while game.state != game_state.gameover and (max_ticks is None or tick < max_ticks):
+        event = key_input.get_event()
+
+        if event:
+            game.handle_event(event)
+
+        game.move()
+        tick += 1
+
+    return tick
+
+# the input sources a seeded game can be played with, by name
+INPUTS = ('bot', 'random')
+
+def new_input(name, game, seed):
+    """
+    Create the input source called [name] (one of INPUTS) for [game].
+    """
+    if name == 'bot':
+        # bot.py imports this module for its command line, so it's imported here
+        from bot import BotInput  # pylint: disable=import-outside-toplevel, cyclic-import
+
+        return BotInput(game)
+
+    if name == 'random':
+        return RandomInput(game.keymap, seed=seed)
+
+    raise ValueError('Unknown input {}'.format(name))
+
+def play_seeded_game(seed, height=19, width=10, max_ticks=None, input_name='bot'):
+    """
+    Play one game, where both the pieces and the input come from [seed], so
+    the same seed always plays the same game.  The game prints every level
+    it reaches, which is left out here.
+
+    :param str input_name: Who plays the game, one of INPUTS.
+    :returns tuple (seed, score, level, lines, pieces, ticks)
+    """
+    game = Game(height, width, Keymap(), seed=seed)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ticks = run_game(game, new_input(input_name, game, seed), max_ticks)
+
+    return seed, game.score, game.level, game.tetris.lines, game.tetris.pieces, ticks
+
+def run(games, height=19, width=10, seed=None, max_ticks=None, input_name='bot'):
+    """
+    Play [games] games with [input_name] input, each with its own seed
+    derived from [seed].
+
+    :returns tuple (games played, ticks played, elapsed seconds, scores)
+    """
+    seeds = random.Random(seed)
+    total_ticks = 0
+    scores = []
+
+    start = time.perf_counter()
+
+    for _ in range(games):
+        _, score, _, _, _, ticks = play_seeded_game(
+            seeds.getrandbits(32), height, width, max_ticks, input_name
+        )
+
+        total_ticks += ticks
+        scores.append(score)
+
+    return games, total_ticks, time.perf_counter() - start, scores
+
+def main():
+    """ Run headless games from the command line and report the throughput. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--games', type=int, default=10, help='number of games to play')
+    parser.add_argument('--height', type=int, default=19, help='board height')
+    parser.add_argument('--width', type=int, default=10, help='board width')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the games')
+    parser.add_argument('--max-ticks', type=int, default=None, help='tick limit per game')
+    parser.add_argument(
+        '--input', choices=INPUTS, default=INPUTS[0],
+        help='who plays: the bot (default) or random keys, which hardly ever clear a line'
+    )
+    args = parser.parse_args()
+
+    games, ticks, elapsed, scores = run(
+        args.games, args.height, args.width, args.seed, args.max_ticks, args.input
+    )
+
+    print('games:       {}'.format(games))
+    print('ticks:       {}'.format(ticks))
+    print('elapsed:     {:.2f}s'.format(elapsed))
+    print('games/sec:   {:.2f}'.format(games / elapsed))
+    print('ticks/sec:   {:,.0f}'.format(ticks / elapsed))
+    print('mean score:  {:.2f}'.format(sum(scores) / len(scores)))
+
+if __name__ == '__main__':
+    main()
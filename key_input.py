@@ -0,0 +1,145 @@
+"""
+Turn held keys into repeated key presses with delayed auto-shift (DAS)
+and auto-repeat rate (ARR), timed in milliseconds from the timestamps of
+the key events rather than from how often the game loop runs.
+
+When left or right is pressed, the press is passed on straight away, and
+if the key is still held das_ms milliseconds after it went down, another
+press is generated every arr_ms milliseconds until it's released.  Down
+repeats every soft_drop_ms milliseconds with no delay.  The game moves
+the piece once for every press, so a held key moves the piece the same
+distance however fast or slow the loop is.
+
+>>> key_input = KeyRepeater(keys.events, keymap, supervisor.ticks_ms)
+>>> event = key_input.get_event()
+
+The events can come from any object with a get() method returning events
+(or None), like keypad's event queues or StubKeys on a host.  Timestamps
+wrap around the way supervisor.ticks_ms does.  This module doesn't import
+any CircuitPython modules.
+"""
+from keymap import KeyEvent, MOVE_LEFT, MOVE_RIGHT, SOFT_DROP
+
+TICKS_PERIOD = 1 << 29
+TICKS_MASK = TICKS_PERIOD - 1
+TICKS_HALF_PERIOD = TICKS_PERIOD // 2
+
+def ticks_diff(end, start):
+    """
+    Get the milliseconds from [start] to [end], allowing for the timestamps
+    wrapping around.
+    """
+    diff = (end - start) & TICKS_MASK
+
+    return diff - TICKS_PERIOD if diff >= TICKS_HALF_PERIOD else diff
+
+class KeyRepeater:
+    """
+    Pass key events on, adding repeated presses while a movement key is held.
+
+    :param events: Object whose get() returns the next key event or None.
+    :param Keymap keymap: The keymap the game uses.
+    :param clock: Function returning the time in milliseconds, in the same
+        terms as the event timestamps.
+    """
+    das_ms = 170 # how long a direction key is held before it repeats
+    arr_ms = 50 # how often a held direction key repeats
+    soft_drop_ms = 50 # how often a held down key repeats
+
+    def __init__(self, events, keymap, clock):
+        self.events = events
+        self.clock = clock
+
+        # (delay, interval) in milliseconds for every key, or None if it doesn't repeat
+        self.repeats = []
+        for action in keymap.actions():
+            if action in (MOVE_LEFT, MOVE_RIGHT):
+                self.repeats.append((self.das_ms, self.arr_ms))
+            elif action == SOFT_DROP:
+                self.repeats.append((self.soft_drop_ms, self.soft_drop_ms))
+            else:
+                self.repeats.append(None)
+
+        # one event per key, reused for every repeat
+        self.repeat_events = [KeyEvent(key_number, True) for key_number in range(len(self.repeats))]
+
+        self.held_key = None
+        self.next_repeat = 0
+        self.repeated = 0
+
+    def get_event(self):
+        """
+        Get the next key event from the events, or a repeated press of the
+        held key if one is due, or None.
+        """
+        event = self.events.get()
+        now = self.clock()
+
+        if event is not None:
+            repeat = self.repeats[event.key_number]
+
+            if repeat is not None:
+                if event.pressed:
+                    pressed_at = event.timestamp if event.timestamp is not None else now
+                    self.held_key = event.key_number
+                    self.next_repeat = (pressed_at + repeat[0]) & TICKS_MASK
+                elif event.key_number == self.held_key:
+                    self.held_key = None
+
+            return event
+
+        if self.held_key is not None and ticks_diff(now, self.next_repeat) >= 0:
+            # step from the last repeat rather than from now, so that the
+            # repeats keep time even if the loop is late
+            self.next_repeat = (self.next_repeat + self.repeats[self.held_key][1]) & TICKS_MASK
+            self.repeated += 1
+
+            repeat_event = self.repeat_events[self.held_key]
+            repeat_event.timestamp = now
+
+            return repeat_event
+
+        return None
+
+    def reset(self):
+        """
+        Forget the held key.
+        """
+        self.held_key = None
+
+class StubKeys:
+    """
+    Stand-in for keypad.ShiftRegisterKeys for testing on a host: key changes
+    are queued with press() and release(), and read through events.get().
+
+    :param clock: Function returning the time in milliseconds, used to
+        timestamp events that aren't given a timestamp.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.queue = []
+        self.events = self
+
+    def press(self, key_number, timestamp=None):
+        """
+        Queue a press of [key_number].
+        """
+        self.queue.append(KeyEvent(key_number, True, self._timestamp(timestamp)))
+
+    def release(self, key_number, timestamp=None):
+        """
+        Queue a release of [key_number].
+        """
+        self.queue.append(KeyEvent(key_number, False, self._timestamp(timestamp)))
+
+    def _timestamp(self, timestamp):
+        """
+        Get [timestamp], or the clock's time if it's None, wrapped to TICKS_MASK.
+        """
+        return (timestamp if timestamp is not None else self.clock()) & TICKS_MASK
+
+    def get(self):
+        """
+        Get the oldest queued event, or None.
+        """
+        return self.queue.pop(0) if self.queue else None
@@ -0,0 +1,74 @@
+"""
+Give the PyBadge keys decipherable names, and provide a key event class
+for input sources other than the keys.  This module doesn't import any
+CircuitPython modules, so the game logic can be driven by other input
+sources (like the headless runner or the bot) on a host.
+"""
+
+# what a key does in the game, see Keymap.actions
+NO_ACTION = 0
+ROTATE_LEFT = 1
+ROTATE_RIGHT = 2
+MOVE_LEFT = 3
+MOVE_RIGHT = 4
+SOFT_DROP = 5
+PAUSE = 6
+RESET = 7
+HARD_DROP = 8
+
+class Keymap:
+    """
+    Abstract the pybadge keys into decipherable names.  Each key name is an
+    attribute holding the key's number, set once when the keymap is made, so
+    that looking a key up is a plain attribute access.
+    """
+
+    # At some point, this could possibly be abstracted to other boards
+    # by using os.uname().machine
+
+    # keys, in matrix order
+    keymap = ['B', 'A', 'start', 'select', 'right', 'down', 'up', 'left']
+
+    # the action of each key that does something
+    bindings = {
+        'A': ROTATE_LEFT,
+        'B': ROTATE_RIGHT,
+        'left': MOVE_LEFT,
+        'right': MOVE_RIGHT,
+        'down': SOFT_DROP,
+        'up': HARD_DROP,
+        'start': PAUSE,
+        'select': RESET,
+    }
+
+    def __init__(self):
+        for key_number, key in enumerate(self.keymap):
+            setattr(self, key, key_number)
+
+    def actions(self):
+        """
+        Compile the bindings into a table of actions indexed by key number.
+
+        :returns tuple The action of every key, NO_ACTION for unbound keys.
+        """
+        return tuple(self.bindings.get(key, NO_ACTION) for key in self.keymap)
+
+class KeyEvent:
+    """
+    Stand-in for keypad.Event, with the attributes that Game.handle_event uses.
+
+    :param int key_number: The key that changed.
+    :param bool pressed: True if the key was pressed, False if it was released.
+    :param int timestamp: When the key changed, in milliseconds (as with
+        supervisor.ticks_ms), or None if the time the event is read will do.
+    """
+    __slots__ = ('key_number', 'pressed', 'released', 'timestamp')
+
+    def __init__(self, key_number, pressed, timestamp=None):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return 'KeyEvent({}, {})'.format(self.key_number, self.pressed)
@@ -0,0 +1,121 @@
+"""
+Report how much memory the parts of the game engine use, to see what fits
+on boards with little RAM.  On the board the heap is measured with
+gc.mem_free(); on a host, with tracemalloc.
+
+>>> print_memory_report()
+
+Each component is measured by building a new one and measuring how much
+the heap grew, so the numbers include everything the component allocates
+(a Tetris includes its field and pieces, a Game includes its Tetris).
+"""
+import gc
+
+from field import BitboardField
+from keymap import Keymap
+from randomizer import PieceQueue, UniformRandomizer
+from tetris import compile_piece_shapes, Game, GamePiece, Tetris
+from util import SeededRandom
+
+class HeapMeter:
+    """
+    Measure the heap, with gc.mem_free() when it's there (CircuitPython) or
+    tracemalloc when it isn't (CPython).
+    """
+    def __init__(self):
+        self.on_device = hasattr(gc, 'mem_free')
+        self._tracemalloc = None
+
+        if not self.on_device:
+            import tracemalloc  # pylint: disable=import-outside-toplevel
+
+            self._tracemalloc = tracemalloc
+
+    def used(self):
+        """
+        Get the number of bytes in use on the heap (or traced, on a host).
+        """
+        gc.collect()
+
+        if self.on_device:
+            return gc.mem_alloc()  # pylint: disable=no-member
+
+        return self._tracemalloc.get_traced_memory()[0]
+
+    def free(self):
+        """
+        Get the number of free bytes on the heap, or None on a host.
+        """
+        gc.collect()
+
+        return gc.mem_free() if self.on_device else None  # pylint: disable=no-member
+
+    def measure(self, factory):
+        """
+        Get the number of bytes that the object returned by [factory] holds on to.
+        """
+        started = False
+        if not self.on_device and not self._tracemalloc.is_tracing():
+            self._tracemalloc.start()
+            started = True
+
+        before = self.used()
+        component = factory()
+        size = self.used() - before
+
+        del component
+
+        if started:
+            self._tracemalloc.stop()
+
+        return size
+
+def memory_report(height=19, width=10, components=None):
+    """
+    Measure the engine's components for a board of [height] by [width].
+
+    :param list components: More (name, factory) pairs to measure, such as
+        the user interface on the board.
+    :returns list (name, bytes) pairs, ending with ('free', bytes) on the board.
+    """
+    meter = HeapMeter()
+    keymap = Keymap()
+    game = Game(height, width, keymap, seed=1)
+
+    measured = [
+        ('piece shapes', lambda: compile_piece_shapes(GamePiece.game_pieces)),
+        ('game piece', lambda: GamePiece(3, 0, SeededRandom(1))),
+        ('piece queue', lambda rng=SeededRandom(1): PieceQueue(UniformRandomizer(rng, 7), rng, 1)),
+        ('field', lambda: BitboardField(height, width)),
+    ]
+    if not meter.on_device:
+        # the host-only fields aren't on the board
+        from fields_host import ListField, SparseField  # pylint: disable=import-outside-toplevel
+
+        measured.extend((
+            ('field (list of lists)', lambda: ListField(height, width)),
+            ('field (sparse)', lambda: SparseField(height, width)),
+        ))
+    measured.extend((
+        ('tetris', lambda: Tetris(height, width, rng=SeededRandom(1))),
+        ('game', lambda: Game(height, width, keymap, seed=1)),
+        ('game state (get_state)', lambda game=game: game.get_state()),
+        ('game snapshot (bytes)', lambda game=game: game.snapshot()),
+    ))
+    if components:
+        measured.extend(components)
+
+    report = [(name, meter.measure(factory)) for name, factory in measured]
+
+    if meter.on_device:
+        report.append(('free', meter.free()))
+
+    return report
+
+def print_memory_report(height=19, width=10, components=None):
+    """ Print memory_report(), one component per line. """
+    for name, size in memory_report(height, width, components):
+        print('{:<24} {:>8} bytes'.format(name, size))
+
+if __name__ == '__main__':
+    print_memory_report()
@@ -0,0 +1,254 @@
+"""
+Opt-in timing of the phases of the game loop.  Every call to an
+instrumented method is timed and kept in a preallocated ring buffer per
+phase, so profiling doesn't allocate lists or dictionaries while the game
+runs.  The buffers can be summarized as p50/p95/p99 per phase or dumped
+as Chrome trace JSON (open it at chrome://tracing or ui.perfetto.dev).
+
+>>> loop = GameLoop(game, ui, game_controls)
+>>> profiler = Profiler()
+>>> instrument(profiler, loop)
+>>> for _ in range(1000):
+>>>     loop.step()
+>>> profiler.print_report()
+
+Timestamps are kept in microseconds since the profiler was created, in
+32 bit arrays, so a profiling session shouldn't run for more than an hour.
+"""
+from array import array
+import json
+import time
+
+class Profiler:
+    """
+    Collect call durations for named phases.
+
+    :param int capacity: The number of samples kept for each phase; older
+        samples are overwritten.
+    """
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.names = []
+        self.origin_ns = time.monotonic_ns()
+
+        self._starts = []
+        self._durations = []
+        self._next = []
+        self._counts = []
+
+    def phase(self, name):
+        """
+        Get the id of the phase called [name], adding the phase if it's new.
+        Call this while setting up, not per frame.
+        """
+        if name in self.names:
+            return self.names.index(name)
+
+        self.names.append(name)
+        self._starts.append(array('L', [0] * self.capacity))
+        self._durations.append(array('L', [0] * self.capacity))
+        self._next.append(0)
+        self._counts.append(0)
+
+        return len(self.names) - 1
+
+    def record(self, phase, start_ns, end_ns):
+        """
+        Record a call of [phase] that ran from [start_ns] to [end_ns].
+        """
+        index = self._next[phase]
+        self._starts[phase][index] = (start_ns - self.origin_ns) // 1000
+        self._durations[phase][index] = (end_ns - start_ns) // 1000
+
+        self._next[phase] = (index + 1) % self.capacity
+        self._counts[phase] += 1
+
+    def wrap(self, name, function, takes_argument=False):
+        """
+        Get a version of [function] that records every call under the phase
+        called [name].  Instrumented functions take no argument or, with
+        [takes_argument], exactly one (as the game's callbacks do).
+        """
+        phase = self.phase(name)
+        record = self.record
+        clock = time.monotonic_ns
+
+        if takes_argument:
+            def timed_with_argument(argument):
+                start = clock()
+                result = function(argument)
+                record(phase, start, clock())
+
+                return result
+
+            return timed_with_argument
+
+        def timed():
+            start = clock()
+            result = function()
+            record(phase, start, clock())
+
+            return result
+
+        return timed
+
+    def wrap_method(self, name, cls, attribute, takes_argument=False):
+        """
+        Replace the method [attribute] of [cls] with one that records every
+        call under the phase called [name].  This is for classes with
+        __slots__, whose instances can't have their methods replaced, and
+        affects every instance of [cls].
+        """
+        phase = self.phase(name)
+        record = self.record
+        clock = time.monotonic_ns
+        method = getattr(cls, attribute)
+
+        if takes_argument:
+            def timed_method_with_argument(instance, argument):
+                start = clock()
+                result = method(instance, argument)
+                record(phase, start, clock())
+
+                return result
+
+            setattr(cls, attribute, timed_method_with_argument)
+        else:
+            def timed_method(instance):
+                start = clock()
+                result = method(instance)
+                record(phase, start, clock())
+
+                return result
+
+            setattr(cls, attribute, timed_method)
+
+    def samples(self, phase):
+        """
+        Get the (start, duration) samples of [phase] still in its ring
+        buffer, in microseconds, oldest first.
+        """
+        count = min(self._counts[phase], self.capacity)
+        first = (self._next[phase] - count) % self.capacity
+
+        return [
+            (self._starts[phase][(first + i) % self.capacity],
+             self._durations[phase][(first + i) % self.capacity])
+            for i in range(count)
+        ]
+
+    def percentiles(self, phase, ranks=(50, 95, 99)):
+        """
+        Get the nearest-rank percentiles of [phase]'s durations, in microseconds.
+
+        :returns list One duration per rank, or an empty list if there are no samples.
+        """
+        durations = sorted(duration for _, duration in self.samples(phase))
+        if not durations:
+            return []
+
+        return [durations[min(len(durations) - 1, len(durations) * rank // 100)] for rank in ranks]
+
+    def report(self):
+        """
+        Summarize every phase.
+
+        :returns list One line of text per phase.
+        """
+        lines = ['{:<28} {:>8} {:>8} {:>8} {:>8}'.format(
+            'phase (us)', 'calls', 'p50', 'p95', 'p99'
+        )]
+
+        for phase, name in enumerate(self.names):
+            percentiles = self.percentiles(phase)
+            if percentiles:
+                lines.append('{:<28} {:>8} {:>8} {:>8} {:>8}'.format(
+                    name, self._counts[phase], *percentiles
+                ))
+
+        return lines
+
+    def print_report(self):
+        """ Print the summary of every phase. """
+        for line in self.report():
+            print(line)
+
+    def chrome_trace(self):
+        """
+        Get the samples as Chrome trace events (complete events on one thread).
+
+        :returns dict The trace, ready to be written as JSON.
+        """
+        events = []
+        for phase, name in enumerate(self.names):
+            for start, duration in self.samples(phase):
+                events.append({
+                    'name': name, 'ph': 'X', 'ts': start, 'dur': duration, 'pid': 1, 'tid': 1
+                })
+
+        events.sort(key=lambda event: event['ts'])
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_trace(self, path):
+        """
+        Write the samples to [path] as Chrome trace JSON.  On the board, the
+        filesystem has to be writable from CircuitPython (see boot.py in the
+        CircuitPython docs on storage.remount).
+        """
+        with open(path, 'w', encoding='utf-8') as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+
+class TimedDisplay:
+    """
+    Stand-in for a display whose refresh() calls are recorded, since
+    attributes of the built-in display object can't be replaced.
+
+    :param Profiler profiler: The profiler to record into.
+    :param display: The display to wrap.
+    """
+    def __init__(self, profiler, display):
+        self.display = display
+        self.refresh = profiler.wrap('display.refresh', display.refresh)
+
+    def __getattr__(self, name):
+        return getattr(self.display, name)
+
+def instrument_callbacks(profiler, name, callbacks):
+    """
+    Record every callback in the CallbackProperty [callbacks] under the phase [name].
+    """
+    for callback in tuple(callbacks):
+        callbacks.replace(callback, profiler.wrap(name, callback, takes_argument=True))
+
+def instrument(profiler, loop):
+    """
+    Record the phases of a game_loop.GameLoop and of its game, controls and
+    user interface.  Instrument after the game's callbacks are registered, and
+    only once, since the game's methods are replaced on its class.
+    """
+    game = loop.game
+    user_interface = loop.user_interface
+    game_class = type(game)
+
+    loop.step = profiler.wrap('GameLoop.step', loop.step)
+    loop.controls.get_event = profiler.wrap('get_event', loop.controls.get_event)
+    profiler.wrap_method('handle_event', game_class, 'handle_event', takes_argument=True)
+    profiler.wrap_method('move', game_class, 'move')
+    profiler.wrap_method('flush_events', game_class, 'flush_events')
+    user_interface.update = profiler.wrap('ui.update', user_interface.update)
+
+    user_interface.game_board.update = profiler.wrap(
+        'GameBoard.update', user_interface.game_board.update
+    )
+    user_interface.next_piece_preview.update = profiler.wrap(
+        'NextPiecePreview.update', user_interface.next_piece_preview.update
+    )
+    user_interface.battery_level.update = profiler.wrap(
+        'BatteryLevelIndicator.update', user_interface.battery_level.update
+    )
+    user_interface.display = TimedDisplay(profiler, user_interface.display)
+
+    instrument_callbacks(profiler, 'on_state_change', game.on_state_change)
+    instrument_callbacks(profiler, 'on_score_change', game.on_score_change)
+    instrument_callbacks(profiler, 'on_level_change', game.on_level_change)
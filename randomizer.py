@@ -0,0 +1,263 @@
+"""
+Piece randomizers and the queue of upcoming pieces.
+
+A randomizer picks the type of each new piece from a game's random number
+generator:
+
+- UniformRandomizer picks every piece independently (the original rules).
+- BagRandomizer deals the seven pieces in a shuffled bag, so every piece
+  comes once in every seven.
+- HistoryRandomizer rerolls pieces that are among the last four dealt, so
+  droughts and floods are rare but the order isn't as predictable as a bag.
+
+PieceQueue keeps the upcoming pieces in a fixed-size ring buffer of piece
+types and colors, so a game can preview several pieces ahead and taking
+the next piece doesn't allocate anything.
+
+>>> queue = PieceQueue(BagRandomizer(rng, 7), rng, 3)
+>>> queue.piece_type(0), queue.color(0)  # the next piece
+>>> queue.advance()
+
+All the state is plain bytes, so it can be saved and restored for replays,
+either as Python values (get_state and set_state) or packed into bytes
+(snapshot and restore, which Game.snapshot uses).
+"""
+from util import colors
+
+class UniformRandomizer:
+    """
+    Pick every piece type independently, with equal chances.
+
+    :param rng: The random number generator (SeededRandom or the random module).
+    :param int piece_types: The number of piece types.
+    """
+    __slots__ = ('rng', 'piece_types')
+
+    def __init__(self, rng, piece_types):
+        self.rng = rng
+        self.piece_types = piece_types
+
+    def next_piece_type(self):
+        """ Get the type of the next piece. """
+        return self.rng.randint(0, self.piece_types - 1)
+
+    def get_state(self):
+        """ Get this randomizer's state, for set_state. """
+        return None
+
+    def set_state(self, state):
+        """ Restore this randomizer from get_state. """
+
+    def snapshot(self):
+        """ Get this randomizer's state as bytes, for restore. """
+        return b''
+
+    def restore(self, blob, offset=0):  # pylint: disable=unused-argument
+        """
+        Restore this randomizer from snapshot() bytes at [offset] in [blob].
+
+        :returns int The offset of the end of the state in [blob].
+        """
+        return offset
+
+class BagRandomizer:
+    """
+    Deal piece types from a shuffled bag holding one of each, refilling and
+    reshuffling it when it's empty.
+
+    :param rng: The random number generator (SeededRandom or the random module).
+    :param int piece_types: The number of piece types.
+    """
+    __slots__ = ('rng', 'piece_types', 'bag', 'index')
+
+    def __init__(self, rng, piece_types):
+        self.rng = rng
+        self.piece_types = piece_types
+        self.bag = bytearray(range(piece_types))
+        self.index = piece_types  # empty, so the first piece shuffles the bag
+
+    def next_piece_type(self):
+        """ Get the type of the next piece. """
+        bag = self.bag
+
+        if self.index == len(bag):
+            # Fisher-Yates shuffle, in place
+            for i in range(len(bag) - 1, 0, -1):
+                j = self.rng.randint(0, i)
+                bag[i], bag[j] = bag[j], bag[i]
+
+            self.index = 0
+
+        piece_type = bag[self.index]
+        self.index += 1
+
+        return piece_type
+
+    def get_state(self):
+        """ Get this randomizer's state, for set_state. """
+        return bytes(self.bag), self.index
+
+    def set_state(self, state):
+        """ Restore this randomizer from get_state. """
+        bag, self.index = state
+        self.bag[:] = bag
+
+    def snapshot(self):
+        """ Get this randomizer's state as bytes, for restore: the bag, then the index. """
+        return bytes(self.bag) + bytes((self.index, ))
+
+    def restore(self, blob, offset=0):
+        """
+        Restore this randomizer from snapshot() bytes at [offset] in [blob].
+
+        :returns int The offset of the end of the state in [blob].
+        """
+        end = offset + len(self.bag)
+        self.bag[:] = blob[offset:end]
+        self.index = blob[end]
+
+        return end + 1
+
+class HistoryRandomizer:
+    """
+    Pick piece types at random, rolling again (up to [rolls] times) while
+    the type is one of the last four dealt.
+
+    :param rng: The random number generator (SeededRandom or the random module).
+    :param int piece_types: The number of piece types.
+    :param int rolls: The most times a piece is rolled, at least 1.
+    """
+    __slots__ = ('rng', 'piece_types', 'rolls', 'history', 'index')
+
+    history_size = 4
+
+    def __init__(self, rng, piece_types, rolls=6):
+        if rolls < 1:
+            raise ValueError('A piece has to be rolled at least once')
+
+        self.rng = rng
+        self.piece_types = piece_types
+        self.rolls = rolls
+        # start as if the S and Z shapes had just been dealt, so that they don't open the game
+        self.history = bytearray((1, 2, 1, 2))
+        self.index = 0
+
+    def next_piece_type(self):
+        """ Get the type of the next piece. """
+        for _ in range(self.rolls):
+            piece_type = self.rng.randint(0, self.piece_types - 1)
+            if piece_type not in self.history:
+                break
+
+        self.history[self.index] = piece_type
+        self.index = (self.index + 1) % self.history_size
+
+        return piece_type
+
+    def get_state(self):
+        """ Get this randomizer's state, for set_state. """
+        return bytes(self.history), self.index
+
+    def set_state(self, state):
+        """ Restore this randomizer from get_state. """
+        history, self.index = state
+        self.history[:] = history
+
+    def snapshot(self):
+        """ Get this randomizer's state as bytes, for restore: the history, then the index. """
+        return bytes(self.history) + bytes((self.index, ))
+
+    def restore(self, blob, offset=0):
+        """
+        Restore this randomizer from snapshot() bytes at [offset] in [blob].
+
+        :returns int The offset of the end of the state in [blob].
+        """
+        end = offset + self.history_size
+        self.history[:] = blob[offset:end]
+        self.index = blob[end]
+
+        return end + 1
+
+# the randomizers by number, as stored in replay logs
+RANDOMIZERS = (UniformRandomizer, BagRandomizer, HistoryRandomizer)
+
+class PieceQueue:
+    """
+    A ring buffer of the types and colors of the next [size] pieces.  Each
+    piece's type comes from [randomizer] and then its color from [rng], so a
+    queue with a UniformRandomizer deals the same pieces as the original
+    GamePiece(x, y, rng) did.
+
+    :param randomizer: The randomizer picking the piece types.
+    :param rng: The random number generator for the colors.
+    :param int size: The number of upcoming pieces to keep.
+    """
+    __slots__ = ('randomizer', 'rng', 'types', 'colors', 'head')
+
+    def __init__(self, randomizer, rng, size):
+        self.randomizer = randomizer
+        self.rng = rng
+        self.types = bytearray(size)
+        self.colors = bytearray(size)
+        self.head = 0
+
+        for index in range(size):
+            self._deal(index)
+
+    def __len__(self):
+        return len(self.types)
+
+    def _deal(self, index):
+        """ Deal a new piece into slot [index]. """
+        self.types[index] = self.randomizer.next_piece_type()
+        self.colors[index] = self.rng.randint(1, len(colors) - 1)
+
+    def piece_type(self, ahead=0):
+        """ Get the type of the piece [ahead] places after the next one. """
+        return self.types[(self.head + ahead) % len(self.types)]
+
+    def color(self, ahead=0):
+        """ Get the color of the piece [ahead] places after the next one. """
+        return self.colors[(self.head + ahead) % len(self.colors)]
+
+    def advance(self):
+        """
+        Drop the next piece from the queue (once it's been spawned), and deal a
+        new piece at the end.
+        """
+        self._deal(self.head)
+        self.head = (self.head + 1) % len(self.types)
+
+    def get_state(self):
+        """ Get the queue's state, for set_state. """
+        return bytes(self.types), bytes(self.colors), self.head, self.randomizer.get_state()
+
+    def set_state(self, state):
+        """ Restore the queue from get_state. """
+        types, piece_colors, self.head, randomizer = state
+        self.types[:] = types
+        self.colors[:] = piece_colors
+        self.randomizer.set_state(randomizer)
+
+    def snapshot(self):
+        """
+        Get the queue's state as bytes, for restore: the types, the colors,
+        the head and then the randomizer's state.
+        """
+        return b''.join((
+            self.types, self.colors, bytes((self.head, )), self.randomizer.snapshot()
+        ))
+
+    def restore(self, blob, offset=0):
+        """
+        Restore the queue from snapshot() bytes at [offset] in [blob].
+
+        :returns int The offset of the end of the queue in [blob].
+        """
+        size = len(self.types)
+        self.types[:] = blob[offset:offset + size]
+        self.colors[:] = blob[offset + size:offset + 2 * size]
+        self.head = blob[offset + 2 * size]
+
+        return self.randomizer.restore(blob, offset + 2 * size + 1)
@@ -0,0 +1,260 @@
+"""
+Record the input of a game into a compact binary log, and replay it.
+
+A log starts with a header holding the game's seed, board size, piece
+randomizer and preview length (which changes the order of the random
+numbers), which is followed by one 3 byte record per key event: the
+number of ticks since the previous record (a little-endian unsigned
+short) and a byte holding the key number, with the top bit set if the
+key was pressed.
+An end record (key number 127) holds the tick the game was stopped at.
+
+Recording works on the board, as long as the game is seeded:
+
+>>> game = Game(19, 10, keymap, seed=1234)
+>>> game.recorder = Recorder(game)
+>>> ...
+>>> log = game.recorder.finish(game.ticks)
+
+Replaying runs at full CPU speed and can seek to any tick, restoring the
+closest keyframe (a Game.snapshot taken every keyframe_interval ticks, a
+few hundred bytes on a 19 x 10 board) and fast-forwarding from there:
+
+>>> replay = Replay(log)
+>>> replay.seek(250000)
+>>> replay.game.tetris.field.cell(0, 18)
+"""
+import struct
+
+from keymap import KeyEvent, Keymap
+from randomizer import RANDOMIZERS
+from tetris import Game
+
+LOG_MAGIC = b'TTRS'
+LOG_VERSION = 5
+LOG_HEADER = '<4sBIHHBB'  # magic, version, seed, height, width, randomizer, preview
+LOG_RECORD = '<HB'  # ticks since the previous record, key number | pressed
+LOG_HEADER_SIZE = struct.calcsize(LOG_HEADER)
+LOG_RECORD_SIZE = struct.calcsize(LOG_RECORD)
+
+PRESSED_BIT = 0x80
+END_KEY = 0x7f
+MAX_DELTA = 0xffff
+WAIT_RECORD = (MAX_DELTA, 0xff)  # MAX_DELTA ticks pass without an event
+
+class Recorder:
+    """
+    Record a game's key events into a compact binary log.  Assign an instance
+    to Game.recorder and Game.handle_event records every event it handles.
+
+    :param Game game: The game to record.  It has to have been created with a seed,
+        and not have been stepped yet (game.ticks is 0): a replay starts a new
+        game from the seed, so a game already in progress wouldn't replay the same.
+    """
+    def __init__(self, game):
+        if game.seed is None:
+            raise ValueError('Only seeded games can be recorded')
+        if game.ticks != 0:
+            raise ValueError('Only games that haven\'t started can be recorded')
+
+        self.log = bytearray(struct.pack(
+            LOG_HEADER, LOG_MAGIC, LOG_VERSION, game.seed, game.height, game.width,
+            RANDOMIZERS.index(type(game.tetris.queue.randomizer)), len(game.tetris.queue)
+        ))
+        self.last_tick = 0
+
+    def _append(self, tick, key_byte):
+        """
+        Append a record at [tick], preceded by as many wait records as needed.
+        """
+        delta = tick - self.last_tick
+
+        while delta >= MAX_DELTA:
+            self.log.extend(struct.pack(LOG_RECORD, *WAIT_RECORD))
+            delta -= MAX_DELTA
+
+        self.log.extend(struct.pack(LOG_RECORD, delta, key_byte))
+        self.last_tick = tick
+
+    def record(self, tick, key_number, pressed):
+        """
+        Record that [key_number] was pressed or released at [tick].
+        """
+        self._append(tick, key_number | (PRESSED_BIT if pressed else 0))
+
+    def finish(self, tick):
+        """
+        Mark the game as stopped at [tick].
+
+        :returns bytes The finished log.
+        """
+        self._append(tick, END_KEY)
+
+        return bytes(self.log)
+
+def read_log(log):
+    """
+    Decode a log.
+
+    :returns tuple (seed, height, width, randomizer class, preview, events, end tick),
+        where events is a list of (tick, key_number, pressed) tuples and the
+        end tick is None if the log wasn't finished.
+    """
+    magic, version, seed, height, width, randomizer, preview = \
+        struct.unpack_from(LOG_HEADER, log, 0)
+
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError('Not a version {} game log'.format(LOG_VERSION))
+
+    events = []
+    tick = 0
+    end_tick = None
+
+    for offset in range(LOG_HEADER_SIZE, len(log) - LOG_RECORD_SIZE + 1, LOG_RECORD_SIZE):
+        delta, key_byte = struct.unpack_from(LOG_RECORD, log, offset)
+        tick += delta
+
+        if (delta, key_byte) == WAIT_RECORD:
+            continue
+
+        if key_byte == END_KEY:
+            end_tick = tick
+            break
+
+        events.append((tick, key_byte & ~PRESSED_BIT, bool(key_byte & PRESSED_BIT)))
+
+    return seed, height, width, RANDOMIZERS[randomizer], preview, events, end_tick
+
+class Replay:
+    """
+    Re-run a recorded game at full speed.  A keyframe is saved every
+    [keyframe_interval] ticks on the way, so that seeking backwards only
+    needs to fast-forward from the closest keyframe instead of the start.
+
+    :param bytes log: The recorded log.
+    :param Keymap keymap: The keymap used when the game was recorded.
+    :param int keyframe_interval: Ticks between keyframes.
+    """
+    def __init__(self, log, keymap=None, keyframe_interval=10000):
+        self.seed, height, width, randomizer_class, preview, self.events, self.end_tick = \
+            read_log(log)
+
+        self.game = Game(
+            height, width, keymap if keymap is not None else Keymap(), self.seed,
+            randomizer_class=randomizer_class, preview=preview
+        )
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = [(0, 0, self.game.snapshot())]  # (tick, event index, snapshot)
+        self._event_index = 0
+
+    @property
+    def tick(self):
+        """ The tick the replayed game is at """
+        return self.game.ticks
+
+    def run_to(self, tick):
+        """
+        Fast-forward the game to [tick], saving keyframes along the way.
+        Idle ticks are skipped up to the next event, keyframe or gravity step.
+        """
+        game = self.game
+        events = self.events
+        interval = self.keyframe_interval
+
+        while game.ticks < tick:
+            while self._event_index < len(events) and events[self._event_index][0] <= game.ticks:
+                _, key_number, pressed = events[self._event_index]
+                game.handle_event(KeyEvent(key_number, pressed))
+                self._event_index += 1
+
+            stop = min(tick, (game.ticks // interval + 1) * interval)
+            if self._event_index < len(events) and events[self._event_index][0] < stop:
+                stop = events[self._event_index][0]
+
+            idle = game.idle_ticks()
+            skip = stop - game.ticks if idle is None or idle > stop - game.ticks else idle
+
+            if skip:
+                game.skip(skip)
+            else:
+                game.move()
+
+            if game.ticks % self.keyframe_interval == 0 and game.ticks > self.keyframes[-1][0]:
+                self.keyframes.append((game.ticks, self._event_index, game.snapshot()))
+
+    def run(self):
+        """
+        Fast-forward to the end of the log (or through the last event, if it
+        wasn't finished).
+        """
+        end_tick = self.end_tick
+        if end_tick is None:
+            end_tick = self.events[-1][0] + 1 if self.events else 0
+
+        self.run_to(end_tick)
+
+    def seek(self, tick):
+        """
+        Put the game in the state it was in at [tick], going back to the
+        closest keyframe first if [tick] is behind the game or there's a
+        keyframe between the game and [tick].
+        """
+        keyframe = None
+        for candidate in self.keyframes:
+            if candidate[0] > tick:
+                break
+            keyframe = candidate
+
+        if tick < self.game.ticks or keyframe[0] > self.game.ticks:
+            _, self._event_index, snapshot = keyframe
+            self.game.restore(snapshot)
+
+        self.run_to(tick)
+
+def format_field(tetris):
+    """
+    Draw the field and the active piece as text, one line per row.
+    """
+    game_piece = tetris.game_piece
+    piece_cells = set(
+        (game_piece.x + x, game_piece.y + y) for x, y in game_piece.shape().cells
+    )
+
+    return '\n'.join(
+        ''.join(
+            '@' if (x, y) in piece_cells else
+            ('#' if tetris.field.cell(x, y) else '.')
+            for x in range(tetris.width)
+        )
+        for y in range(tetris.height)
+    )
+
+def main():
+    """ Replay a log file from the command line and print the resulting game. """
+    import argparse  # pylint: disable=import-outside-toplevel
+    import time  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description='Replay a recorded Tetris game log.')
+    parser.add_argument('log', help='path to the log file')
+    parser.add_argument('--seek', type=int, default=None, help='tick to stop at')
+    args = parser.parse_args()
+
+    with open(args.log, 'rb') as log_file:
+        replay = Replay(log_file.read())
+
+    start = time.perf_counter()
+    if args.seek is None:
+        replay.run()
+    else:
+        replay.seek(args.seek)
+    elapsed = time.perf_counter() - start
+
+    game = replay.game
+    print(format_field(game.tetris))
+    print('tick {}  score {}  level {}  state {}'.format(
+        game.ticks, game.score, game.level, game.state
+    ))
+    print('replayed at {:,.0f} ticks/sec'.format(game.ticks / elapsed if elapsed else 0))
+
+if __name__ == '__main__':
+    main()
@@ -12,9 +12,6 @@ from tetris import game_state
 
 TETRIS_MP3_FILE = '/tetris.mp3'
 
-speaker_enable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
-speaker_enable.switch_to_output(value=True)
-
 class NullAudio:
     """
     Dummy class in case the MP3 file doesn't exist.  Since we're only
@@ -27,8 +24,25 @@ class NullAudio:
 class SoundController:
     """
     Play the theme song (.play) and stop playing the theme song (.stop)
+
+    The speaker, the audio output and the MP3 decoder are set up the first
+    time the game state changes (or on start()), not when this is created.
     """
     def __init__(self):
+        self.speaker_enable = None
+        self.tetris_mp3 = None
+        self.audio = None
+
+    def start(self):
+        """
+        Enable the speaker and open the theme song, if that hasn't been done yet.
+        """
+        if self.audio is not None:
+            return
+
+        self.speaker_enable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
+        self.speaker_enable.switch_to_output(value=True)
+
         try:
             self.tetris_mp3 = audiomp3.MP3Decoder(open(TETRIS_MP3_FILE, "rb"))
             self.audio = audioio.AudioOut(board.SPEAKER)
@@ -38,12 +52,12 @@ class SoundController:
             else:
                 raise exc
 
-        self.on_game_state_change(game_state.playing)
-
     def on_game_state_change(self, state):
         """
         Start or stop music, depending on game state
         """
+        self.start()
+
         if state == game_state.gameover:
             self.audio.stop()
         elif state == game_state.paused:
@@ -55,5 +69,7 @@ class SoundController:
                 self.audio.play(self.tetris_mp3, loop=True)
 
     def __del__(self):
-        self.tetris_mp3.deinit()
-        self.audio.deinit()
+        if self.tetris_mp3 is not None:
+            self.tetris_mp3.deinit()
+        if self.audio is not None:
+            self.audio.deinit()
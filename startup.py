@@ -0,0 +1,57 @@
+"""
+Time the phases of starting the game, up to the first frame on the
+display, so that changes to startup can be measured:
+
+>>> startup = StartupTimer()
+>>> ...  # import modules
+>>> startup.mark('imports')
+>>> ui = UserInterface(game)
+>>> startup.mark('user interface')
+>>> startup.print_report()
+
+Every phase is timed from the previous mark.  The timer starts when it's
+created, so create it before the slow imports.
+"""
+import time
+
+class StartupTimer:
+    """
+    Record how long each phase of startup took.
+
+    :param clock: Function returning the time in nanoseconds.
+    """
+    def __init__(self, clock=time.monotonic_ns):
+        self.clock = clock
+        self.started = clock()
+        self.phases = []  # (name, nanoseconds)
+        self._last = self.started
+
+    def mark(self, name):
+        """
+        End the phase called [name], which started at the previous mark.
+        """
+        now = self.clock()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def total_ms(self):
+        """
+        Get the milliseconds from the start to the last mark.
+        """
+        return (self._last - self.started) / 1000000
+
+    def report(self):
+        """
+        Get one line of text per phase, and the total.
+        """
+        lines = [
+            '{:<20} {:>8.1f} ms'.format(name, elapsed / 1000000) for name, elapsed in self.phases
+        ]
+        lines.append('{:<20} {:>8.1f} ms'.format('total', self.total_ms()))
+
+        return lines
+
+    def print_report(self):
+        """ Print the time each phase took. """
+        for line in self.report():
+            print(line)
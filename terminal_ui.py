@@ -0,0 +1,394 @@
+"""
+A user interface that draws the game on a terminal with ANSI escape
+sequences, for playing or watching bot games over SSH or a serial
+console.  It has the same update() method and callbacks as
+tetris_ui.UserInterface:
+
+>>> ui = TerminalUserInterface(game)
+>>> game.on_state_change += ui.on_game_state_change
+>>> game.on_score_change.add(ui.update_score, coalesce=True)
+>>> game.on_level_change.add(ui.update_level, coalesce=True)
+
+The active piece's ghost (where it would land if it was dropped) is drawn
+as outlined squares.  The screen is drawn once, and after that every update() compares the
+board and the previews of the upcoming pieces (as many as the game keeps
+and the board's height has room for) with a shadow copy of what's on the
+terminal and only writes the cells that changed, moving the cursor only
+when the changed cells aren't next to each other.  This module doesn't
+import any CircuitPython modules.
+
+To watch the bot play, or to play with the keyboard, on a computer:
+
+    python terminal_ui.py --bot
+    python terminal_ui.py
+"""
+import sys
+
+from keymap import KeyEvent
+from tetris import game_state, GAME_PIECE_DIMENSION
+from util import colors
+
+ESC = '\x1b['
+UNKNOWN = 0xff  # shadow value of cells that haven't been drawn yet
+CELL = '  '  # each square is two characters wide, so that it looks square
+GHOST = 0xfe  # frame value of the squares of the ghost piece
+GHOST_CELL = '[]'
+PREVIEW_ROW = 7  # the first terminal row of the upcoming piece previews
+
+def color_code(color):
+    """
+    Get the escape sequence for drawing squares of color index [color].
+    """
+    if color == 0:
+        return ESC + '49m'
+
+    return '{}48;2;{};{};{}m'.format(ESC, *colors[color])
+
+COLOR_CODES = tuple(color_code(color) for color in range(len(colors)))
+
+class TerminalUserInterface:
+    """
+    Draw a game on an ANSI terminal, writing only what changed.
+
+    :param Game game: The game to draw.
+    :param write: Function that writes a string to the terminal.
+    :param flush: Function called after each frame is written, or None.
+    """
+    def __init__(self, game, write=None, flush=None):
+        if write is None:
+            write, flush = sys.stdout.write, sys.stdout.flush
+
+        self.game = game.tetris
+        self.write = write
+        self.flush = flush
+
+        self.height = self.game.height
+        self.width = self.game.width
+        self.sidebar_x = 2 * self.width + 4
+
+        self.frame = bytearray(self.height * self.width)
+        self.shadow = bytearray([UNKNOWN] * (self.height * self.width))
+        # the previews are stacked in one buffer, a piece's height apart
+        self.previews = max(1, min(
+            len(self.game.upcoming), (self.height + 3 - PREVIEW_ROW) // GAME_PIECE_DIMENSION
+        ))
+        self.preview = bytearray(self.previews * GAME_PIECE_DIMENSION * GAME_PIECE_DIMENSION)
+        self.preview_shadow = bytearray([UNKNOWN] * len(self.preview))
+
+        self.is_paused = False
+        self.game_is_over = False
+
+        self.frames = 0
+        self.bytes_written = 0
+        self.last_frame_bytes = 0
+
+        self._output = []
+        self._color = None
+        self._cursor = None
+
+        self.draw_screen(game.score, game.level)
+
+    def _emit(self):
+        """
+        Write the queued output as one string and count it.
+        """
+        output = ''.join(self._output)
+        self._output = []
+
+        if output:
+            self.write(output)
+            if self.flush is not None:
+                self.flush()
+
+        return len(output)
+
+    def _move_to(self, row, column):
+        """
+        Queue a cursor move to [row], [column] (both starting at 1), unless the
+        cursor is already there.
+        """
+        if self._cursor != (row, column):
+            self._output.append('{}{};{}H'.format(ESC, row, column))
+
+    def _text(self, row, column, text):
+        """
+        Queue [text] at [row], [column], in the terminal's own colors.
+        """
+        self._move_to(row, column)
+        if self._color != 0:
+            self._output.append(COLOR_CODES[0])
+            self._color = 0
+
+        self._output.append(text)
+        self._cursor = (row, column + len(text))
+
+    def _cell(self, row, column, color):
+        """
+        Queue one square of [color] (or GHOST) at [row], [column].
+        """
+        text = CELL
+        if color == GHOST:
+            color = 0
+            text = GHOST_CELL
+
+        self._move_to(row, column)
+        if self._color != color:
+            self._output.append(COLOR_CODES[color])
+            self._color = color
+
+        self._output.append(text)
+        self._cursor = (row, column + len(text))
+
+    def draw_screen(self, score, level):
+        """
+        Clear the terminal and draw the border and the labels; the board and
+        the preview are drawn by the next update().
+        """
+        self._output.append(ESC + '2J' + ESC + '?25l')  # clear, hide the cursor
+        self._color = None
+        self._cursor = None
+
+        border = '+' + '-' * (2 * self.width) + '+'
+        self._text(1, 1, border)
+        for row in range(2, self.height + 2):
+            self._text(row, 1, '|')
+            self._text(row, 2 * self.width + 2, '|')
+        self._text(self.height + 2, 1, border)
+
+        self._text(PREVIEW_ROW - 1, self.sidebar_x, 'Next:')
+        self.update_score(score)
+        self.update_level(level)
+        self._draw_state()
+
+        self.shadow[:] = bytes([UNKNOWN]) * len(self.shadow)
+        self.preview_shadow[:] = bytes([UNKNOWN]) * len(self.preview_shadow)
+
+        self.bytes_written += self._emit()
+
+    def _draw_state(self):
+        """
+        Queue the paused or game over message, or blank it out.
+        """
+        if self.game_is_over:
+            message = 'GAME OVER'
+        elif self.is_paused:
+            message = 'PAUSED'
+        else:
+            message = ''
+
+        self._text(4, self.sidebar_x, '{:<9}'.format(message))
+
+    def _compose(self):
+        """
+        Fill the frame buffer with the field, the ghost and the active piece,
+        and the preview buffer with the upcoming pieces.
+        """
+        tetris = self.game
+        frame = self.frame
+        width = self.width
+
+        for y in range(self.height):
+            frame[y * width:(y + 1) * width] = tetris.field.row_colors(y)
+
+        game_piece = tetris.game_piece
+        if not tetris.intersects():
+            landing_y = tetris.landing_y()
+            for x, y in game_piece.shape().cells:
+                frame[(landing_y + y) * width + game_piece.x + x] = GHOST
+
+        for x, y in game_piece.shape().cells:
+            x += game_piece.x
+            y += game_piece.y
+            if 0 <= x < width and 0 <= y < self.height:
+                frame[y * width + x] = game_piece.color
+
+        preview = self.preview
+        preview[:] = bytes(len(preview))
+        slot_size = GAME_PIECE_DIMENSION * GAME_PIECE_DIMENSION
+        for ahead in range(self.previews):
+            next_piece = tetris.upcoming[ahead]
+            start = ahead * slot_size
+            for x, y in next_piece.shape().cells:
+                preview[start + y * GAME_PIECE_DIMENSION + x] = next_piece.color
+
+    def _diff(self, frame, shadow, width, top, left):
+        """
+        Queue the cells of [frame] that differ from [shadow], and update the shadow.
+        """
+        for y in range(len(frame) // width):
+            start = y * width
+            if frame[start:start + width] == shadow[start:start + width]:
+                continue
+
+            for x in range(width):
+                color = frame[start + x]
+                if color != shadow[start + x]:
+                    shadow[start + x] = color
+                    self._cell(top + y, left + 2 * x, color)
+
+    def update(self):
+        """
+        Write the changes to the board and the preview since the last update.
+        """
+        if not (self.is_paused or self.game_is_over):
+            self._compose()
+            self._diff(self.frame, self.shadow, self.width, 2, 2)
+            self._diff(
+                self.preview, self.preview_shadow, GAME_PIECE_DIMENSION, PREVIEW_ROW, self.sidebar_x
+            )
+
+        self.last_frame_bytes = self._emit()
+        self.bytes_written += self.last_frame_bytes
+        self.frames += 1
+
+    def on_game_state_change(self, state):
+        """
+        React to the game state changing
+        """
+        self.game_is_over = state == game_state.gameover
+        self.is_paused = state == game_state.paused
+        self._draw_state()
+
+    def update_score(self, score):
+        """
+        Update the score on the terminal.  Callback passed into the
+        game instance that is called whenever the score is updated.
+        """
+        self._text(2, self.sidebar_x, 'Score: {:03d}'.format(score))
+
+    def update_level(self, level):
+        """
+        Update the level on the terminal.  Callback passed into the
+        game instance that is called whenever the level is updated.
+        """
+        self._text(3, self.sidebar_x, 'Level: {:02d}'.format(level))
+
+    def close(self):
+        """
+        Put the terminal's colors and cursor back, below the game.
+        """
+        self._move_to(self.height + 3, 1)
+        self._output.append(COLOR_CODES[0] + ESC + '?25h\n')
+        self.bytes_written += self._emit()
+
+class TerminalKeys:
+    """
+    Read keys from a terminal in cbreak mode, on a host.  A terminal only
+    reports key presses, so every key is turned into a press and a release,
+    and holding a key relies on the terminal's own key repeat.
+
+    Arrow keys move, z and x rotate, p pauses and r starts a new game.
+    """
+    keys = {
+        '\x1b[D': 'left', '\x1b[C': 'right', '\x1b[B': 'down', '\x1b[A': 'up',
+        'z': 'A', 'x': 'B', 'p': 'start', 'r': 'select',
+    }
+
+    def __init__(self, keymap):
+        import termios  # pylint: disable=import-outside-toplevel
+        import tty  # pylint: disable=import-outside-toplevel
+
+        self.keymap = keymap
+        self.quit = False
+        self._pending = []
+        self._saved = termios.tcgetattr(sys.stdin)
+        tty.setcbreak(sys.stdin.fileno())
+
+    def get_event(self):
+        """
+        Get the next key event, or None if no key was pressed.
+        """
+        import os  # pylint: disable=import-outside-toplevel
+        import select  # pylint: disable=import-outside-toplevel
+
+        if self._pending:
+            return self._pending.pop()
+
+        if not select.select([sys.stdin], [], [], 0)[0]:
+            return None
+
+        text = os.read(sys.stdin.fileno(), 32).decode(errors='ignore')
+        if 'q' in text:
+            self.quit = True
+
+        for sequence, key in self.keys.items():
+            if text.startswith(sequence):
+                key_number = getattr(self.keymap, key)
+                self._pending.append(KeyEvent(key_number, False))
+
+                return KeyEvent(key_number, True)
+
+        return None
+
+    def close(self):
+        """
+        Put the terminal back the way it was.
+        """
+        import termios  # pylint: disable=import-outside-toplevel
+
+        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self._saved)
+
+def main():
+    """ Play, or watch the bot play, in the terminal. """
+    import argparse  # pylint: disable=import-outside-toplevel
+    import random  # pylint: disable=import-outside-toplevel
+
+    from game_loop import GameLoop  # pylint: disable=import-outside-toplevel
+    from keymap import Keymap  # pylint: disable=import-outside-toplevel
+    from randomizer import RANDOMIZERS  # pylint: disable=import-outside-toplevel
+    from tetris import Game  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description='Play Tetris in a terminal.')
+    parser.add_argument('--bot', action='store_true', help='let the bot play')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the game')
+    parser.add_argument('--fps', type=int, default=60, help='most frames per second')
+    parser.add_argument('--height', type=int, default=19, help='board height')
+    parser.add_argument('--width', type=int, default=10, help='board width')
+    parser.add_argument('--preview', type=int, default=3, help='number of upcoming pieces shown')
+    parser.add_argument(
+        '--randomizer', choices=[cls.__name__ for cls in RANDOMIZERS],
+        default=RANDOMIZERS[0].__name__, help='piece randomizer'
+    )
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.getrandbits(30)
+    randomizer_class = next(cls for cls in RANDOMIZERS if cls.__name__ == args.randomizer)
+    game = Game(
+        args.height, args.width, Keymap(), seed=seed, randomizer_class=randomizer_class,
+        preview=args.preview
+    )
+    user_interface = TerminalUserInterface(game)
+    game.on_state_change += user_interface.on_game_state_change
+    game.on_score_change.add(user_interface.update_score, coalesce=True)
+    game.on_level_change.add(user_interface.update_level, coalesce=True)
+
+    if args.bot:
+        from bot import BotInput  # pylint: disable=import-outside-toplevel
+        from headless import InputEvents, game_clock  # pylint: disable=import-outside-toplevel
+        from key_input import KeyRepeater  # pylint: disable=import-outside-toplevel
+
+        controls = KeyRepeater(InputEvents(BotInput(game), game), game.keymap, game_clock(game))
+        keys = None
+    else:
+        controls = keys = TerminalKeys(game.keymap)
+
+    loop = GameLoop(game, user_interface, controls, max_fps=args.fps)
+
+    try:
+        while not (keys is not None and keys.quit) and \
+              not (args.bot and game.state == game_state.gameover):
+            loop.step()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if keys is not None:
+            keys.close()
+        user_interface.close()
+
+    print('score {}, {} frames, {:.0f} bytes per frame'.format(
+        game.score, user_interface.frames,
+        user_interface.bytes_written / max(user_interface.frames, 1)
+    ))
+
+if __name__ == '__main__':
+    main()
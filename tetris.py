@@ -2,10 +2,14 @@
 Logic to represent a game of Tetris.
 """
 import random
+import struct
 
-from util import CallbackProperty, colors
-
-GAME_PIECE_DIMENSION = 4 # game pieces are presented by a 4 x 4 pixel array
+from field import BitboardField, GAME_PIECE_DIMENSION
+from keymap import (
+    HARD_DROP, MOVE_LEFT, MOVE_RIGHT, PAUSE, RESET, ROTATE_LEFT, ROTATE_RIGHT, SOFT_DROP
+)
+from randomizer import PieceQueue, RANDOMIZERS, UniformRandomizer
+from util import CallbackProperty, SeededRandom, colors
 
 class GameState:
     """
@@ -27,6 +31,62 @@ class GameState:
         return "GAME OVER"
 
 game_state = GameState()
+# the game states by number, as stored in snapshots
+GAME_STATES = (game_state.playing, game_state.paused, game_state.gameover)
+
+SNAPSHOT_VERSION = 3
+# version, height, width, ticks, counter, score, game state, soft drop, and what the game was
+# built with, which has to match to restore it: field kind, randomizer, preview, seeded
+GAME_SNAPSHOT = '<BHHIIIBBBBBB'
+# lines, pieces, active piece (type, rotation, x, y, color), has a random state, random state
+TETRIS_SNAPSHOT = '<IIBBhhBBI'
+GAME_SNAPSHOT_SIZE = struct.calcsize(GAME_SNAPSHOT)
+TETRIS_SNAPSHOT_SIZE = struct.calcsize(TETRIS_SNAPSHOT)
+
+class PieceShape:
+    """
+    One rotation of a game piece, compiled from its image (the list of
+    occupied cells in the 4 x 4 piece array) into the tables that the
+    field needs for collision checks and freezing.
+
+    :param list image: The occupied cells, numbered row * 4 + column.
+    """
+    __slots__ = (
+        'image', 'cells', 'min_x', 'max_x', 'min_y', 'max_y', 'row_masks', 'column_bottoms'
+    )
+
+    def __init__(self, image):
+        self.image = image
+        self.cells = tuple(
+            (coord % GAME_PIECE_DIMENSION, coord // GAME_PIECE_DIMENSION) for coord in image
+        )
+
+        self.min_x = min(x for x, _ in self.cells)
+        self.max_x = max(x for x, _ in self.cells)
+        self.min_y = min(y for _, y in self.cells)
+        self.max_y = max(y for _, y in self.cells)
+
+        row_masks = [0] * GAME_PIECE_DIMENSION
+        for x, y in self.cells:
+            row_masks[y] |= 1 << x
+
+        # (row, mask) pairs for the rows of the piece array that have squares in them
+        self.row_masks = tuple((y, mask) for y, mask in enumerate(row_masks) if mask)
+
+        # (column, row) pairs of the lowest square in each column of the piece array
+        self.column_bottoms = tuple(
+            (column, max(y for x, y in self.cells if x == column))
+            for column in range(GAME_PIECE_DIMENSION)
+            if any(x == column for x, _ in self.cells)
+        )
+
+def compile_piece_shapes(game_pieces):
+    """
+    Compile every rotation of every game piece into a PieceShape.
+
+    :returns tuple A tuple of PieceShape tuples, indexed by piece type and then rotation.
+    """
+    return tuple(tuple(PieceShape(image) for image in rotations) for rotations in game_pieces)
 
 class GamePiece:
     """
@@ -35,9 +95,11 @@ class GamePiece:
 
     :param int x: This piece's x position on the field.
     :param int y: This piece's y position on the field.
+    :param rng: The random number generator used to pick the piece and its color.
+    :param int piece_type: Use this piece type instead of a random one.
+    :param int color: Use this color instead of a random one.
     """
-    x = 0
-    y = 0
+    __slots__ = ('x', 'y', '_game_piece_type', 'shapes', 'color', 'rotation')
 
     game_pieces = [
         [[1, 5, 9, 13], [4, 5, 6, 7]],
@@ -49,75 +111,166 @@ class GamePiece:
         [[1, 2, 5, 6]],
     ]
 
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=random, piece_type=None, color=None):
         self.x = x
         self.y = y
 
-        self._game_piece_type = random.randint(0, len(self.game_pieces) - 1)
-        self.color = random.randint(1, len(colors) - 1)
+        self._game_piece_type = piece_type if piece_type is not None \
+            else rng.randint(0, len(self.game_pieces) - 1)
+        self.shapes = self.piece_shapes[self._game_piece_type]
+        self.color = color if color is not None else rng.randint(1, len(colors) - 1)
+        self.rotation = 0
+
+    def reset(self, x, y, piece_type, color):
+        """
+        Turn this piece into a new piece of [piece_type] and [color] at (x, y),
+        so that piece objects can be reused instead of allocated.
+        """
+        self.x = x
+        self.y = y
+        self._game_piece_type = piece_type
+        self.shapes = self.piece_shapes[piece_type]
+        self.color = color
         self.rotation = 0
 
+    @property
+    def piece_type(self):
+        """ The index of this piece's type in game_pieces """
+        return self._game_piece_type
+
+    def get_state(self):
+        """
+        Get this piece's (type, rotation, x, y, color), for set_state.
+        """
+        return self._game_piece_type, self.rotation, self.x, self.y, self.color
+
+    def set_state(self, state):
+        """
+        Restore this piece from get_state, without drawing any random numbers.
+        """
+        piece_type, rotation, x, y, color = state
+
+        self.reset(x, y, piece_type, color)
+        self.rotation = rotation
+
     def image(self):
         """
         Get the image representation of this piece.
 
         :returns tuple An RGB representation fo the color of the piece.
         """
-        return self.game_pieces[self._game_piece_type][self.rotation]
+        return self.shapes[self.rotation].image
+
+    def shape(self):
+        """
+        Get the precompiled PieceShape for this piece's current rotation.
+        """
+        return self.shapes[self.rotation]
+
+    def left_rotation(self):
+        """
+        Get the rotation this piece would have after one movement to the left.
+        """
+        return (self.rotation - 1) % len(self.shapes)
+
+    def right_rotation(self):
+        """
+        Get the rotation this piece would have after one movement to the right.
+        """
+        return (self.rotation + 1) % len(self.shapes)
 
     def rotate_left(self):
         """
         Rotate this piece one movement to the left
         """
-        self.rotation = (self.rotation - 1) % len(self.game_pieces[self._game_piece_type])
+        self.rotation = self.left_rotation()
 
     def rotate_right(self):
         """
         Rotate this piece one movement to the right
         """
-        self.rotation = (self.rotation + 1) % len(self.game_pieces[self._game_piece_type])
+        self.rotation = self.right_rotation()
+
+GamePiece.piece_shapes = compile_piece_shapes(GamePiece.game_pieces)
 
 
 class Tetris:
     """
     Class to represent the state of the Tetris field.
+
+    :param int height: The number of rows on the board.
+    :param int width: The number of columns on the board.
+    :param class field_class: The field representation to use (see field.py).
+    :param rng: The random number generator for new pieces (defaults to the random module).
+    :param class randomizer_class: The piece randomizer to use (see randomizer.py).
+    :param int preview: The number of upcoming pieces to keep in upcoming.
     """
-    field = []
+    __slots__ = (
+        'height', 'width', 'rng', 'field', 'queue', 'game_piece', 'next_game_piece', 'upcoming',
+        'lines', 'pieces'
+    )
+
+    spawn_x = 3
+    spawn_y = 0
 
-    def __init__(self, height, width):
+    def __init__(self, height, width, field_class=BitboardField, rng=None,
+                 randomizer_class=UniformRandomizer, preview=1):
         self.height = height
         self.width = width
+        self.rng = rng if rng is not None else random
+
+        self.field = field_class(height, width)
+        self.queue = PieceQueue(
+            randomizer_class(self.rng, len(GamePiece.game_pieces)), self.rng, max(preview, 1)
+        )
 
-        self.game_piece = None
-        self.next_game_piece = None
+        # the pieces are reset with the queue's types and colors on every spawn, never allocated
+        self.game_piece = GamePiece(self.spawn_x, self.spawn_y, piece_type=0, color=1)
+        self.upcoming = tuple(
+            GamePiece(self.spawn_x, self.spawn_y, piece_type=0, color=1)
+            for _ in range(len(self.queue))
+        )
+        self.next_game_piece = self.upcoming[0]
+
+        self.lines = 0
+        self.pieces = 0
 
         self.reset_game()
 
     def new_game_piece(self):
         """
-        Generate a new piece.
+        Spawn the next piece from the queue.  The piece count doubles as the
+        spawn's serial number, since the piece objects are reused.
         """
-        self.game_piece = self.next_game_piece \
-            if self.next_game_piece is not None else GamePiece(3, 0)
-        self.next_game_piece = GamePiece(3, 0)
+        queue = self.queue
+        self.game_piece.reset(self.spawn_x, self.spawn_y, queue.piece_type(), queue.color())
+        queue.advance()
+        self._reset_upcoming()
+        self.pieces += 1
 
-    def intersects(self):
+    def _reset_upcoming(self):
         """
-        Determine if the current piece is either off the board or hitting the field.
+        Make the upcoming pieces match the queue.
         """
-        intersection = False
+        queue = self.queue
+        upcoming = self.upcoming
+        ahead = 0
 
-        for i in range(GAME_PIECE_DIMENSION):
-            for j in range(GAME_PIECE_DIMENSION):
-                if i * GAME_PIECE_DIMENSION + j in self.game_piece.image():
-                    if i + self.game_piece.y > self.height - 1 or \
-                       j + self.game_piece.x > self.width - 1 or \
-                       j + self.game_piece.x < 0 or \
-                       self.field[i + self.game_piece.y][j + self.game_piece.x] > 0:
+        while ahead < len(upcoming):
+            upcoming[ahead].reset(
+                self.spawn_x, self.spawn_y, queue.piece_type(ahead), queue.color(ahead)
+            )
+            ahead += 1
 
-                        intersection = True
+    def intersects(self):
+        """
+        Determine if the current piece is either off the board or hitting the field.
+        """
+        game_piece = self.game_piece
 
-        return intersection
+        return self.field.intersects(
+            game_piece.shapes[game_piece.rotation], game_piece.x, game_piece.y
+        )
 
     def clear_full_lines(self):
         """
@@ -125,15 +278,8 @@ class Tetris:
 
         : returns int The number of full lines removed
         """
-        line_capacity = tuple(
-            sum(int(x > 0) for x in self.field[i]) for i in range(len(self.field))
-        )
-        full_lines = sum(line_capacity[i] == self.width for i in range(len(line_capacity)))
-
-        # remove full lines and insert new empty lines on top
-        self.field = list(
-            [0] * self.width for _ in range(full_lines)
-        ) + list(self.field[i] for i in range(len(self.field)) if line_capacity[i] < self.width)
+        full_lines = self.field.clear_full_lines()
+        self.lines += full_lines
 
         return full_lines
 
@@ -143,68 +289,187 @@ class Tetris:
         """
         self.game_piece.y = self.game_piece.y + 1
 
+    def landing_y(self):
+        """
+        Get the row the current piece would land on if it was dropped, which
+        is also where its ghost is drawn.
+        """
+        game_piece = self.game_piece
+
+        return self.field.drop_y(
+            game_piece.shapes[game_piece.rotation], game_piece.x, game_piece.y
+        )
+
+    def hard_drop(self):
+        """
+        Move the current piece straight down onto the field.
+        """
+        self.game_piece.y = self.landing_y()
+
     def freeze(self):
         """
         Freeze the current piece in place on the field.
         """
-        # we've gone down one too many steps, so go up one
-        self.game_piece.y -= 1
-
-        image = self.game_piece.image()
+        game_piece = self.game_piece
 
-        for coord in image:
-            x = coord % GAME_PIECE_DIMENSION
-            y = coord // GAME_PIECE_DIMENSION
+        # we've gone down one too many steps, so go up one
+        game_piece.y -= 1
 
-            self.field[y + self.game_piece.y][x + self.game_piece.x] = self.game_piece.color
+        self.field.freeze(
+            game_piece.shapes[game_piece.rotation], game_piece.x, game_piece.y, game_piece.color
+        )
 
     def move_laterally(self, dx):
         """
         Move a piece to the side by [dx] units.
         """
-        old_x = self.game_piece.x
-        self.game_piece.x += dx
-        if self.intersects():
-            self.game_piece.x = old_x
+        game_piece = self.game_piece
+        shape = game_piece.shapes[game_piece.rotation]
+
+        if not self.field.intersects(shape, game_piece.x + dx, game_piece.y):
+            game_piece.x += dx
+
+    def _rotate(self, rotation):
+        """
+        Rotate a piece to [rotation], unless that would make it intersect the field.
+        """
+        game_piece = self.game_piece
+
+        if not self.field.intersects(game_piece.shapes[rotation], game_piece.x, game_piece.y):
+            game_piece.rotation = rotation
 
     def rotate_left(self):
         """
         Rotate a piece to the left.
         """
-        old_rotation = self.game_piece.rotation
-        self.game_piece.rotate_left()
-        if self.intersects():
-            self.game_piece.rotation = old_rotation
+        self._rotate(self.game_piece.left_rotation())
 
     def rotate_right(self):
         """
         Rotate a piece to the right.
         """
-        old_rotation = self.game_piece.rotation
-        self.game_piece.rotate_right()
-        if self.intersects():
-            self.game_piece.rotation = old_rotation
+        self._rotate(self.game_piece.right_rotation())
+
+    def get_state(self):
+        """
+        Get a copy of everything needed to restore this board with set_state.
+        """
+        return (
+            self.field.get_state(), self.game_piece.get_state(), self.queue.get_state(),
+            self.lines, self.pieces, self._rng_state()
+        )
+
+    def set_state(self, state):
+        """
+        Restore this board from get_state.
+        """
+        field, game_piece, queue, self.lines, self.pieces, rng_state = state
+
+        self.field.set_state(field)
+        self.game_piece.set_state(game_piece)
+        self.queue.set_state(queue)
+        self._reset_upcoming()
+
+        if rng_state is not None and self.seeded():
+            self.rng.state = rng_state
+
+    def seeded(self):
+        """
+        Determine if the pieces come from this board's own SeededRandom,
+        rather than from the global random module, whose state isn't saved.
+        """
+        return isinstance(self.rng, SeededRandom)
+
+    def _rng_state(self):
+        """
+        Get the state of the board's SeededRandom, or None if it isn't seeded.
+        """
+        return self.rng.state if self.seeded() else None
+
+    def snapshot(self):
+        """
+        Get everything needed to restore this board as bytes, for restore:
+        the counts, the active piece and the random state (TETRIS_SNAPSHOT),
+        followed by the queue and the field.
+        """
+        game_piece = self.game_piece
+        rng_state = self._rng_state()
+
+        return b''.join((
+            struct.pack(
+                TETRIS_SNAPSHOT, self.lines, self.pieces, game_piece.piece_type,
+                game_piece.rotation, game_piece.x, game_piece.y, game_piece.color,
+                rng_state is not None, rng_state or 0
+            ),
+            self.queue.snapshot(),
+            self.field.snapshot()
+        ))
+
+    def restore(self, blob, offset=0):
+        """
+        Restore this board from snapshot() bytes at [offset] in [blob].  The
+        field shares its colors with [blob] until it changes them (see
+        BitboardField.restore).
+
+        :returns int The offset of the end of the board in [blob].
+        """
+        self.lines, self.pieces, piece_type, rotation, x, y, color, has_rng_state, rng_state = \
+            struct.unpack_from(TETRIS_SNAPSHOT, blob, offset)
+
+        self.game_piece.reset(x, y, piece_type, color)
+        self.game_piece.rotation = rotation
+        offset = self.queue.restore(blob, offset + TETRIS_SNAPSHOT_SIZE)
+        self._reset_upcoming()
+
+        if has_rng_state and self.seeded():
+            self.rng.state = rng_state
+
+        return self.field.restore(blob, offset)
 
     def reset_game(self):
         """
         Get ready for a new game by clearing the field and getting a new piece.
         """
-        self.field = [[0] * self.width for _ in range(self.height)]
+        self.field.reset()
+        self.lines = 0
+        self.pieces = 0
         self.new_game_piece()
 
 class Game:
     """
     Handle top-level aspects of the game, logic of when to move pieces,
     and keep score.
-    """
-    fps = 500
-    key_fps = 50
 
-    def __init__(self, height, width, keymap):
+    :param int seed: Seed for this game's pieces.  Without one, pieces come
+        from the global random module.
+    :param class randomizer_class: The piece randomizer to use (see randomizer.py).
+    :param int preview: The number of upcoming pieces the game keeps.
+    :param class field_class: The field representation to use (see field.py);
+        fields_host.SparseField for very large boards.
+
+    The engine is change-driven: move() only checks the piece against the
+    field on ticks after the piece moved or the field changed (needs_check),
+    and idle_ticks() tells a caller how many of the coming ticks would do
+    nothing at all, so that it can skip() over them or sleep through them.
+    """
+    __slots__ = (
+        'height', 'width', 'seed', 'counter', 'ticks', 'level', 'score', 'state',
+        '_on_state_change', '_on_score_change', '_on_level_change', 'keymap', 'actions',
+        'soft_drop', 'needs_check', 'recorder', 'tetris'
+    )
+
+    tick_ms = 2 # the engine is stepped 500 times per second (see game_loop.py)
+    base_gravity_ms = 3000 # how long the piece takes to fall one row on level 1
+    max_counter = 100000 # the tick counter wraps around to 0 after this
+
+    def __init__(self, height, width, keymap, seed=None, randomizer_class=UniformRandomizer,
+                 preview=1, field_class=BitboardField):
         self.height = height
         self.width = width
+        self.seed = seed
 
         self.counter = 0
+        self.ticks = 0
         self.level = 1
         self.score = 0
         self.state = game_state.playing
@@ -213,8 +478,15 @@ class Game:
         self._on_score_change = CallbackProperty()
         self._on_level_change = CallbackProperty()
         self.keymap = keymap
-        self.pressed_key = None
-        self.tetris = Tetris(self.height, self.width)
+        self.actions = keymap.actions()
+        self.soft_drop = False
+        self.needs_check = True # set whenever the piece moves or the board changes
+        self.recorder = None
+        self.tetris = Tetris(
+            self.height, self.width, field_class=field_class,
+            rng=SeededRandom(seed) if seed is not None else None,
+            randomizer_class=randomizer_class, preview=preview
+        )
 
     @property
     def on_score_change(self):
@@ -284,11 +556,24 @@ class Game:
             self.level = level
             print('Level: {}'.format(level))
 
-            for level_change_callback in self._on_level_change:
-                level_change_callback(level)
+            self._on_level_change.dispatch(level)
 
-        for score_change_callback in self.on_score_change:
-            score_change_callback(score)
+        self._on_score_change.dispatch(score)
+
+    def _restore_progress(self, score, state):
+        """
+        Set the score, level and state of a restored game without printing
+        the level.  The callbacks are only called when something listens to
+        them, so restoring a fork (which has none) stays quiet and cheap.
+        """
+        self.score = score
+        self.level = (score // 10) + 1
+        self.state = state
+
+        if self._on_level_change or self._on_score_change or self._on_state_change:
+            self._on_level_change.dispatch(self.level)
+            self._on_score_change.dispatch(score)
+            self._on_state_change.dispatch(state)
 
     def _change_state(self, state):
         """
@@ -296,31 +581,63 @@ class Game:
         """
         self.state = state
 
-        for state_change_callback in self.on_state_change:
-            state_change_callback(state)
+        self._on_state_change.dispatch(state)
+
+    def flush_events(self):
+        """
+        Deliver the last state, level and score to the callbacks that were added
+        with coalesce=True.  Call this once before drawing a frame.
+        """
+        self._on_state_change.flush()
+        self._on_level_change.flush()
+        self._on_score_change.flush()
 
     def handle_event(self, event):
         """
         Handle a user event by moving the piece on the board.
         """
-        if event.pressed:
-            # if user wants to rotate, assume they don't press and hold
-            if event.key_number == self.keymap.A:
-                self.tetris.rotate_left()
-            elif event.key_number == self.keymap.B:
-                self.tetris.rotate_right()
-            elif event.key_number == self.keymap.start:
+        if self.recorder is not None:
+            self.recorder.record(self.ticks, event.key_number, event.pressed)
+
+        if not event.pressed:
+            return
+
+        # held keys are repeated by the input layer (see key_input.py), so
+        # every press moves the piece once
+        action = self.actions[event.key_number]
+
+        if action == PAUSE:
+            # a game that's over stays over; start it again with RESET
+            if self.state != game_state.gameover:
                 self._change_state(
                     game_state.paused
                     if self.state == game_state.playing
                     else game_state.playing
                 )
-            elif event.key_number == self.keymap.select:
-                self.reset_game()
-            else: # for directional keys, allow press and hold
-                self.pressed_key = event.key_number
-        elif event.key_number not in [self.keymap.A, self.keymap.B]:
-            self.pressed_key = None
+        elif action == RESET:
+            self.reset_game()
+        elif action == ROTATE_LEFT:
+            # as before the input layer, the piece can be turned in any state
+            self.tetris.rotate_left()
+        elif action == ROTATE_RIGHT:
+            self.tetris.rotate_right()
+        elif self.state != game_state.playing:
+            # moves are only made while playing, as when held keys were stepped by move()
+            return
+        elif action == MOVE_LEFT:
+            self.tetris.move_laterally(-1)
+        elif action == MOVE_RIGHT:
+            self.tetris.move_laterally(1)
+        elif action == SOFT_DROP:
+            # dropped on the next move, so the piece never moves down twice in a tick
+            self.soft_drop = True
+        elif action == HARD_DROP:
+            # the next move takes the piece one row past where it lands, freezing it
+            self.tetris.hard_drop()
+            self.soft_drop = True
+
+        # the piece may have moved, so it's checked against the field on the next move
+        self.needs_check = True
 
     def check_game_state(self):
         """
@@ -343,38 +660,77 @@ class Game:
             if self.tetris.intersects():
                 self._change_state(game_state.gameover)
 
-    def _time_to_move(self, fps):
+    def gravity_ms(self):
+        """
+        Get how long, in milliseconds, the active piece takes to fall one row
+        on the current level.
         """
-        Determine if it's time to move the active piece, based upon a
-        given frame rate.
+        return max(self.base_gravity_ms // self.level, self.tick_ms)
 
-        :param fps int the frame rate used to determine if it's time to move a piece.
+    def _time_to_move(self, interval_ms):
         """
-        return self.counter % fps == 0
+        Determine if it's time for the active piece to fall, based upon an
+        interval in milliseconds and the tick counter.
+
+        :param interval_ms int the time between moves, in milliseconds.
+        """
+        return self.counter % max(interval_ms // self.tick_ms, 1) == 0
 
     def move(self):
         """
         Move the active piece, if required, and check the game state.
         """
+        self.ticks += 1
+
         if self.state in [game_state.paused, game_state.gameover]:
             return
 
         self.counter += 1
-        if self.counter > 100000:
+        if self.counter > self.max_counter:
             self.counter = 0
 
         if self.state == game_state.playing:
-            if self._time_to_move(self.fps // self.level * 3) or \
-               (self._time_to_move(self.key_fps) and self.pressed_key == self.keymap.down):
+            if self.soft_drop or self._time_to_move(self.gravity_ms()):
+                self.soft_drop = False
+                self.needs_check = True
                 self.tetris.move_down()
 
-            if self.pressed_key is not None and self._time_to_move(self.key_fps):
-                if self.pressed_key == self.keymap.left:
-                    self.tetris.move_laterally(-1)
-                elif self.pressed_key == self.keymap.right:
-                    self.tetris.move_laterally(1)
+        if self.needs_check:
+            self.needs_check = False
+            self.check_game_state()
+
+    def idle_ticks(self):
+        """
+        Get the number of coming ticks on which move() would only count the
+        tick: no gravity step, no soft drop and no collision check.
+
+        :returns int The number of idle ticks before the next one that does
+            something, or None if nothing is scheduled (the game is paused or
+            over) and only a key press can change the game.
+        """
+        if self.state != game_state.playing:
+            return None
+
+        if self.soft_drop or self.needs_check:
+            return 0
 
-        self.check_game_state()
+        interval = max(self.gravity_ms() // self.tick_ms, 1)
+        due = interval - self.counter % interval
+        # the counter wrapping around to 0 is a gravity step too
+        wrap = self.max_counter + 1 - self.counter
+
+        return (due if due < wrap else wrap) - 1
+
+    def skip(self, ticks):
+        """
+        Count [ticks] idle ticks at once, exactly as that many calls to
+        move() would.  [ticks] must be no more than idle_ticks() (any number,
+        when idle_ticks() is None).
+        """
+        self.ticks += ticks
+
+        if self.state == game_state.playing:
+            self.counter += ticks
 
     def reset_game(self):
         """
@@ -382,6 +738,107 @@ class Game:
         """
         self._change_score(0)
         self._change_state(game_state.playing)
-        self.pressed_key = None
+        self.soft_drop = False
+        self.needs_check = True
 
         self.tetris.reset_game()
+
+    def get_state(self):
+        """
+        Get a copy of everything needed to restore this game with set_state.
+        """
+        return (
+            self.tetris.get_state(), self.ticks, self.counter, self.score, self.state,
+            self.soft_drop
+        )
+
+    def set_state(self, state):
+        """
+        Restore this game from get_state, calling the score, level and state
+        callbacks (if there are any) so that anything displaying the game
+        catches up.
+        """
+        tetris, self.ticks, self.counter, score, state, self.soft_drop = state
+
+        self.tetris.set_state(tetris)
+        self.needs_check = True
+        self._restore_progress(score, state)
+
+    def snapshot(self):
+        """
+        Get everything needed to restore this game as bytes, for restore: a
+        GAME_SNAPSHOT header followed by the board's snapshot.  A 19 x 10
+        game takes about 330 bytes, and taking a snapshot doesn't create an
+        object per square, so it's cheap enough to save the game before the
+        board goes to sleep or to keep one every few seconds for replays.
+        """
+        return struct.pack(
+            GAME_SNAPSHOT, SNAPSHOT_VERSION, self.height, self.width, self.ticks, self.counter,
+            self.score, GAME_STATES.index(self.state), self.soft_drop, *self._snapshot_kind()
+        ) + self.tetris.snapshot()
+
+    def _snapshot_kind(self):
+        """
+        Get what this game was built with, as stored in the GAME_SNAPSHOT header.
+
+        :returns tuple (field kind, randomizer number, preview, seeded)
+        """
+        tetris = self.tetris
+
+        return (
+            tetris.field.snapshot_kind, RANDOMIZERS.index(type(tetris.queue.randomizer)),
+            len(tetris.queue), tetris.seeded()
+        )
+
+    def restore(self, blob):
+        """
+        Restore this game from snapshot() bytes, calling the score, level and
+        state callbacks (if there are any) so that anything displaying the
+        game catches up.
+
+        :param bytes blob: The snapshot.  It has to be of a game built the
+            same way as this one: the same board size, field class,
+            randomizer and preview, and seeded or not.  Restoring the same
+            snapshot into many games (see fork) shares its field colors
+            between them until they change, so it mustn't be changed.
+        """
+        version, height, width, ticks, counter, score, state, soft_drop, *kind = \
+            struct.unpack_from(GAME_SNAPSHOT, blob)
+
+        if version != SNAPSHOT_VERSION:
+            raise ValueError('Unsupported snapshot version {}'.format(version))
+        if (height, width) != (self.height, self.width):
+            raise ValueError('Snapshot of a {}x{} game'.format(height, width))
+        if tuple(kind) != self._snapshot_kind():
+            field_kind, randomizer, preview, seeded = kind
+            raise ValueError(
+                'Snapshot of a game with field kind {}, {}, preview {} and {} pieces'.format(
+                    field_kind, RANDOMIZERS[randomizer].__name__, preview,
+                    'seeded' if seeded else 'unseeded'
+                )
+            )
+
+        self.ticks = ticks
+        self.counter = counter
+        self.soft_drop = bool(soft_drop)
+        self.tetris.restore(blob, GAME_SNAPSHOT_SIZE)
+        self.needs_check = True
+        self._restore_progress(score, GAME_STATES[state])
+
+    def fork(self, blob=None):
+        """
+        Get a new game in the same state as this one (or as the snapshot
+        [blob] of it), without any callbacks or recorder, for a bot to search
+        ahead from.  Forks of the same snapshot share its field colors until
+        they change them (copy on write), so many forks cost little more than
+        their row masks.
+        """
+        tetris = self.tetris
+        game = Game(
+            self.height, self.width, self.keymap, self.seed,
+            randomizer_class=type(tetris.queue.randomizer), preview=len(tetris.queue),
+            field_class=type(tetris.field)
+        )
+        game.restore(blob if blob is not None else self.snapshot())
+
+        return game
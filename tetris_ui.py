@@ -1,6 +1,10 @@
 """
 User interface classes.  This module exports a UserInterface class
 that can be used to control the display on the board.
+
+Nothing touches the hardware when this module is imported: labels,
+groups and the battery's analog input are created when the classes
+using them are, or on first use, so the first frame is drawn sooner.
 """
 
 import math
@@ -32,6 +36,8 @@ def initialize_palette(palette_colors):
 
 
 palette = initialize_palette(colors)
+# the ghost piece is drawn in one dim color, whatever the piece's color is
+ghost_palette = initialize_palette([colors[0]] + [(60, 60, 60)] * (len(colors) - 1))
 
 class GamePiece:
     """
@@ -62,71 +68,179 @@ class GamePiece:
         self.grid.x = x
         self.grid.y = y
 
-class GameField:
+class GhostPiece(GamePiece):
     """
-    Represent the field of pieces which have already fallen to the bottom.
+    Represent where the active game piece would land if it was dropped.
     """
-    palette = palette
+    palette = ghost_palette
+
+class SpriteCache:
+    """
+    Bounded cache of GamePiece sprites, keyed by piece type, rotation and
+    color, so that showing a new piece or a rotation swaps in a prebuilt
+    sprite instead of allocating a new bitmap and tile grid.  When the cache
+    is full, the least recently used sprite is evicted.
+
+    Each widget needs its own cache, since a tile grid can only be shown in
+    one group at a time.
+
+    :param int pixel_size: The pixel size of the sprites.
+    :param int max_size: The most sprites to keep around.
+    :param class sprite_class: GamePiece, or GhostPiece for ghost sprites.
+    """
+    def __init__(self, pixel_size, max_size=24, sprite_class=GamePiece):
+        self.pixel_size = pixel_size
+        self.sprite_class = sprite_class
+        self.max_size = max(max_size, 2) # the sprite being shown is never evicted
+
+        self._sprites = {}
+        self._recently_used = []
 
-    def __init__(self, game_field):
-        width = len(game_field[0])
-        height = len(game_field)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-        field = displayio.Bitmap(width, height, len(self.palette))
+    @staticmethod
+    def key(game_piece):
+        """
+        Get the cache key of a piece, as an int so that looking it up doesn't allocate.
+        """
+        return (game_piece.piece_type * 4 + game_piece.rotation) * len(colors) + game_piece.color
+
+    def get(self, game_piece, key=None):
+        """
+        Get the sprite for [game_piece], building it if it isn't cached.
+        """
+        if key is None:
+            key = self.key(game_piece)
+
+        sprite = self._sprites.get(key)
+
+        if sprite is not None:
+            self.hits += 1
+
+            if self._recently_used[-1] != key:
+                self._recently_used.remove(key)
+                self._recently_used.append(key)
+
+            return sprite
+
+        self.misses += 1
+
+        if len(self._recently_used) >= self.max_size:
+            del self._sprites[self._recently_used.pop(0)]
+            self.evictions += 1
+
+        sprite = self.sprite_class(game_piece.image(), game_piece.color, self.pixel_size)
+        self._sprites[key] = sprite
+        self._recently_used.append(key)
+
+        return sprite
+
+class GameField:
+    """
+    Represent the field of pieces which have already fallen to the bottom,
+    or the part of it that fits in a [columns] by [rows] window on a big
+    board.  The bitmap is allocated once and then only the rows in the
+    window that the game reports as dirty are redrawn, unless the window
+    moved.
+    """
+    palette = palette
 
-        for x in range(width):
-            for y in range(height):
-                field[x, y] = game_field[y][x]
+    def __init__(self, game_field, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self.visible_rows = (1 << rows) - 1
 
+        self.bitmap = displayio.Bitmap(columns, rows, len(self.palette))
         self.grid = displayio.TileGrid(
-            field, pixel_shader=self.palette, width=1, height=1,
-            tile_width=width, tile_height=height
+            self.bitmap, pixel_shader=self.palette, width=1, height=1,
+            tile_width=columns, tile_height=rows
         )
 
+        self.update(game_field, 0, 0, redraw=True)
+
+    def update(self, game_field, view_x, view_y, redraw=False):
+        """
+        Redraw the rows of the window at (view_x, view_y) that changed since
+        the last update, or all of them if [redraw] is set.
+
+        :returns bool True if any row was redrawn.
+        """
+        dirty_rows = game_field.take_dirty_rows()
+        dirty_rows = self.visible_rows if redraw else (dirty_rows >> view_y) & self.visible_rows
+        changed = dirty_rows != 0
+        bitmap = self.bitmap
+        y = 0
+
+        while dirty_rows:
+            if dirty_rows & 1:
+                row_colors = game_field.row_colors(view_y + y)
+                for x in range(self.columns):
+                    bitmap[x, y] = row_colors[view_x + x]
+
+            dirty_rows >>= 1
+            y += 1
+
+        return changed
+
 class GameBoard:
     """
     Display the Tetris game (board background, field, game piece, etc).
+
+    Boards too big to fit on the display with squares of at least
+    min_square_size pixels are shown through a window (a viewport) that
+    follows the active piece, and only the window is drawn.
     """
-    screen = displayio.Group()
+    min_square_size = 4
+    max_board_width = 64 # pixels left of the score and the preview
 
     def __init__(self, display, screen, game):
         self.display = display
         self.game = game.tetris
+        self.screen = displayio.Group()
 
-        self.square_size = math.floor(board.DISPLAY.height / self.game.height)
-        self.game_piece = None
-        self.game_piece_image = None
+        self.square_size = max(
+            math.floor(board.DISPLAY.height / self.game.height), self.min_square_size
+        )
+        self.columns = min(self.game.width, self.max_board_width // self.square_size)
+        self.rows = min(self.game.height, board.DISPLAY.height // self.square_size)
+        self.view_x = 0
+        self.view_y = 0
+        self.sprites = SpriteCache(self.square_size)
+        self.sprite_key = None
         self.piece = None
+        self.piece_position = None
+        self.ghosts = SpriteCache(self.square_size, sprite_class=GhostPiece)
+        self.ghost_key = None
+        self.ghost = None
+        self.ghost_position = None
         self.field = None
 
         self.screen4x = displayio.Group(scale=self.square_size)
         screen.append(self.screen)
         screen.append(self.screen4x)
 
-
     def create_game_border(self, board_palette):
         """
-        Draw the outline for the entire game board.
+        Draw the outline for the entire game board, as a filled rectangle in
+        the outline color with a rectangle in the background color inside it.
 
         :param board_palette ~displayio.Palette Palette for drawing the game board.
         """
-        width = self.square_size * self.game.width + 1
-        height = self.square_size * self.game.height + 1
-
-        square = displayio.Bitmap(width, height, 2)
-        square.fill(0)
+        width = self.square_size * self.columns + 1
+        height = self.square_size * self.rows + 1
 
-        for w in range(width):
-            for h in range(height):
-                if w == 0 or h == 0 or width - 1 == w or height - 1 == h:
-                    square[w, h] = 1
+        border = displayio.Group()
+        border.append(vectorio.Rectangle(
+            pixel_shader=board_palette, color_index=1, width=width, height=height
+        ))
+        border.append(vectorio.Rectangle(
+            pixel_shader=board_palette, color_index=0, width=width - 2, height=height - 2,
+            x=1, y=1
+        ))
 
-        square_grid = displayio.TileGrid(
-            square, pixel_shader=board_palette, width=1, height=1,
-            tile_width=width, tile_height=height
-        )
-
-        return square_grid
+        return border
 
     def create_game_board_squares(self, board_palette):
         """
@@ -137,13 +251,13 @@ class GameBoard:
         square = displayio.Bitmap(self.square_size, self.square_size, 2)
         square.fill(0)
 
+        # only the top and left edges of each square are drawn
         for i in range(self.square_size):
-            for j in range(self.square_size):
-                if i == 0 or j == 0:
-                    square[i, j] = 1
+            square[i, 0] = 1
+            square[0, i] = 1
 
         square_grid = displayio.TileGrid(
-            square, pixel_shader=board_palette, width=self.game.width, height=self.game.height,
+            square, pixel_shader=board_palette, width=self.columns, height=self.rows,
             tile_width=self.square_size, tile_height=self.square_size
         )
 
@@ -163,27 +277,106 @@ class GameBoard:
     def update(self):
         """
         Update the game board display.
+
+        :returns bool True if anything on the board changed.
         """
         game_piece = self.game.game_piece
+        moved = self.follow(game_piece)
+
+        if self.field is None:
+            self.field = GameField(self.game.field, self.columns, self.rows)
+            self.screen4x.append(self.field.grid)
+            moved = True
 
-        if self.game_piece != game_piece or self.game_piece_image != game_piece.image():
+        changed = self.field.update(self.game.field, self.view_x, self.view_y, redraw=moved)
+        changed = self.update_ghost(game_piece) or changed or moved
+        sprite_key = self.sprites.key(game_piece)
+
+        if sprite_key != self.sprite_key:
             if self.piece is not None:
                 self.screen4x.remove(self.piece.grid)
 
-            self.game_piece = game_piece
-            self.game_piece_image = game_piece.image()
-            self.piece = GamePiece(game_piece.image(), game_piece.color, self.square_size)
+            self.sprite_key = sprite_key
+            self.piece = self.sprites.get(game_piece, sprite_key)
 
             self.screen4x.append(self.piece.grid)
+            changed = True
 
-            if self.field is not None:
-                self.screen4x.remove(self.field.grid)
+        position = (game_piece.x - self.view_x, game_piece.y - self.view_y)
+        if self.piece_position != position:
+            self.piece_position = position
+            self.piece.update(*position)
+            changed = True
 
-            self.field = GameField(self.game.field)
+        return changed
 
-            self.screen4x.append(self.field.grid)
+    def follow(self, game_piece):
+        """
+        Move the window, on a board bigger than the display, so that
+        [game_piece] is in it, centering the piece when it has left it.
 
-        self.piece.update(self.game_piece.x, self.game_piece.y)
+        :returns bool True if the window moved.
+        """
+        shape = game_piece.shape()
+        view_x = self._follow_axis(
+            self.view_x, self.columns, self.game.width,
+            game_piece.x + shape.min_x, game_piece.x + shape.max_x
+        )
+        view_y = self._follow_axis(
+            self.view_y, self.rows, self.game.height,
+            game_piece.y + shape.min_y, game_piece.y + shape.max_y
+        )
+
+        if (view_x, view_y) == (self.view_x, self.view_y):
+            return False
+
+        self.view_x = view_x
+        self.view_y = view_y
+
+        return True
+
+    @staticmethod
+    def _follow_axis(start, size, limit, first, last):
+        """
+        Get where a window of [size] squares along one axis of a board of
+        [limit] squares starts, so that the squares [first] to [last] are in it.
+        """
+        if first >= start and last < start + size:
+            return start
+
+        return max(0, min((first + last - size) // 2 + 1, limit - size))
+
+    def update_ghost(self, game_piece):
+        """
+        Show the ghost of [game_piece] on the row it would land on.  The ghost
+        is added to the group before the piece's sprite, so the piece is drawn
+        over it.
+
+        :returns bool True if the ghost changed.
+        """
+        if self.game.intersects():  # the game is over
+            return False
+
+        changed = False
+        ghost_key = self.ghosts.key(game_piece)
+
+        if ghost_key != self.ghost_key:
+            if self.ghost is not None:
+                self.screen4x.remove(self.ghost.grid)
+
+            self.ghost_key = ghost_key
+            self.ghost = self.ghosts.get(game_piece, ghost_key)
+
+            self.screen4x.insert(1, self.ghost.grid)  # above the field, below the piece
+            changed = True
+
+        position = (game_piece.x - self.view_x, self.game.landing_y() - self.view_y)
+        if self.ghost_position != position:
+            self.ghost_position = position
+            self.ghost.update(*position)
+            changed = True
+
+        return changed
 
 
 def create_game_over_palette():
@@ -219,30 +412,39 @@ class GameOver:
 class BatteryLevelIndicator:
     """
     Display the battery level on the screen.
+    The analog input is opened, and the battery first read, on the second
+    update(), so that the first frame is shown without waiting for the ADC.
     """
-    # I have no idea if I'm doing this right
-    adc = analogio.AnalogIn(board.A6)
-
     # SWAGs from some observation
     max_level = 38000
     min_level = 31000
 
-    group = displayio.Group()
-    battery_level_label = label.Label(
-        font=terminalio.FONT, x=70, y=board.DISPLAY.height - 20, color=0x999999, text="Battery:"
-    )
-    battery_level_text = label.Label(
-        font=terminalio.FONT, x=120, y=board.DISPLAY.height - 20, color=0x999999
-    )
-
     def __init__(self):
+        self.group = displayio.Group()
+        self.battery_level_label = label.Label(
+            font=terminalio.FONT, x=70, y=board.DISPLAY.height - 20, color=0x999999,
+            text="Battery:"
+        )
+        self.battery_level_text = label.Label(
+            font=terminalio.FONT, x=120, y=board.DISPLAY.height - 20, color=0x999999
+        )
         self.group.append(self.battery_level_label)
         self.group.append(self.battery_level_text)
-        self.last_check = 0
 
-        self.battery_level = self.adc.value
-        self.battery_level_percent = self.calculate_battery_level(self.battery_level)
-        self.battery_level_text.text = '{}%'.format(self.battery_level_percent)
+        self.adc = None
+        self.last_check = None
+        self.battery_level = None
+        self._battery_level_percent = None
+
+    def read(self):
+        """
+        Read the battery, opening the analog input the first time.
+        """
+        if self.adc is None:
+            # I have no idea if I'm doing this right
+            self.adc = analogio.AnalogIn(board.A6)
+
+        return self.adc.value
 
     @property
     def battery_level_percent(self):
@@ -280,22 +482,44 @@ class BatteryLevelIndicator:
 
     def update(self):
         """
-        Calculate the battery level and update the display if it has changed by +/-5% or greater.
+        Poll the battery if it hasn't been polled for a minute.  The first
+        update only starts the countdown, already run out, so the first poll
+        is on the update after it.
+
+        :returns bool True if the display changed.
+        """
+        if self.last_check is None:
+            self.last_check = time.monotonic() - 60
+        elif time.monotonic() - self.last_check >= 60:
+            return self.poll()
+
+        return False
+
+    def poll(self):
         """
-        if time.monotonic() - self.last_check > 60:
-            self.last_check = time.monotonic()
-            current_level = self.adc.value
-            average_level = (self.battery_level * 4 + current_level) / 5
+        Read the battery and update the display if the level has changed by +/-5% or greater.
+
+        :returns bool True if the display changed.
+        """
+        self.last_check = time.monotonic()
+        current_level = self.read()
+        average_level = current_level if self.battery_level is None \
+            else (self.battery_level * 4 + current_level) / 5
+
+        self.battery_level = average_level
+        battery_level_percent = self.calculate_battery_level(self.battery_level)
+
+        if battery_level_percent != self.battery_level_percent:
+            self.battery_level_percent = battery_level_percent
+            self.battery_level_text.text = '{}%'.format(self.battery_level_percent)
 
-            self.battery_level = average_level
-            battery_level_percent = self.calculate_battery_level(self.battery_level)
+            return True
 
-            if battery_level_percent != self.battery_level_percent:
-                self.battery_level_percent = battery_level_percent
-                self.battery_level_text.text = '{}%'.format(self.battery_level_percent)
+        return False
 
     def __del__(self):
-        self.adc.deinit()
+        if self.adc is not None:
+            self.adc.deinit()
 
 class NextPiecePreview:
     """
@@ -303,69 +527,98 @@ class NextPiecePreview:
 
     :param group displayio.Group The group containing all widget elements
     """
-    label = label.Label(font=terminalio.FONT, x=0, y=0, color=0x999999, text="Next Piece:")
-
     def __init__(self, game):
         self.game = game.tetris
-        self.scale = math.floor(board.DISPLAY.height / self.game.height)
+        self.scale = max(
+            math.floor(board.DISPLAY.height / self.game.height), GameBoard.min_square_size
+        )
         self.piece_group = displayio.Group(scale=self.scale, x=20, y=15)
         self.group = displayio.Group(x=70, y=50)
-        self.group.append(self.label)
+        self.group.append(
+            label.Label(font=terminalio.FONT, x=0, y=0, color=0x999999, text="Next Piece:")
+        )
         self.group.append(self.piece_group)
 
-        self.game_piece = None
-        self.game_piece_image = None
+        self.sprites = SpriteCache(self.scale)
+        self.sprite_key = None
 
         self.update()
 
     def update(self):
         """
         Update the display to show the next piece, if required.
+
+        :returns bool True if the piece shown changed.
         """
         game_piece = self.game.next_game_piece
+        sprite_key = self.sprites.key(game_piece)
 
-        if self.game_piece != game_piece or self.game_piece_image != game_piece.image():
-            if len(self.piece_group) > 0:
-                self.piece_group.pop()
+        if sprite_key == self.sprite_key:
+            return False
 
-            self.game_piece = game_piece
-            self.game_piece_image = game_piece.image()
+        if len(self.piece_group) > 0:
+            self.piece_group.pop()
 
-            piece = GamePiece(game_piece.image(), game_piece.color, self.scale)
+        self.sprite_key = sprite_key
+        self.piece_group.append(self.sprites.get(game_piece, sprite_key).grid)
 
-            self.piece_group.append(piece.grid)
+        return True
 
 class UserInterface:
     """
     Represents the display's user interface, handling drawing the board, score card, etc.
+
+    The display is only refreshed when something on it changed, and at most
+    max_refresh_rate times a second; changes made sooner than that are shown
+    by a later update().  refreshes, skipped_refreshes (nothing changed) and
+    deferred_refreshes (too soon after the last refresh) count what update()
+    did.  update() also polls the battery once a minute, unless poll_battery
+    is turned off because something else calls update_battery() (like the
+    battery task in async_loop.py).
+
+    :param Game game: The game to display.
+    :param int max_refresh_rate: The most display refreshes per second.
+    :param clock: Function returning the time in nanoseconds.
     """
     display = board.DISPLAY
 
-    top_screen = displayio.Group()
-    score_label_label = label.Label(font=terminalio.FONT, x=70, y=5, color=0xcccccc, text="Score:")
-    score_label = label.Label(font=terminalio.FONT, x=105, y=5, color=0xcccccc, text="000")
-
-    level_group = displayio.Group()
-    level_label_label = label.Label(font=terminalio.FONT, x=70, y=20, color=0x999999, text="Level:")
-    level_label = label.Label(font=terminalio.FONT, x=105, y=20, color=0x999999, text="01")
-
-    def __init__(self, game):
+    def __init__(self, game, max_refresh_rate=30, clock=time.monotonic_ns):
         self.display.auto_refresh = False  # only update display on display.refresh()
-
+        self.clock = clock
+        self.refresh_interval_ns = 1000000000 // max_refresh_rate
+        self.last_refresh_ns = None
+        self.dirty = True
+        self.refreshes = 0
+        self.skipped_refreshes = 0
+        self.deferred_refreshes = 0
+
+        self.top_screen = displayio.Group()
         self.game_board = GameBoard(self.display, self.top_screen, game)
         self.game_board.draw_board()
 
-        self.game_over = GameOver()
+        self.game_over = None  # created the first time the game ends
 
-        self.top_screen.append(self.score_label_label)
+        self.score_label = label.Label(
+            font=terminalio.FONT, x=105, y=5, color=0xcccccc, text="000"
+        )
+        self.top_screen.append(
+            label.Label(font=terminalio.FONT, x=70, y=5, color=0xcccccc, text="Score:")
+        )
         self.top_screen.append(self.score_label)
 
-        self.level_group.append(self.level_label_label)
+        self.level_label = label.Label(
+            font=terminalio.FONT, x=105, y=20, color=0x999999, text="01"
+        )
+        self.level_group = displayio.Group()
+        self.level_group.append(
+            label.Label(font=terminalio.FONT, x=70, y=20, color=0x999999, text="Level:")
+        )
         self.level_group.append(self.level_label)
         self.top_screen.append(self.level_group)
 
         self.battery_level = BatteryLevelIndicator()
         self.top_screen.append(self.battery_level.group)
+        self.poll_battery = True
 
         self.next_piece_preview = NextPiecePreview(game)
         self.top_screen.append(self.next_piece_preview.group)
@@ -377,15 +630,39 @@ class UserInterface:
 
     def update(self):
         """
-        Update the game board.
+        Update the game board, and refresh the display if anything changed.
         """
         if not (self.is_paused or self.game_is_over):
-            self.game_board.update()
-            self.next_piece_preview.update()
+            if self.game_board.update():
+                self.dirty = True
+            if self.next_piece_preview.update():
+                self.dirty = True
 
-        self.battery_level.update()
+        if self.poll_battery and self.battery_level.update():
+            self.dirty = True
+
+        if not self.dirty:
+            self.skipped_refreshes += 1
+            return
+
+        now = self.clock()
+        if self.last_refresh_ns is not None and \
+           now - self.last_refresh_ns < self.refresh_interval_ns:
+            self.deferred_refreshes += 1
+            return
 
         self.display.refresh()
+        self.last_refresh_ns = now
+        self.dirty = False
+        self.refreshes += 1
+
+    def update_battery(self):
+        """
+        Read the battery now, marking the display for a refresh if the level
+        shown changed.
+        """
+        if self.battery_level.poll():
+            self.dirty = True
 
     def on_game_state_change(self, state):
         """
@@ -405,21 +682,32 @@ class UserInterface:
         Update the score on the display.  Callback passed into the
         game instance that is called whenever the score is updated.
         """
-        self.score_label.text = ("%03d" % score)
+        text = "%03d" % score
+        if text != self.score_label.text:
+            self.score_label.text = text
+            self.dirty = True
 
     def update_level(self, level):
         """
         Update the score on the display.  Callback passed into the
         game instance that is called whenever the score is updated.
         """
-        self.level_label.text = ("%02d" % level)
+        text = "%02d" % level
+        if text != self.level_label.text:
+            self.level_label.text = text
+            self.dirty = True
 
     def hide_game_over(self):
         """ Hide the game over modal """
         self.top_screen.pop()
+        self.dirty = True
 
     def show_game_over(self):
         """
         Display to the user that the game is over
         """
+        if self.game_over is None:
+            self.game_over = GameOver()
+
         self.top_screen.append(self.game_over.modal)
+        self.dirty = True
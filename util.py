@@ -15,16 +15,39 @@ colors = (
     (253, 152, 38),
 )
 
+# SeededRandom's state is 30 bits, so that it fits in a CircuitPython small int
+RANDOM_STATE_MASK = 0x3fffffff
+
 class CallbackProperty:
     """
     Class to emulate a callback property, which is basically an array of callbacks that
     can be added to or removed from.  I'm only implementing the in-place addition and
     subtraction operators, because those are really the only ones that I need (really I
-    only need __iadd__).
+    only need __iadd__).  add() also takes a priority and can register a coalescing
+    callback.
+
+    dispatch() calls the callbacks by index over a tuple that is only rebuilt when
+    callbacks are added or removed, so dispatching doesn't allocate, and a callback can
+    dispatch again (or change the callbacks) without upsetting the dispatch it was
+    called from.
+
+    Coalescing callbacks aren't called by dispatch(): they get the last dispatched
+    value on the next flush(), so a value that changes several times between two
+    redraws is only drawn once.
     """
+    __slots__ = ('_entries', '_serial', 'callbacks', 'deferred', 'pending', 'has_pending')
+
     def __init__(self, callbacks=None):
-        self.callbacks = callbacks if callbacks is not None else tuple()
-        self._iter_index = 0
+        self._entries = []  # (priority, serial, callback, coalesce), in dispatch order
+        self._serial = 0
+
+        self.callbacks = tuple()  # callbacks called by dispatch(), in order
+        self.deferred = tuple()  # coalescing callbacks called by flush(), in order
+        self.pending = None
+        self.has_pending = False
+
+        if callbacks is not None:
+            self += callbacks
 
     @staticmethod
     def _is_valid_callback_property(other):
@@ -39,6 +62,59 @@ class CallbackProperty:
             (isinstance(other, (list, tuple)) and all(callable(x) for x in other))
         )
 
+    @staticmethod
+    def _callback_list(other):
+        """
+        Get the callbacks held by the other argument passed into an operator method.
+        """
+        if isinstance(other, CallbackProperty):
+            return tuple(other)
+
+        if isinstance(other, (list, tuple)):
+            return other
+
+        return (other, )
+
+    def _rebuild(self):
+        """
+        Sort the callbacks by priority and rebuild the dispatch tuples.
+        """
+        self._entries.sort(key=lambda entry: (-entry[0], entry[1]))
+        self.callbacks = tuple(entry[2] for entry in self._entries if not entry[3])
+        self.deferred = tuple(entry[2] for entry in self._entries if entry[3])
+
+    def add(self, callback, priority=0, coalesce=False):
+        """
+        Add [callback].  Callbacks with a higher [priority] are called first, and
+        callbacks with the same priority are called in the order they were added.
+
+        :param bool coalesce: Call [callback] on flush() with the last dispatched
+            value, instead of on every dispatch().
+        """
+        if not callable(callback):
+            raise ValueError('Invalid callback type')
+
+        self._entries.append((priority, self._serial, callback, coalesce))
+        self._serial += 1
+        self._rebuild()
+
+    def remove(self, callback):
+        """
+        Remove every registration of [callback].
+        """
+        self._entries = [entry for entry in self._entries if entry[2] != callback]
+        self._rebuild()
+
+    def replace(self, old, new):
+        """
+        Replace [old] with [new], keeping its priority and whether it coalesces.
+        """
+        self._entries = [
+            (entry[0], entry[1], new, entry[3]) if entry[2] == old else entry
+            for entry in self._entries
+        ]
+        self._rebuild()
+
     def __add__(self, other):
         raise NotImplementedError('Please use only in-place operators for callback properties')
 
@@ -47,13 +123,17 @@ class CallbackProperty:
             raise ValueError('Invalid callback type')
 
         if isinstance(other, CallbackProperty):
-            callback_list = other.callbacks
-        elif isinstance(other, (list, tuple)):
-            callback_list = other
-        else:
-            callback_list = (other, )
+            self._entries.extend(
+                (entry[0], self._serial + index, entry[2], entry[3])
+                for index, entry in enumerate(other._entries)  # pylint: disable=protected-access
+            )
+            self._serial += len(other._entries)  # pylint: disable=protected-access
+            self._rebuild()
 
-        self.callbacks = self.callbacks + callback_list
+            return self
+
+        for callback in self._callback_list(other):
+            self.add(callback)
 
         return self
 
@@ -61,28 +141,94 @@ class CallbackProperty:
         raise NotImplementedError('Please use only in-place operators for callback properties')
 
     def __isub__(self, other):
-        if isinstance(other, CallbackProperty):
-            callback_list = other.callbacks
-        elif isinstance(other, (list, tuple)):
-            callback_list = other
-        else:
-            callback_list = (other, )
-
-        for callback in callback_list:
-            self.callbacks = tuple(x for x in self.callbacks if x != callback)
+        for callback in self._callback_list(other):
+            self.remove(callback)
 
         return self
 
     def __iter__(self):
-        self._iter_index = 0
+        return iter(tuple(entry[2] for entry in self._entries))
 
-        return self
+    def __len__(self):
+        return len(self._entries)
 
-    def __next__(self):
-        try:
-            result = self.callbacks[self._iter_index]
-            self._iter_index += 1
+    def dispatch(self, value):
+        """
+        Call the callbacks with [value], and keep it for the coalescing
+        callbacks until the next flush().
+        """
+        if self.deferred:
+            # set before calling back, so that a nested dispatch's newer value wins
+            self.pending = value
+            self.has_pending = True
+
+        callbacks = self.callbacks
+        count = len(callbacks)
+        index = 0
+        while index < count:
+            callbacks[index](value)
+            index += 1
+
+    def flush(self):
+        """
+        Call the coalescing callbacks with the last value dispatched since the
+        previous flush(), if there was one.
+        """
+        if not self.has_pending:
+            return
 
-            return result
-        except IndexError:
-            raise StopIteration  # pylint: disable=raise-missing-from
+        value = self.pending
+        self.pending = None
+        self.has_pending = False
+
+        deferred = self.deferred
+        count = len(deferred)
+        index = 0
+        while index < count:
+            deferred[index](value)
+            index += 1
+
+class SeededRandom:
+    """
+    Small xorshift random number generator, so that each game can have its
+    own reproducible sequence of pieces.  The random module on CircuitPython
+    only has one global generator, so this works the same on the board and on
+    a host.  Only the parts of the random module API that the game needs are
+    implemented.
+
+    The state is 30 bits, so that it's always a small int on CircuitPython
+    and drawing a number doesn't allocate: the bits that would be shifted
+    past the top are masked off first.  The shifts (11, 13, 8) give the full
+    period of 2 ** 30 - 1.
+
+    :param int seed: The seed for this generator.
+    """
+    __slots__ = ('state', )
+
+    def __init__(self, seed=0):
+        self.state = 1
+        self.seed(seed)
+
+    def seed(self, seed):
+        """
+        Reset this generator from [seed].
+        """
+        self.state = (seed * 2654435761 + 0x9e3779b9) & RANDOM_STATE_MASK or 1
+
+    def getrandbits30(self):
+        """
+        Get the next 30 random bits.
+        """
+        state = self.state
+        state ^= (state & (RANDOM_STATE_MASK >> 11)) << 11
+        state ^= state >> 13
+        state ^= (state & (RANDOM_STATE_MASK >> 8)) << 8
+        self.state = state
+
+        return state
+
+    def randint(self, low, high):
+        """
+        Get a random integer N such that low <= N <= high.
+        """
+        return low + self.getrandbits30() % (high - low + 1)